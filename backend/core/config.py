@@ -1,21 +1,163 @@
 """Модуль для конфигурации бэкенда и настройки логирования."""
 import logging
 import os
+from typing import List
+
+from core.constants import (
+    CACHE_BACKEND_MEMORY,
+    DEFAULT_CACHE_MAX_SIZE,
+    DEFAULT_CACHE_TTL,
+    DEFAULT_DB_POOL_MAX_INACTIVE_LIFETIME,
+    DEFAULT_DB_POOL_MAX_QUERIES,
+    DEFAULT_DB_POOL_MAX_SIZE,
+    DEFAULT_DB_POOL_MIN_SIZE,
+    DEFAULT_DB_STATEMENT_CACHE_SIZE,
+    DEFAULT_MAX_CONCURRENT_WRITES,
+    DEFAULT_PROFILE_DIR,
+    DEFAULT_RATE_LIMIT_MAX_USERS,
+    DEFAULT_READ_YOUR_WRITES_WINDOW,
+    DEFAULT_REPLICA_RETRY_INTERVAL,
+    DEFAULT_SLOW_REQUEST_THRESHOLD,
+    DEFAULT_USER_BATCH_MAX_SIZE,
+    DEFAULT_USER_BATCH_WINDOW,
+    DEFAULT_USER_WRITE_BURST,
+    DEFAULT_USER_WRITE_RATE,
+    DEFAULT_WEB_BACKLOG,
+    DEFAULT_WEB_GRACEFUL_TIMEOUT,
+    DEFAULT_WEB_HOST,
+    DEFAULT_WEB_KEEPALIVE,
+    DEFAULT_WEB_MAX_REQUESTS,
+    DEFAULT_WEB_PORT,
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def get_bool_env(name: str, default: bool) -> bool:
+    """Читает логическое значение из переменной окружения.
+
+    Args:
+        name (str): Имя переменной окружения.
+        default (bool): Значение по умолчанию, если переменная не задана.
+
+    Returns:
+        bool: True для значений 1, true, yes и on.
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
 class Settings:
     """Настройки конфигурации приложения.
 
     Атрибуты:
         database_url (str): URL базы данных, полученный из переменной окружения DATABASE_URL.
+        database_replica_urls (List[str]): URL реплик для чтения через запятую (DATABASE_REPLICA_URLS).
+        read_your_writes_window (float): Время в секундах, в течение которого пользователь после
+            записи читает свои данные с основной базы (READ_YOUR_WRITES_WINDOW).
+        replica_retry_interval (float): Время в секундах, на которое недоступная реплика
+            исключается из чтения (REPLICA_RETRY_INTERVAL).
+        cache_max_size (int): Максимальное количество пользователей в кэше (CACHE_MAX_SIZE).
+        cache_ttl (float): Время жизни записи кэша в секундах (CACHE_TTL).
+        cache_backend (str): Бэкенд кэша: none, memory или redis (CACHE_BACKEND).
+        cache_redis_url (str, optional): URL Redis для общего кэша и межпроцессной инвалидации (CACHE_REDIS_URL).
+        user_batch_window (float): Окно сбора одиночных регистраций в пакет в секундах, 0 отключает (USER_BATCH_WINDOW).
+        user_batch_max_size (int): Максимальный размер пакета регистраций (USER_BATCH_MAX_SIZE).
+        db_pool_min_size (int): Минимальное количество соединений в пуле (DB_POOL_MIN_SIZE).
+        db_pool_max_size (int): Максимальное количество соединений в пуле (DB_POOL_MAX_SIZE).
+        db_pool_max_queries (int): Количество запросов, после которого соединение пересоздаётся (DB_POOL_MAX_QUERIES).
+        db_pool_max_inactive_lifetime (float): Время жизни простаивающего соединения в секундах
+            (DB_POOL_MAX_INACTIVE_LIFETIME).
+        db_statement_cache_size (int): Размер кэша подготовленных запросов соединения (DB_STATEMENT_CACHE_SIZE).
+        generate_schemas (bool): Создавать ли таблицы из моделей при запуске вместо миграций,
+            только для разработки на SQLite (GENERATE_SCHEMAS).
+        metrics_enabled (bool): Собирать ли метрики запросов для /metrics (METRICS_ENABLED).
+        slow_request_threshold (float): Время обработки запроса в секундах, начиная с которого
+            запрос записывается в лог (SLOW_REQUEST_THRESHOLD).
+        admin_token (str, optional): Токен для служебных маршрутов /admin, без него маршруты отключены (ADMIN_TOKEN).
+        profile_dir (str): Каталог для результатов профилирования (PROFILE_DIR).
+        web_host (str): Адрес, на котором serve.py принимает соединения (WEB_HOST).
+        web_port (int): Порт, на котором serve.py принимает соединения (WEB_PORT).
+        web_workers (int): Количество рабочих процессов (WEB_WORKERS). По умолчанию по числу ядер,
+            если у процессов нет состояния в памяти (см. process_local_state), иначе 1.
+        web_backlog (int): Длина очереди входящих соединений сокета (WEB_BACKLOG).
+        web_keepalive (int): Время удержания простаивающего keep-alive соединения в секундах (WEB_KEEPALIVE).
+        web_graceful_timeout (int): Время на завершение текущих запросов при остановке
+            или перезапуске процесса в секундах (WEB_GRACEFUL_TIMEOUT).
+        web_max_requests (int): Количество запросов, после которого рабочий процесс
+            плавно перезапускается, 0 отключает перезапуск (WEB_MAX_REQUESTS).
+        admission_enabled (bool): Ограничивать ли запросы к маршрутам записи (ADMISSION_ENABLED).
+        user_write_rate (float): Количество запросов записи одного пользователя в секунду,
+            0 отключает ограничение по пользователю (USER_WRITE_RATE).
+        user_write_burst (int): Количество запросов записи одного пользователя подряд сверх
+            user_write_rate (USER_WRITE_BURST).
+        max_concurrent_writes (int): Количество одновременно обрабатываемых запросов записи
+            в процессе, 0 отключает ограничение (MAX_CONCURRENT_WRITES).
+        rate_limit_max_users (int): Количество пользователей, для которых ограничение
+            хранится в памяти процесса (RATE_LIMIT_MAX_USERS).
+        rate_limit_redis_url (str, optional): URL Redis для общего ограничения по пользователю
+            во всех процессах (RATE_LIMIT_REDIS_URL).
     """
 
     def __init__(self):
         """Инициализирует настройки конфигурации."""
         self.database_url: str = os.getenv('DATABASE_URL')
+        self.database_replica_urls: List[str] = [
+            url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()
+        ]
+        self.read_your_writes_window: float = float(
+            os.getenv('READ_YOUR_WRITES_WINDOW', DEFAULT_READ_YOUR_WRITES_WINDOW),
+        )
+        self.replica_retry_interval: float = float(os.getenv('REPLICA_RETRY_INTERVAL', DEFAULT_REPLICA_RETRY_INTERVAL))
+        self.cache_max_size: int = int(os.getenv('CACHE_MAX_SIZE', DEFAULT_CACHE_MAX_SIZE))
+        self.cache_ttl: float = float(os.getenv('CACHE_TTL', DEFAULT_CACHE_TTL))
+        self.cache_backend: str = os.getenv('CACHE_BACKEND', CACHE_BACKEND_MEMORY)
+        self.cache_redis_url: str = os.getenv('CACHE_REDIS_URL')
+        self.user_batch_window: float = float(os.getenv('USER_BATCH_WINDOW', DEFAULT_USER_BATCH_WINDOW))
+        self.user_batch_max_size: int = int(os.getenv('USER_BATCH_MAX_SIZE', DEFAULT_USER_BATCH_MAX_SIZE))
+        self.db_pool_min_size: int = int(os.getenv('DB_POOL_MIN_SIZE', DEFAULT_DB_POOL_MIN_SIZE))
+        self.db_pool_max_size: int = int(os.getenv('DB_POOL_MAX_SIZE', DEFAULT_DB_POOL_MAX_SIZE))
+        self.db_pool_max_queries: int = int(os.getenv('DB_POOL_MAX_QUERIES', DEFAULT_DB_POOL_MAX_QUERIES))
+        self.db_pool_max_inactive_lifetime: float = float(
+            os.getenv('DB_POOL_MAX_INACTIVE_LIFETIME', DEFAULT_DB_POOL_MAX_INACTIVE_LIFETIME),
+        )
+        self.db_statement_cache_size: int = int(os.getenv('DB_STATEMENT_CACHE_SIZE', DEFAULT_DB_STATEMENT_CACHE_SIZE))
+        self.generate_schemas: bool = get_bool_env('GENERATE_SCHEMAS', False)
+        self.metrics_enabled: bool = get_bool_env('METRICS_ENABLED', True)
+        self.slow_request_threshold: float = float(
+            os.getenv('SLOW_REQUEST_THRESHOLD', DEFAULT_SLOW_REQUEST_THRESHOLD),
+        )
+        self.admin_token: str = os.getenv('ADMIN_TOKEN')
+        self.profile_dir: str = os.getenv('PROFILE_DIR', DEFAULT_PROFILE_DIR)
+        self.web_host: str = os.getenv('WEB_HOST', DEFAULT_WEB_HOST)
+        self.web_port: int = int(os.getenv('WEB_PORT', DEFAULT_WEB_PORT))
+        self.web_backlog: int = int(os.getenv('WEB_BACKLOG', DEFAULT_WEB_BACKLOG))
+        self.web_keepalive: int = int(os.getenv('WEB_KEEPALIVE', DEFAULT_WEB_KEEPALIVE))
+        self.web_graceful_timeout: int = int(os.getenv('WEB_GRACEFUL_TIMEOUT', DEFAULT_WEB_GRACEFUL_TIMEOUT))
+        self.web_max_requests: int = int(os.getenv('WEB_MAX_REQUESTS', DEFAULT_WEB_MAX_REQUESTS))
+        self.admission_enabled: bool = get_bool_env('ADMISSION_ENABLED', True)
+        self.user_write_rate: float = float(os.getenv('USER_WRITE_RATE', DEFAULT_USER_WRITE_RATE))
+        self.user_write_burst: int = int(os.getenv('USER_WRITE_BURST', DEFAULT_USER_WRITE_BURST))
+        self.max_concurrent_writes: int = int(os.getenv('MAX_CONCURRENT_WRITES', DEFAULT_MAX_CONCURRENT_WRITES))
+        self.rate_limit_max_users: int = int(os.getenv('RATE_LIMIT_MAX_USERS', DEFAULT_RATE_LIMIT_MAX_USERS))
+        self.rate_limit_redis_url: str = os.getenv('RATE_LIMIT_REDIS_URL')
+        self.web_workers: int = int(os.getenv('WEB_WORKERS', 1 if self.process_local_state() else os.cpu_count() or 1))
+
+    def process_local_state(self) -> List[str]:
+        """Возвращает состояние, которое хранится в памяти каждого процесса и расходится между процессами.
+
+        Returns:
+            List[str]: Описания настроек, из-за которых бекенд нельзя запускать в нескольких процессах.
+        """
+        state = []
+        if self.cache_backend == CACHE_BACKEND_MEMORY and not self.cache_redis_url:
+            state.append('CACHE_BACKEND=memory without CACHE_REDIS_URL: invalidations do not reach other workers')
+        if self.admission_enabled and self.user_write_rate > 0 and not self.rate_limit_redis_url:
+            state.append('per-user write limits without RATE_LIMIT_REDIS_URL: each worker has its own buckets')
+        return state
 
 
 settings = Settings()
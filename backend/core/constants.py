@@ -1,7 +1,83 @@
 """Модуль с константами."""
+HTTP_NOT_MODIFIED = 304
+HTTP_BAD_REQUEST = 400
+HTTP_FORBIDDEN = 403
 HTTP_NOT_FOUND = 404
+HTTP_CONFLICT = 409
+HTTP_TOO_MANY_REQUESTS = 429
+HTTP_SERVICE_UNAVAILABLE = 503
 
 MAX_LENGTH_FIRST_NAME = 255
 MAX_LENGTH_LAST_NAME = 255
 MAX_LENGTH_USERNAME = 50
 MAX_LENGTH_PHOTO = 127
+
+DEFAULT_CACHE_MAX_SIZE = 10000
+DEFAULT_CACHE_TTL = 300
+CACHE_BACKEND_NONE = 'none'
+CACHE_BACKEND_MEMORY = 'memory'
+CACHE_BACKEND_REDIS = 'redis'
+# Версия в префиксе меняется вместе с составом закэшированной записи (USER_FIELDS в db/crud.py):
+# записи старого формата в Redis не читаются и истекают по TTL. v2 — добавлено поле version
+CACHE_KEY_PREFIX = 'users:v2:'
+CACHE_INVALIDATION_CHANNEL = 'users:invalidate'
+# Метка, запрещающая кэшировать пользователя в окне после записи
+CACHE_HOLD_KEY_PREFIX = CACHE_KEY_PREFIX + 'hold:'
+# Счётчик удалений записи пользователя для отбрасывания устаревших чтений
+CACHE_GENERATION_KEY_PREFIX = CACHE_KEY_PREFIX + 'gen:'
+CACHE_RECONNECT_MIN_DELAY = 0.5
+CACHE_RECONNECT_MAX_DELAY = 30
+
+HTTP_PAYLOAD_TOO_LARGE = 413
+
+BULK_UPSERT_CHUNK_SIZE = 1000
+EXPORT_FETCH_SIZE = 5000
+IMPORT_CHUNK_SIZE = 50000
+MAX_USER_BATCH_SIZE = 10000
+DEFAULT_USER_BATCH_WINDOW = 0.005
+DEFAULT_USER_BATCH_MAX_SIZE = 500
+
+DEFAULT_UPCOMING_WITHIN_DAYS = 7
+DEFAULT_UPCOMING_LIMIT = 100
+MAX_UPCOMING_LIMIT = 1000
+
+DEFAULT_USERNAME_SEARCH_LIMIT = 10
+MAX_USERNAME_SEARCH_LIMIT = 50
+
+# Клиенты могут хранить ответ, но обязаны перепроверять его по ETag
+CACHE_CONTROL_REVALIDATE = 'public, no-cache'
+# Cookie клиента, который только что изменил свои данные: nginx отдаёт ему
+# ответы мимо микрокэша, пока cookie не истечёт
+RECENT_WRITE_COOKIE = 'recent_write'
+
+DEFAULT_DB_POOL_MIN_SIZE = 1
+DEFAULT_DB_POOL_MAX_SIZE = 10
+DEFAULT_DB_POOL_MAX_QUERIES = 50000
+DEFAULT_DB_POOL_MAX_INACTIVE_LIFETIME = 300
+DEFAULT_DB_STATEMENT_CACHE_SIZE = 100
+
+DEFAULT_SLOW_REQUEST_THRESHOLD = 0.5
+
+DEFAULT_READ_YOUR_WRITES_WINDOW = 5
+DEFAULT_REPLICA_RETRY_INTERVAL = 5
+
+DEFAULT_PROFILE_SECONDS = 30
+# Ответ POST /admin/profile приходит после профилирования и должен успеть
+# до proxy_read_timeout nginx (60 секунд по умолчанию)
+MAX_PROFILE_SECONDS = 50
+DEFAULT_PROFILE_INTERVAL = 0.005
+DEFAULT_PROFILE_DIR = 'profiles'
+
+DEFAULT_WEB_HOST = '0.0.0.0'
+DEFAULT_WEB_PORT = 8000
+DEFAULT_WEB_BACKLOG = 2048
+DEFAULT_WEB_KEEPALIVE = 5
+DEFAULT_WEB_GRACEFUL_TIMEOUT = 30
+DEFAULT_WEB_MAX_REQUESTS = 0
+
+DEFAULT_USER_WRITE_RATE = 1.0
+DEFAULT_USER_WRITE_BURST = 10
+DEFAULT_MAX_CONCURRENT_WRITES = 32
+DEFAULT_RATE_LIMIT_MAX_USERS = 100000
+ADMISSION_RETRY_AFTER = 1
+RATE_LIMIT_KEY_PREFIX = 'ratelimit:'
@@ -1,12 +1,178 @@
 """Модуль с CRUD операциями."""
 from datetime import date
+from typing import Iterable, List, Optional, Tuple
 
-from core.config import logger
+from core.config import logger, settings
+from core.constants import BULK_UPSERT_CHUNK_SIZE
+from db.routing import read_router
 from models.user import User
+from tortoise import connections
+from tortoise.expressions import F, Q
+from tortoise.functions import Lower
+from tortoise.transactions import in_transaction
+from utils.batcher import MicroBatcher
+from utils.cache import user_cache
+from utils.calculate import birthday_day_of_year, day_of_year_window
+from utils.singleflight import SingleFlight
+
+# Поля, из которых состоит закэшированная запись пользователя
+USER_FIELDS = ('user_id', 'first_name', 'last_name', 'username', 'photo', 'birthdate', 'version')
+# Поля страницы ближайших дней рождения; birth_day_of_year нужен для курсора
+UPCOMING_FIELDS = ('user_id', 'first_name', 'last_name', 'username', 'photo', 'birthdate', 'birth_day_of_year')
+
+UPSERT_USER_SQL = (
+    'INSERT INTO users (user_id, first_name, last_name, username, photo, version) '
+    'VALUES ($1, $2, $3, $4, $5, 1) '
+    'ON CONFLICT (user_id) DO UPDATE SET '
+    'first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name, '
+    'username = EXCLUDED.username, photo = EXCLUDED.photo, version = users.version + 1 '
+    'WHERE (users.first_name, users.last_name, users.username, users.photo) '
+    'IS DISTINCT FROM (EXCLUDED.first_name, EXCLUDED.last_name, EXCLUDED.username, EXCLUDED.photo) '
+    'RETURNING (xmax = 0) AS created'
+)
+BULK_UPSERT_USERS_SQL = (
+    'INSERT INTO users (user_id, first_name, last_name, username, photo, version) '
+    'SELECT *, 1 FROM unnest($1::bigint[], $2::varchar[], $3::varchar[], $4::varchar[], $5::varchar[]) '
+    'ON CONFLICT (user_id) DO UPDATE SET '
+    'first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name, '
+    'username = EXCLUDED.username, photo = EXCLUDED.photo, version = users.version + 1 '
+    'WHERE (users.first_name, users.last_name, users.username, users.photo) '
+    'IS DISTINCT FROM (EXCLUDED.first_name, EXCLUDED.last_name, EXCLUDED.username, EXCLUDED.photo) '
+    'RETURNING user_id, (xmax = 0) AS created'
+)
+# Диапазон по индексу lower(username) text_pattern_ops вместо LIKE: условие
+# остаётся индексным и в общем плане подготовленного запроса, а ORDER BY USING ~<~
+# совпадает с порядком индекса, поэтому сортировка не нужна
+SEARCH_USERS_BY_USERNAME_SQL = (
+    'SELECT user_id, first_name, last_name, username, photo, birthdate, version FROM users '
+    'WHERE lower(username) ~>=~ $1 AND lower(username) ~<~ $2 '
+    'ORDER BY lower(username) USING ~<~ LIMIT $3'
+)
+
+
+def user_profile_query(user_id: int, client=None):
+    """Строит запрос профиля пользователя по идентификатору.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+        client (BaseDBAsyncClient, optional): Соединение, на котором выполняется запрос.
+
+    Returns:
+        ValuesQuery: Запрос, возвращающий словарь с полями USER_FIELDS или None.
+    """
+    return User.filter(user_id=user_id).using_db(client).first().values(*USER_FIELDS)
+
+
+def user_by_username_query(username_lower: str, client=None):
+    """Строит запрос пользователя по юзернейму в нижнем регистре.
+
+    Args:
+        username_lower (str): Юзернейм в нижнем регистре.
+        client (BaseDBAsyncClient, optional): Соединение, на котором выполняется запрос.
+
+    Returns:
+        ValuesQuery: Запрос, возвращающий словарь с полями USER_FIELDS или None.
+    """
+    return User.annotate(username_lower=Lower('username')).filter(
+        username_lower=username_lower,
+    ).using_db(client).first().values(*USER_FIELDS)
+
+
+def upcoming_birthdays_query(
+    start: int,
+    end: int,
+    limit: int,
+    cursor: Optional[Tuple[int, int]] = None,
+    client=None,
+):
+    """Строит запрос страницы пользователей с номером дня рождения в диапазоне.
+
+    Args:
+        start (int): Первый номер дня рождения диапазона.
+        end (int): Последний номер дня рождения диапазона.
+        limit (int): Максимальное количество пользователей.
+        cursor (Tuple[int, int], optional): Ключ (birth_day_of_year, user_id) последней записи предыдущей страницы.
+        client (BaseDBAsyncClient, optional): Соединение, на котором выполняется запрос.
+
+    Returns:
+        ValuesQuery: Запрос, возвращающий список словарей с полями UPCOMING_FIELDS.
+    """
+    queryset = User.filter(birth_day_of_year__gte=start, birth_day_of_year__lte=end)
+    if cursor is not None:
+        queryset = queryset.filter(
+            Q(birth_day_of_year__gt=cursor[0]) | Q(birth_day_of_year=cursor[0], user_id__gt=cursor[1]),
+        )
+    return queryset.order_by('birth_day_of_year', 'user_id').limit(limit).using_db(client).values(*UPCOMING_FIELDS)
+
+
+async def _invalidate_user(user_id: int) -> None:
+    """Сбрасывает закэшированные и читающиеся данные пользователя после записи.
+
+    Пользователь закрепляется за основной базой, запись кэша удаляется и при
+    чтении с реплик не кэшируется READ_YOUR_WRITES_WINDOW секунд, а уже
+    выполняющееся чтение его профиля больше не передаётся новым вызовам.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+    """
+    await _invalidate_users((user_id,))
+
+
+async def _invalidate_users(user_ids: Iterable[int]) -> None:
+    """Сбрасывает закэшированные и читающиеся данные пользователей после пакетной записи.
+
+    Записи кэша удаляются одним обращением к бэкенду кэша, а не по одной.
+
+    Args:
+        user_ids (Iterable[int]): Идентификаторы пользователей.
+    """
+    user_ids = list(user_ids)
+    for user_id in user_ids:
+        read_router.pin(user_id)
+        read_flights.forget(('id', user_id))
+    await user_cache.delete_many(user_ids)
+
+
+def _user_fields(user_data) -> dict:
+    """Возвращает изменяемые поля пользователя из входных данных.
+
+    Args:
+        user_data (UserData): Данные пользователя.
+
+    Returns:
+        dict: Имя, фамилия, юзернейм и фото пользователя.
+    """
+    return {
+        'first_name': user_data.first_name,
+        'last_name': user_data.last_name,
+        'username': user_data.username,
+        'photo': user_data.photo,
+    }
+
+
+async def _get_or_create_user(user_data) -> bool:
+    """Создаёт или обновляет пользователя без INSERT ... ON CONFLICT.
+
+    Используется на базах данных, отличных от PostgreSQL.
+
+    Args:
+        user_data (UserData): Данные пользователя.
+
+    Returns:
+        bool: True, если пользователь был создан.
+    """
+    fields = _user_fields(user_data)
+    user, created = await User.get_or_create(user_id=user_data.user_id, defaults=fields)
+    if not created and any(getattr(user, name) != value for name, value in fields.items()):
+        await User.filter(user_id=user_data.user_id).update(**fields, version=F('version') + 1)
+    return created
 
 
 async def create_or_update_user(user_data: dict) -> dict:
-    """Обрабатывает получение данных пользователя и создаёт пользователя, если он не существует.
+    """Создаёт пользователя или обновляет его имя, юзернейм и фото, если он уже существует.
+
+    На PostgreSQL выполняется одним запросом INSERT ... ON CONFLICT DO UPDATE,
+    на остальных базах данных используется get_or_create с последующим обновлением.
 
     Args:
         user_data (dict): Данные пользователя для создания или обновления:
@@ -19,21 +185,99 @@ async def create_or_update_user(user_data: dict) -> dict:
     Returns:
         dict: Сообщение о результате операции.
     """
-    user, created = await User.get_or_create(
-        user_id=user_data.user_id,
-        defaults={
-            'first_name': user_data.first_name,
-            'last_name': user_data.last_name,
-            'username': user_data.username,
-            'photo': user_data.photo,
-        },
-    )
+    connection = connections.get('default')
+    if connection.capabilities.dialect == 'postgres':
+        rows = await connection.execute_query_dict(
+            UPSERT_USER_SQL,
+            [user_data.user_id, *_user_fields(user_data).values()],
+        )
+        # Строка не возвращается, если данные существующего пользователя не изменились
+        created = bool(rows) and rows[0]['created']
+    else:
+        created = await _get_or_create_user(user_data)
+    await _invalidate_user(user_data.user_id)
     if created:
         logger.info('User {0} created'.format(user_data.user_id))
         return {'message': 'User created'}
     return {'message': 'User already created'}
 
 
+async def bulk_create_or_update_users(users: List) -> List[dict]:
+    """Создаёт или обновляет пользователей пакетами.
+
+    На PostgreSQL каждая порция из BULK_UPSERT_CHUNK_SIZE пользователей
+    записывается одним запросом INSERT ... SELECT FROM unnest ... ON CONFLICT.
+    Если пользователь встречается в пакете несколько раз, сохраняются последние данные.
+    Все порции записываются в одной транзакции, а кэш сбрасывается для всех
+    пользователей пакета одним обращением после её фиксации.
+
+    Args:
+        users (List[UserData]): Данные пользователей для создания или обновления.
+
+    Returns:
+        List[dict]: Результат для каждого пользователя в порядке входных данных.
+    """
+    created_ids = set()
+    # Пакет записывается одной транзакцией: после ошибки в нём не остаётся
+    # записанных строк, и fallback по одному пользователю возвращает верный статус
+    async with in_transaction('default') as connection:
+        for offset in range(0, len(users), BULK_UPSERT_CHUNK_SIZE):
+            chunk = {user.user_id: user for user in users[offset:offset + BULK_UPSERT_CHUNK_SIZE]}
+            if connection.capabilities.dialect == 'postgres':
+                columns = [list(chunk)] + [
+                    [_user_fields(user)[name] for user in chunk.values()]
+                    for name in ('first_name', 'last_name', 'username', 'photo')
+                ]
+                rows = await connection.execute_query_dict(BULK_UPSERT_USERS_SQL, columns)
+                created_ids.update(row['user_id'] for row in rows if row['created'])
+            else:
+                for user in chunk.values():
+                    if await _get_or_create_user(user):
+                        created_ids.add(user.user_id)
+    # Кэш сбрасывается после фиксации, иначе чтение между сбросом и фиксацией закэширует старые данные
+    await _invalidate_users({user.user_id for user in users})
+
+    results = []
+    for user in users:
+        if user.user_id in created_ids:
+            created_ids.discard(user.user_id)
+            logger.info('User {0} created'.format(user.user_id))
+            results.append({'user_id': user.user_id, 'message': 'User created'})
+        else:
+            results.append({'user_id': user.user_id, 'message': 'User already created'})
+    return results
+
+
+user_batcher = MicroBatcher(
+    handler=bulk_create_or_update_users,
+    max_size=settings.user_batch_max_size,
+    max_delay=settings.user_batch_window,
+    # Пакет записывается одним запросом, поэтому после его ошибки строки
+    # записываются по одной, и ошибку получает только запрос с неподходящей строкой
+    fallback=lambda user_data: create_or_update_user(user_data=user_data),
+)
+# Одновременные чтения одного пользователя по идентификатору или юзернейму выполняются одним запросом
+read_flights = SingleFlight()
+
+
+async def register_user(user_data) -> dict:
+    """Создаёт или обновляет пользователя, объединяя одиночные вызовы в пакеты, если это включено.
+
+    Если USER_BATCH_WINDOW > 0, вызов объединяется с другими регистрациями,
+    пришедшими в то же окно времени.
+
+    Args:
+        user_data (UserData): Данные пользователя для создания или обновления.
+
+    Returns:
+        dict: Сообщение о результате операции.
+    """
+    if settings.user_batch_window > 0:
+        result = await user_batcher.submit(user_data)
+        return {'message': result['message']}
+    return await create_or_update_user(user_data=user_data)
+
+
 async def get_user_by_id(user_id: int) -> dict:
     """Получает данные пользователя по его идентификатору.
 
@@ -43,19 +287,93 @@ async def get_user_by_id(user_id: int) -> dict:
     Returns:
         dict: Данные пользователя или сообщение об ошибке, если пользователь не найден.
     """
-    user = await User.get_or_none(user_id=user_id)
+    user = await get_user_profile(user_id)
     if user:
-        return {
-            'user_id': user.user_id,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'username': user.username,
-            'photo': user.photo,
-            'birthdate': user.birthdate,
-        }
+        return user
     return {'error': 'User not found'}
 
 
+async def get_user_profile(user_id: int) -> Optional[dict]:
+    """Получает данные профиля пользователя, используя кэш.
+
+    При промахе кэша профиль читается из базы данных сразу в словарь, без создания
+    объекта модели, и сохраняется в кэш. Одновременные промахи по одному
+    пользователю выполняются одним запросом. Чтение идёт с реплики, если пользователь
+    не изменял свои данные в последние READ_YOUR_WRITES_WINDOW секунд.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+
+    Returns:
+        Optional[dict]: Данные пользователя и версия строки или None, если пользователь не найден.
+    """
+    user = await user_cache.get(user_id)
+    if user is None:
+        user = await read_flights.do(('id', user_id), lambda: _load_user_profile(user_id))
+    return user
+
+
+async def _load_user_profile(user_id: int) -> Optional[dict]:
+    """Читает профиль пользователя из базы данных и сохраняет его в кэш.
+
+    Если во время чтения данные пользователя изменились и запись кэша была
+    удалена, прочитанный профиль может быть устаревшим и в кэш не сохраняется.
+
+    Args:
+        user_id (int): Идентификатор пользователя.
+
+    Returns:
+        Optional[dict]: Данные пользователя и версия строки или None, если пользователь не найден.
+    """
+    generation = await user_cache.generation(user_id)
+    user = await read_router.read(lambda client: user_profile_query(user_id, client), user_id)
+    if user is not None:
+        await user_cache.set(user_id, user, generation=generation)
+    return user
+
+
+async def get_user_by_username(username: str) -> Optional[dict]:
+    """Получает данные пользователя по юзернейму без учёта регистра.
+
+    Поиск идёт по функциональному индексу на lower(username). Одновременные поиски
+    одного юзернейма выполняются одним запросом.
+
+    Args:
+        username (str): Юзернейм пользователя в Telegram.
+
+    Returns:
+        Optional[dict]: Данные пользователя и версия строки или None, если пользователь не найден.
+    """
+    username_lower = username.lower()
+    return await read_flights.do(('username', username_lower), lambda: read_router.read(
+        lambda client: user_by_username_query(username_lower, client),
+    ))
+
+
+async def search_users_by_username(prefix: str, limit: int) -> List[dict]:
+    """Ищет пользователей, юзернейм которых начинается с префикса, без учёта регистра.
+
+    Args:
+        prefix (str): Начало юзернейма.
+        limit (int): Максимальное количество пользователей.
+
+    Returns:
+        List[dict]: Пользователи, упорядоченные по юзернейму.
+    """
+    prefix = prefix.lower()
+
+    async def search(client) -> List[dict]:
+        if client.capabilities.dialect == 'postgres':
+            # Верхняя граница — префикс с увеличенным последним символом
+            upper_bound = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+            return await client.execute_query_dict(SEARCH_USERS_BY_USERNAME_SQL, [prefix, upper_bound, limit])
+        return await User.annotate(username_lower=Lower('username')).filter(
+            username_lower__startswith=prefix,
+        ).order_by('username_lower').limit(limit).using_db(client).values(*USER_FIELDS)
+
+    return await read_router.read(search)
+
+
 async def update_user_birthdate(user_id: int, birthdate: date) -> dict:
     """Сохраняет дату рождения пользователя по его идентификатору.
 
@@ -66,10 +384,58 @@ async def update_user_birthdate(user_id: int, birthdate: date) -> dict:
     Returns:
         dict: Сообщение о результате операции.
     """
-    try:
-        user = await User.get(user_id=user_id)
-    except Exception as error:
+    updated = await User.filter(user_id=user_id).update(
+        birthdate=birthdate,
+        birth_day_of_year=birthday_day_of_year(birthdate),
+        version=F('version') + 1,
+    )
+    if not updated:
         return {'error': 'User not found'}
-    user.birthdate = birthdate
-    await user.save()
+    await _invalidate_user(user_id)
     return {'message': 'Birthdate updated successfully'}
+
+
+async def get_upcoming_birthdays(
+    today: date,
+    within_days: int,
+    limit: int,
+    cursor: Optional[Tuple[int, int]] = None,
+) -> Tuple[List[dict], Optional[Tuple[int, int]]]:
+    """Получает пользователей, чей день рождения наступает в ближайшие within_days дней.
+
+    Пользователи упорядочены по времени до дня рождения, а затем по идентификатору.
+    Поиск идёт по индексу (birth_day_of_year, user_id): если окно переходит
+    через конец года, выполняется сканирование двух диапазонов по очереди.
+    Постраничная навигация — по ключу (birth_day_of_year, user_id) последней записи.
+
+    Args:
+        today (date): Текущая дата.
+        within_days (int): Длина окна в днях.
+        limit (int): Максимальное количество пользователей на странице.
+        cursor (Tuple[int, int], optional): Ключ последней записи предыдущей страницы.
+
+    Returns:
+        Tuple[List[dict], Optional[Tuple[int, int]]]: Пользователи и ключ для следующей страницы,
+        если она может существовать.
+    """
+    ranges = day_of_year_window(today, within_days)
+    if cursor is not None:
+        # Пропускаем диапазоны, которые полностью пройдены на предыдущих страницах
+        while ranges and not ranges[0][0] <= cursor[0] <= ranges[0][1]:
+            ranges = ranges[1:]
+
+    users = []
+    for index, (start, end) in enumerate(ranges):
+        page_cursor = cursor if index == 0 else None
+        users += await read_router.read(lambda client: upcoming_birthdays_query(
+            start, end, limit - len(users), page_cursor, client,
+        ))
+        if len(users) >= limit:
+            break
+
+    next_cursor = None
+    if users and len(users) >= limit:
+        next_cursor = (users[-1]['birth_day_of_year'], users[-1]['user_id'])
+    for user in users:
+        user.pop('birth_day_of_year')
+    return users, next_cursor
@@ -1,9 +1,183 @@
 """Модуль для управления соединением с базой данных."""
+import os
+import time
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from core.config import settings
+from core.config import logger, settings
+from db.crud import user_batcher
+from db.migrate import get_pending_migrations
+from db.routing import PRIMARY_CONNECTION, REPLICA_ERRORS, read_router
 from fastapi import FastAPI
-from tortoise import Tortoise
+from tortoise import Tortoise, connections
+from tortoise.backends.base.config_generator import expand_db_url
+from utils.admission import admission_controller
+from utils.cache import user_cache
+from utils.metrics import instrument_client
+
+ASYNCPG_ENGINE = 'tortoise.backends.asyncpg'
+# Методы пула asyncpg, которые использует InstrumentedPool
+POOL_METHODS = ('acquire', 'release', 'get_size', 'get_idle_size', 'get_min_size', 'get_max_size')
+
+
+class InstrumentedPool:
+    """Обёртка пула соединений asyncpg, измеряющая время ожидания свободного соединения.
+
+    Все остальные атрибуты и методы передаются исходному пулу.
+
+    Атрибуты:
+        acquire_count (int): Количество выданных соединений.
+        waiting (int): Количество запросов, ожидающих соединение прямо сейчас.
+        total_wait (float): Суммарное время ожидания соединений в секундах.
+        max_wait (float): Максимальное время ожидания соединения в секундах.
+    """
+
+    def __init__(self, pool):
+        """Инициализирует обёртку.
+
+        Args:
+            pool (asyncpg.Pool): Пул соединений asyncpg.
+        """
+        self._pool = pool
+        self.acquire_count = 0
+        self.waiting = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def acquire(self, *args, **kwargs):
+        """Получает соединение из пула и учитывает время ожидания.
+
+        Returns:
+            asyncpg.Connection: Соединение из пула.
+        """
+        started_at = time.perf_counter()
+        self.waiting += 1
+        try:
+            connection = await self._pool.acquire(*args, **kwargs)
+        finally:
+            self.waiting -= 1
+        wait = time.perf_counter() - started_at
+        self.acquire_count += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+        return connection
+
+    def __getattr__(self, name):
+        """Передаёт обращение к атрибуту исходному пулу."""
+        return getattr(self._pool, name)
+
+    def stats(self) -> dict:
+        """Возвращает загрузку пула и статистику ожидания соединений.
+
+        Returns:
+            dict: Размер пула, количество занятых соединений и время ожидания.
+        """
+        size = self._pool.get_size()
+        in_use = size - self._pool.get_idle_size()
+        return {
+            'min_size': self._pool.get_min_size(),
+            'max_size': self._pool.get_max_size(),
+            'size': size,
+            'in_use': in_use,
+            'utilization': in_use / self._pool.get_max_size(),
+            'waiting': self.waiting,
+            'acquire_count': self.acquire_count,
+            'avg_wait_ms': self.total_wait / self.acquire_count * 1000 if self.acquire_count else 0.0,
+            'max_wait_ms': self.max_wait * 1000,
+        }
+
+
+def get_connection_config(db_url: str) -> dict:
+    """Формирует конфигурацию соединения с настройками пула для PostgreSQL.
+
+    Args:
+        db_url (str): URL базы данных.
+
+    Returns:
+        dict: Конфигурация соединения Tortoise ORM.
+    """
+    config = expand_db_url(db_url)
+    if config['engine'] == ASYNCPG_ENGINE:
+        config['credentials'].update({
+            'minsize': settings.db_pool_min_size,
+            'maxsize': settings.db_pool_max_size,
+            'max_queries': settings.db_pool_max_queries,
+            'max_inactive_connection_lifetime': settings.db_pool_max_inactive_lifetime,
+            'statement_cache_size': settings.db_statement_cache_size,
+        })
+    return config
+
+
+async def instrument_pool(connection_name: str) -> None:
+    """Создаёт пул соединений заранее и оборачивает его для сбора статистики.
+
+    Пул хранится в закрытом атрибуте _pool клиента asyncpg Tortoise ORM. Если в
+    установленной версии Tortoise ORM его нет или он не похож на пул asyncpg,
+    пул не оборачивается, а /health/db работает без статистики пула.
+
+    Args:
+        connection_name (str): Имя соединения Tortoise ORM.
+    """
+    client = connections.get(connection_name)
+    if client.capabilities.dialect != 'postgres':
+        return
+    if not hasattr(client, '_pool') or not hasattr(client, 'create_connection'):
+        logger.warning('Connection {0} has no asyncpg pool attribute, pool stats are disabled'.format(connection_name))
+        return
+    if client._pool is None:
+        await client.create_connection(with_db=True)
+    pool = client._pool
+    if isinstance(pool, InstrumentedPool):
+        return
+    if not all(hasattr(pool, name) for name in POOL_METHODS):
+        logger.warning('Connection {0} pool {1} is not an asyncpg pool, pool stats are disabled'.format(
+            connection_name, type(pool).__name__,
+        ))
+        return
+    client._pool = InstrumentedPool(pool)
+
+
+def get_pool_stats(connection_name: str) -> Optional[dict]:
+    """Возвращает статистику пула соединений.
+
+    Args:
+        connection_name (str): Имя соединения Tortoise ORM.
+
+    Returns:
+        Optional[dict]: Статистика пула или None, если соединение не использует пул.
+    """
+    pool = getattr(connections.get(connection_name), '_pool', None)
+    if isinstance(pool, InstrumentedPool):
+        return pool.stats()
+    return None
+
+
+async def check_migrations(connection_name: str) -> None:
+    """Проверяет, что все миграции из каталога migrations применены к базе данных.
+
+    Приложение, запущенное на базе без шага python -m db.migrate, не стартует,
+    а не падает с ошибкой 500 на первом запросе к новому столбцу.
+
+    Args:
+        connection_name (str): Имя соединения Tortoise ORM.
+
+    Raises:
+        RuntimeError: Если есть неприменённые миграции.
+    """
+    client = connections.get(connection_name)
+    if client.capabilities.dialect != 'postgres':
+        return
+    exists = await client.execute_query_dict("SELECT to_regclass('schema_migrations') IS NOT NULL AS exists")
+    applied = set()
+    if exists[0]['exists']:
+        applied = {row['version'] for row in await client.execute_query_dict('SELECT version FROM schema_migrations')}
+    pending = get_pending_migrations(applied)
+    if pending:
+        raise RuntimeError(
+            'Database schema is not up to date, pending migrations: {0}; run python -m db.migrate'.format(
+                ', '.join(pending),
+            ),
+        )
 
 
 @asynccontextmanager
@@ -16,15 +190,39 @@ async def lifespan(app: FastAPI):
     Yields:
         None: Управляет ресурсами для схем базы данных.
     """
+    started_at = time.perf_counter()
+    db_connections = {PRIMARY_CONNECTION: get_connection_config(settings.database_url)}
+    for name, url in zip(read_router.replicas, settings.database_replica_urls):
+        db_connections[name] = get_connection_config(url)
     config = {
-        'connections': {'default': settings.database_url},
+        'connections': db_connections,
         'apps': {'models': {'models': ['models.user'], 'default_connection': 'default'}},
         'use_tz': False,
         'timezone': 'UTC',
     }
     await Tortoise.init(config=config)
-    await Tortoise.generate_schemas()
+    if settings.generate_schemas:
+        await Tortoise.generate_schemas()
+    else:
+        await check_migrations(PRIMARY_CONNECTION)
+        logger.info('Schema generation skipped, schema is managed by db.migrate')
+    await instrument_pool(PRIMARY_CONNECTION)
+    for name in read_router.replicas:
+        try:
+            await instrument_pool(name)
+        except REPLICA_ERRORS as error:
+            # Недоступная при запуске реплика не мешает старту, пул будет создан при первом чтении
+            read_router.mark_unhealthy(name, error)
+    if settings.metrics_enabled:
+        for name in db_connections:
+            instrument_client(name)
+    await user_cache.start()
+    await admission_controller.start()
+    logger.info('Startup finished in {0:.0f} ms (pid {1})'.format((time.perf_counter() - started_at) * 1000, os.getpid()))
     try:
         yield
     finally:
+        await user_batcher.close()
+        await user_cache.close()
+        await admission_controller.close()
         await Tortoise.close_connections()
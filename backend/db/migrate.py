@@ -0,0 +1,235 @@
+"""Модуль версионных миграций схемы базы данных.
+
+Миграции — это SQL-файлы вида ``0001_name.sql`` в каталоге ``migrations``.
+Применённые версии хранятся в таблице ``schema_migrations``. Файл с
+пометкой ``-- migrate: no-transaction`` выполняется вне транзакции по одной
+команде: это нужно для ``CREATE INDEX CONCURRENTLY``.
+
+Горячие запросы для проверки планов строятся теми же функциями db/crud.py,
+которые их выполняют, поэтому проверяется именно тот SQL, который отправляет
+Tortoise ORM. Для этого проверка инициализирует Tortoise ORM.
+
+Запуск отдельным шагом перед стартом приложения::
+
+    python -m db.migrate
+    python -m db.migrate --check-plans
+"""
+import argparse
+import asyncio
+import json
+import re
+import sys
+from pathlib import Path
+from typing import List, Set, Tuple
+
+import asyncpg
+from core.config import logger, settings
+from db.crud import (
+    SEARCH_USERS_BY_USERNAME_SQL,
+    upcoming_birthdays_query,
+    user_by_username_query,
+    user_profile_query,
+)
+from tortoise import Tortoise
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent.parent / 'migrations'
+MIGRATION_FILE_PATTERN = re.compile(r'^(\d+)_(\w+)\.sql$')
+NO_TRANSACTION_MARKER = '-- migrate: no-transaction'
+MIGRATIONS_LOCK_ID = 7_301_015
+
+CREATE_MIGRATIONS_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP NOT NULL DEFAULT now()
+)
+"""
+
+# Невалидные индексы таблицы users, оставшиеся после прерванного CREATE INDEX CONCURRENTLY
+INVALID_INDEXES_SQL = """
+SELECT c.relname
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+WHERE NOT i.indisvalid AND i.indrelid = to_regclass('users')
+"""
+
+# Горячие запросы db/crud.py: имя и функция, возвращающая SQL и параметры.
+# Запросы Tortoise ORM строятся с подставленными значениями, поэтому параметров у них нет
+HOT_QUERIES = {
+    'get_user_profile': lambda: (user_profile_query(1).sql(), ()),
+    'get_upcoming_birthdays': lambda: (upcoming_birthdays_query(1, 7, 100).sql(), ()),
+    'get_upcoming_birthdays_cursor': lambda: (upcoming_birthdays_query(1, 7, 100, (3, 1)).sql(), ()),
+    'get_user_by_username': lambda: (user_by_username_query('username').sql(), ()),
+    'search_users_by_username': lambda: (SEARCH_USERS_BY_USERNAME_SQL, ('user', 'uses', 10)),
+}
+
+
+def load_migrations() -> List[Tuple[int, str, str]]:
+    """Читает файлы миграций из каталога migrations.
+
+    Returns:
+        List[Tuple[int, str, str]]: Версия, имя и SQL каждой миграции по возрастанию версии.
+    """
+    migrations = []
+    for path in MIGRATIONS_DIR.iterdir():
+        match = MIGRATION_FILE_PATTERN.match(path.name)
+        if match:
+            migrations.append((int(match.group(1)), match.group(2), path.read_text()))
+    return sorted(migrations)
+
+
+def get_pending_migrations(applied_versions: Set[int]) -> List[str]:
+    """Возвращает имена миграций, которые ещё не применены.
+
+    Args:
+        applied_versions (Set[int]): Версии из таблицы schema_migrations.
+
+    Returns:
+        List[str]: Имена неприменённых миграций по возрастанию версии.
+    """
+    return [
+        '{0:04d}_{1}'.format(version, name)
+        for version, name, _ in load_migrations() if version not in applied_versions
+    ]
+
+
+def split_statements(sql: str) -> List[str]:
+    """Разбивает SQL-скрипт на отдельные команды.
+
+    Args:
+        sql (str): SQL-скрипт без строковых литералов с точкой с запятой.
+
+    Returns:
+        List[str]: Непустые команды без комментариев.
+    """
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+
+async def apply_migrations(connection: asyncpg.Connection) -> List[str]:
+    """Применяет ещё не выполненные миграции.
+
+    Параллельные запуски сериализуются advisory-блокировкой, поэтому
+    миграции можно запускать из нескольких контейнеров одновременно.
+
+    Args:
+        connection (asyncpg.Connection): Соединение с базой данных.
+
+    Returns:
+        List[str]: Имена применённых миграций.
+    """
+    applied = []
+    await connection.execute('SELECT pg_advisory_lock($1)', MIGRATIONS_LOCK_ID)
+    try:
+        await connection.execute(CREATE_MIGRATIONS_TABLE_SQL)
+        done = {row['version'] for row in await connection.fetch('SELECT version FROM schema_migrations')}
+        for version, name, sql in load_migrations():
+            if version in done:
+                continue
+            logger.info('Applying migration {0:04d}_{1}'.format(version, name))
+            if NO_TRANSACTION_MARKER in sql:
+                for statement in split_statements(sql):
+                    await connection.execute(statement)
+                invalid = [row['relname'] for row in await connection.fetch(INVALID_INDEXES_SQL)]
+                if invalid:
+                    raise RuntimeError(
+                        'Migration {0:04d}_{1} left invalid indexes {2}; '
+                        'drop them with DROP INDEX CONCURRENTLY and run migrations again'.format(version, name, invalid),
+                    )
+                await connection.execute(
+                    'INSERT INTO schema_migrations (version, name) VALUES ($1, $2)', version, name,
+                )
+            else:
+                async with connection.transaction():
+                    await connection.execute(sql)
+                    await connection.execute(
+                        'INSERT INTO schema_migrations (version, name) VALUES ($1, $2)', version, name,
+                    )
+            applied.append('{0:04d}_{1}'.format(version, name))
+    finally:
+        await connection.execute('SELECT pg_advisory_unlock($1)', MIGRATIONS_LOCK_ID)
+    return applied
+
+
+def _plan_node_types(plan: dict) -> List[str]:
+    """Собирает типы всех узлов плана запроса."""
+    node_types = [plan['Node Type']]
+    for child in plan.get('Plans', []):
+        node_types.extend(_plan_node_types(child))
+    return node_types
+
+
+async def check_query_plans(connection: asyncpg.Connection) -> List[str]:
+    """Проверяет через EXPLAIN, что горячие запросы используют индекс.
+
+    Последовательное сканирование отключается на время проверки: на маленькой
+    таблице планировщик выбирает его даже при наличии индекса, а проверяется
+    именно возможность использовать индекс. Tortoise ORM должен быть
+    инициализирован: по нему строится SQL запросов.
+
+    Args:
+        connection (asyncpg.Connection): Соединение с базой данных.
+
+    Returns:
+        List[str]: Описания запросов, план которых не использует индекс.
+    """
+    failures = []
+    async with connection.transaction():
+        await connection.execute('SET LOCAL enable_seqscan = off')
+        for name, build_query in HOT_QUERIES.items():
+            query, params = build_query()
+            result = await connection.fetchval('EXPLAIN (FORMAT JSON) {0}'.format(query), *params)
+            node_types = _plan_node_types(json.loads(result)[0]['Plan'])
+            if not any('Index' in node_type for node_type in node_types):
+                failures.append('{0}: {1}'.format(name, ' -> '.join(node_types)))
+    return failures
+
+
+async def init_orm(db_url: str) -> None:
+    """Инициализирует Tortoise ORM для построения SQL горячих запросов.
+
+    Args:
+        db_url (str): URL базы данных.
+    """
+    from db.database import get_connection_config
+
+    await Tortoise.init(config={
+        'connections': {'default': get_connection_config(db_url)},
+        'apps': {'models': {'models': ['models.user'], 'default_connection': 'default'}},
+    })
+
+
+async def main(check_plans: bool) -> int:
+    """Применяет миграции и при необходимости проверяет планы запросов.
+
+    Args:
+        check_plans (bool): Проверить планы горячих запросов после миграций.
+
+    Returns:
+        int: Код завершения процесса.
+    """
+    connection = await asyncpg.connect(settings.database_url)
+    try:
+        applied = await apply_migrations(connection)
+        logger.info('Migrations applied: {0}'.format(len(applied)))
+        if check_plans:
+            await init_orm(settings.database_url)
+            try:
+                failures = await check_query_plans(connection)
+            finally:
+                await Tortoise.close_connections()
+            for failure in failures:
+                logger.error('Query does not use an index: {0}'.format(failure))
+            if failures:
+                return 1
+            logger.info('All hot queries use an index')
+    finally:
+        await connection.close()
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Миграции схемы базы данных')
+    parser.add_argument('--check-plans', action='store_true', help='проверить, что горячие запросы используют индекс')
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.check_plans)))
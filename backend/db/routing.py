@@ -0,0 +1,170 @@
+"""Модуль маршрутизации чтений между основной базой данных и репликами.
+
+Реплики задаются в DATABASE_REPLICA_URLS и подключаются в lifespan как
+соединения Tortoise ORM replica_0, replica_1 и т.д. Чтения распределяются по
+репликам по кругу. После записи пользователь на READ_YOUR_WRITES_WINDOW секунд
+закрепляется за основной базой, чтобы сразу видеть свои изменения несмотря
+на отставание реплик. Закрепление действует в пределах одного процесса,
+поэтому в том же окне кэш не принимает данные пользователя (см. utils/cache.py):
+иначе другой процесс мог бы положить в общий кэш старые данные с реплики.
+
+Если запрос к реплике завершился ошибкой соединения, реплика исключается из
+чтения на REPLICA_RETRY_INTERVAL секунд, а запрос повторяется на основной базе.
+"""
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, TypeVar
+
+import asyncpg
+from core.config import logger, settings
+from tortoise import connections
+from tortoise.backends.base.client import BaseDBAsyncClient
+from tortoise.exceptions import DBConnectionError
+
+PRIMARY_CONNECTION = 'default'
+REPLICA_CONNECTION_PREFIX = 'replica_'
+# Ошибки, после которых реплика считается недоступной, а запрос повторяется на основной базе.
+# Ошибки самого запроса Tortoise ORM преобразует в OperationalError, поэтому ошибки
+# сервера asyncpg здесь — это отказ соединения, база в восстановлении или конфликт с репликацией
+REPLICA_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.PostgresError,
+    asyncpg.InterfaceError,
+    DBConnectionError,
+)
+
+T = TypeVar('T')
+
+
+class ReadRouter:
+    """Выбор соединения для чтения с закреплением после записи и переключением на основную базу.
+
+    Атрибуты:
+        replicas (List[str]): Имена соединений реплик.
+        pin_window (float): Время закрепления пользователя за основной базой после записи в секундах.
+        retry_interval (float): Время исключения недоступной реплики из чтения в секундах.
+        replica_reads (int): Количество чтений, выполненных на репликах.
+        primary_reads (int): Количество чтений, выполненных на основной базе.
+        failovers (int): Количество чтений, повторённых на основной базе после ошибки реплики.
+    """
+
+    def __init__(self, replicas: List[str], pin_window: float, retry_interval: float):
+        """Инициализирует маршрутизатор.
+
+        Args:
+            replicas (List[str]): Имена соединений реплик.
+            pin_window (float): Время закрепления пользователя за основной базой после записи в секундах.
+            retry_interval (float): Время исключения недоступной реплики из чтения в секундах.
+        """
+        self.replicas = replicas
+        self.pin_window = pin_window
+        self.retry_interval = retry_interval
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.failovers = 0
+        self._next_replica = itertools.cycle(replicas)
+        self._unhealthy_until: Dict[str, float] = {}
+        # Окно закрепления одинаково для всех, поэтому порядок вставки совпадает с порядком истечения
+        self._pinned: OrderedDict = OrderedDict()
+
+    def pin(self, user_id: int) -> None:
+        """Закрепляет пользователя за основной базой после записи.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+        """
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        self._pinned[user_id] = now + self.pin_window
+        self._pinned.move_to_end(user_id)
+        while self._pinned:
+            oldest_user_id, expires_at = next(iter(self._pinned.items()))
+            if expires_at > now:
+                break
+            del self._pinned[oldest_user_id]
+
+    def is_pinned(self, user_id: int) -> bool:
+        """Проверяет, закреплён ли пользователь за основной базой.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+
+        Returns:
+            bool: True, если пользователь недавно изменял свои данные.
+        """
+        expires_at = self._pinned.get(user_id)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def choose_replica(self) -> Optional[str]:
+        """Выбирает следующую доступную реплику по кругу.
+
+        Returns:
+            Optional[str]: Имя соединения реплики или None, если доступных реплик нет.
+        """
+        now = time.monotonic()
+        for _ in range(len(self.replicas)):
+            name = next(self._next_replica)
+            if self._unhealthy_until.get(name, 0) <= now:
+                return name
+        return None
+
+    def mark_unhealthy(self, name: str, error: Exception) -> None:
+        """Исключает реплику из чтения на retry_interval секунд.
+
+        Args:
+            name (str): Имя соединения реплики.
+            error (Exception): Ошибка, из-за которой реплика исключается.
+        """
+        self._unhealthy_until[name] = time.monotonic() + self.retry_interval
+        logger.warning('Replica {0} is unavailable, reading from primary: {1!r}'.format(name, error))
+
+    async def read(self, query: Callable[[BaseDBAsyncClient], Awaitable[T]], user_id: Optional[int] = None) -> T:
+        """Выполняет чтение на реплике или на основной базе.
+
+        Args:
+            query (Callable[[BaseDBAsyncClient], Awaitable[T]]): Функция, выполняющая запрос на переданном клиенте.
+            user_id (int, optional): Пользователь, данные которого читаются, для проверки закрепления.
+
+        Returns:
+            T: Результат запроса.
+        """
+        name = None
+        if self.replicas and (user_id is None or not self.is_pinned(user_id)):
+            name = self.choose_replica()
+        if name is not None:
+            try:
+                result = await query(connections.get(name))
+            except REPLICA_ERRORS as error:
+                self.mark_unhealthy(name, error)
+                self.failovers += 1
+            else:
+                self.replica_reads += 1
+                return result
+        self.primary_reads += 1
+        return await query(connections.get(PRIMARY_CONNECTION))
+
+    def stats(self) -> dict:
+        """Возвращает состояние реплик и распределение чтений.
+
+        Returns:
+            dict: Доступность реплик, количество чтений и переключений, число закреплённых пользователей.
+        """
+        now = time.monotonic()
+        return {
+            'replicas': {name: self._unhealthy_until.get(name, 0) <= now for name in self.replicas},
+            'replica_reads': self.replica_reads,
+            'primary_reads': self.primary_reads,
+            'failovers': self.failovers,
+            'pinned_users': len(self._pinned),
+        }
+
+
+read_router = ReadRouter(
+    ['{0}{1}'.format(REPLICA_CONNECTION_PREFIX, index) for index in range(len(settings.database_replica_urls))],
+    pin_window=settings.read_your_writes_window,
+    retry_interval=settings.replica_retry_interval,
+)
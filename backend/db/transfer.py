@@ -0,0 +1,337 @@
+"""Модуль потоковой выгрузки и массовой загрузки таблицы users.
+
+Выгрузка читает таблицу серверным курсором в порядке user_id порциями по
+EXPORT_FETCH_SIZE строк и отдаёт каждую порцию уже закодированной в NDJSON
+или CSV, поэтому память не зависит от размера таблицы. NDJSON сохраняет
+различие между NULL и пустой строкой, в CSV пустое поле читается как NULL.
+
+Загрузка читает файл построчно и записывает порции по IMPORT_CHUNK_SIZE строк
+через COPY во временную таблицу, откуда они переносятся в users через
+INSERT ... ON CONFLICT DO UPDATE. Каждая порция фиксируется отдельной
+транзакцией, а после неё в лог пишется смещение: при сбое загрузку можно
+продолжить с параметром --offset. Повторная загрузка порции безопасна.
+birth_day_of_year всегда пересчитывается из birthdate. Без соединения asyncpg
+(на базах данных, отличных от PostgreSQL) порции записываются через ORM с теми же
+правилами слияния. Кэш пользователей
+в работающих процессах бекенда не сбрасывается: записи обновятся через CACHE_TTL.
+
+Запуск из каталога backend::
+
+    python -m db.transfer export users.ndjson
+    python -m db.transfer export users.csv --format csv
+    python -m db.transfer import users.ndjson --offset 3000000
+"""
+import argparse
+import asyncio
+import csv
+import io
+import sys
+from datetime import date
+from functools import partial
+from typing import AsyncIterator, Iterator, List, Optional, Sequence, TextIO
+
+import asyncpg
+import orjson
+from core.config import logger, settings
+from core.constants import EXPORT_FETCH_SIZE, IMPORT_CHUNK_SIZE
+from models.user import User
+from tortoise import connections
+from tortoise.transactions import in_transaction
+from utils.calculate import birthday_day_of_year
+
+FORMAT_NDJSON = 'ndjson'
+FORMAT_CSV = 'csv'
+EXPORT_FORMATS = (FORMAT_NDJSON, FORMAT_CSV)
+MEDIA_TYPES = {FORMAT_NDJSON: 'application/x-ndjson', FORMAT_CSV: 'text/csv'}
+
+EXPORT_COLUMNS = ('user_id', 'first_name', 'last_name', 'username', 'photo', 'birthdate', 'version')
+IMPORT_COLUMNS = EXPORT_COLUMNS + ('birth_day_of_year',)
+# Поля, изменение которых обновляет существующего пользователя при загрузке
+MERGE_COLUMNS = ('first_name', 'last_name', 'username', 'photo', 'birthdate')
+
+EXPORT_USERS_SQL = 'SELECT {0} FROM users ORDER BY user_id'.format(', '.join(EXPORT_COLUMNS))
+CREATE_IMPORT_TABLE_SQL = (
+    'CREATE TEMP TABLE IF NOT EXISTS users_import (LIKE users INCLUDING DEFAULTS) ON COMMIT DELETE ROWS'
+)
+# Версия существующего пользователя растёт, чтобы сменился ETag его профиля
+MERGE_IMPORT_SQL = (
+    'INSERT INTO users ({0}) SELECT {0} FROM users_import '
+    'ON CONFLICT (user_id) DO UPDATE SET '
+    'first_name = EXCLUDED.first_name, last_name = EXCLUDED.last_name, '
+    'username = EXCLUDED.username, photo = EXCLUDED.photo, birthdate = EXCLUDED.birthdate, '
+    'birth_day_of_year = EXCLUDED.birth_day_of_year, '
+    'version = GREATEST(users.version + 1, EXCLUDED.version) '
+    'WHERE (users.first_name, users.last_name, users.username, users.photo, users.birthdate) '
+    'IS DISTINCT FROM (EXCLUDED.first_name, EXCLUDED.last_name, EXCLUDED.username, EXCLUDED.photo, EXCLUDED.birthdate)'
+).format(', '.join(IMPORT_COLUMNS))
+
+
+def encode_rows(rows: Sequence[Sequence], export_format: str) -> bytes:
+    """Кодирует порцию строк таблицы users.
+
+    Args:
+        rows (Sequence[Sequence]): Строки со значениями в порядке EXPORT_COLUMNS.
+        export_format (str): Формат выгрузки: ndjson или csv.
+
+    Returns:
+        bytes: Закодированные строки.
+    """
+    if export_format == FORMAT_NDJSON:
+        return b''.join(orjson.dumps(dict(zip(EXPORT_COLUMNS, row))) + b'\n' for row in rows)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode()
+
+
+def csv_header() -> bytes:
+    """Возвращает строку заголовка CSV."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(EXPORT_COLUMNS)
+    return buffer.getvalue().encode()
+
+
+async def iter_export_chunks(connection: asyncpg.Connection, export_format: str) -> AsyncIterator[bytes]:
+    """Читает таблицу users серверным курсором и отдаёт закодированные порции.
+
+    Курсор живёт внутри транзакции, поэтому выгрузка видит один снимок таблицы.
+
+    Args:
+        connection (asyncpg.Connection): Соединение с базой данных.
+        export_format (str): Формат выгрузки: ndjson или csv.
+
+    Yields:
+        bytes: Закодированная порция из EXPORT_FETCH_SIZE строк.
+    """
+    if export_format == FORMAT_CSV:
+        yield csv_header()
+    async with connection.transaction(isolation='repeatable_read', readonly=True):
+        cursor = await connection.cursor(EXPORT_USERS_SQL)
+        while True:
+            rows = await cursor.fetch(EXPORT_FETCH_SIZE)
+            if not rows:
+                break
+            yield encode_rows(rows, export_format)
+
+
+async def export_users(export_format: str) -> AsyncIterator[bytes]:
+    """Выгружает таблицу users через соединение приложения.
+
+    На PostgreSQL используется серверный курсор на соединении из пула, которое
+    занято до конца выгрузки. На остальных базах данных таблица читается
+    страницами по ключу user_id.
+
+    Args:
+        export_format (str): Формат выгрузки: ndjson или csv.
+
+    Yields:
+        bytes: Закодированная порция строк.
+    """
+    client = connections.get('default')
+    if client.capabilities.dialect == 'postgres':
+        async with client.acquire_connection() as connection:
+            async for chunk in iter_export_chunks(connection, export_format):
+                yield chunk
+        return
+
+    if export_format == FORMAT_CSV:
+        yield csv_header()
+    last_user_id = None
+    while True:
+        queryset = User.all()
+        if last_user_id is not None:
+            queryset = queryset.filter(user_id__gt=last_user_id)
+        rows = await queryset.order_by('user_id').limit(EXPORT_FETCH_SIZE).values_list(*EXPORT_COLUMNS)
+        if not rows:
+            break
+        yield encode_rows(rows, export_format)
+        last_user_id = rows[-1][0]
+
+
+def _optional(value: Optional[str]) -> Optional[str]:
+    """Возвращает None вместо пустой строки."""
+    return value or None
+
+
+def _import_row(user_id, first_name, last_name, username, photo, birthdate, version) -> tuple:
+    """Приводит значения загружаемого пользователя к типам столбцов таблицы users.
+
+    Returns:
+        tuple: Значения в порядке IMPORT_COLUMNS.
+    """
+    birthdate = date.fromisoformat(birthdate) if birthdate else None
+    return (
+        int(user_id),
+        first_name,
+        last_name,
+        username,
+        photo,
+        birthdate,
+        int(version) if version else 1,
+        birthday_day_of_year(birthdate) if birthdate else None,
+    )
+
+
+def read_rows(source: TextIO, import_format: str) -> Iterator[tuple]:
+    """Читает пользователей из файла выгрузки по одному.
+
+    Args:
+        source (TextIO): Файл выгрузки.
+        import_format (str): Формат файла: ndjson или csv.
+
+    Yields:
+        tuple: Значения пользователя в порядке IMPORT_COLUMNS.
+    """
+    if import_format == FORMAT_NDJSON:
+        for line in source:
+            if line.strip():
+                user = orjson.loads(line)
+                yield _import_row(*(user.get(column) for column in EXPORT_COLUMNS))
+        return
+    for user in csv.DictReader(source):
+        yield _import_row(
+            user['user_id'],
+            user['first_name'],
+            *(_optional(user.get(column)) for column in ('last_name', 'username', 'photo', 'birthdate', 'version')),
+        )
+
+
+async def import_chunk(connection: asyncpg.Connection, rows: List[tuple]) -> None:
+    """Записывает порцию пользователей в users одной транзакцией.
+
+    Args:
+        connection (asyncpg.Connection): Соединение с базой данных.
+        rows (List[tuple]): Значения пользователей в порядке IMPORT_COLUMNS.
+    """
+    async with connection.transaction():
+        await connection.copy_records_to_table('users_import', records=rows, columns=IMPORT_COLUMNS)
+        await connection.execute(MERGE_IMPORT_SQL)
+
+
+async def import_chunk_orm(rows: List[tuple]) -> None:
+    """Записывает порцию пользователей в users одной транзакцией через ORM.
+
+    Повторяет MERGE_IMPORT_SQL: новые пользователи добавляются, существующие
+    обновляются, только если изменились их данные.
+
+    Args:
+        rows (List[tuple]): Значения пользователей в порядке IMPORT_COLUMNS.
+    """
+    users = [dict(zip(IMPORT_COLUMNS, row)) for row in rows]
+    async with in_transaction('default') as connection:
+        existing = {
+            user['user_id']: user
+            for user in await User.filter(user_id__in=[user['user_id'] for user in users]).using_db(connection).values(
+                'user_id', 'version', *MERGE_COLUMNS,
+            )
+        }
+        new_users = []
+        for user in users:
+            current = existing.get(user['user_id'])
+            if current is None:
+                new_users.append(User(**user))
+            elif any(current[name] != user[name] for name in MERGE_COLUMNS):
+                await User.filter(user_id=user['user_id']).using_db(connection).update(
+                    **{name: user[name] for name in MERGE_COLUMNS},
+                    birth_day_of_year=user['birth_day_of_year'],
+                    version=max(current['version'] + 1, user['version']),
+                )
+        if new_users:
+            await User.bulk_create(new_users, using_db=connection)
+
+
+async def import_users(
+    connection: Optional[asyncpg.Connection],
+    source: TextIO,
+    import_format: str,
+    offset: int = 0,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+) -> int:
+    """Загружает пользователей из файла выгрузки порциями.
+
+    Args:
+        connection (asyncpg.Connection, optional): Соединение с PostgreSQL; None — запись
+            через соединение приложения ORM.
+        source (TextIO): Файл выгрузки.
+        import_format (str): Формат файла: ndjson или csv.
+        offset (int): Количество пользователей в начале файла, загруженных ранее.
+        chunk_size (int): Количество пользователей в одной транзакции.
+
+    Returns:
+        int: Смещение после последней зафиксированной порции.
+    """
+    if connection is None:
+        write_chunk = import_chunk_orm
+    else:
+        await connection.execute(CREATE_IMPORT_TABLE_SQL)
+        write_chunk = partial(import_chunk, connection)
+    rows = read_rows(source, import_format)
+    for _ in range(offset):
+        if next(rows, None) is None:
+            return offset
+    chunk = []
+    try:
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                await write_chunk(chunk)
+                offset += len(chunk)
+                chunk = []
+                logger.info('Imported users: {0}'.format(offset))
+        if chunk:
+            await write_chunk(chunk)
+            offset += len(chunk)
+    except Exception:
+        logger.error('Import failed after {0} users, resume with --offset {0}'.format(offset))
+        raise
+    return offset
+
+
+def detect_format(path: str, export_format: Optional[str]) -> str:
+    """Определяет формат по параметру или расширению файла.
+
+    Args:
+        path (str): Путь к файлу.
+        export_format (str, optional): Явно заданный формат.
+
+    Returns:
+        str: ndjson или csv.
+    """
+    if export_format:
+        return export_format
+    return FORMAT_CSV if path.endswith('.csv') else FORMAT_NDJSON
+
+
+async def main(args: argparse.Namespace) -> int:
+    """Выполняет выгрузку или загрузку таблицы users.
+
+    Args:
+        args (argparse.Namespace): Параметры запуска.
+
+    Returns:
+        int: Код завершения процесса.
+    """
+    file_format = detect_format(args.path, args.format)
+    connection = await asyncpg.connect(settings.database_url)
+    try:
+        if args.command == 'export':
+            with open(args.path, 'wb') as target:
+                async for chunk in iter_export_chunks(connection, file_format):
+                    target.write(chunk)
+            logger.info('Export finished: {0}'.format(args.path))
+            return 0
+        with open(args.path, newline='', encoding='utf-8') as source:
+            imported = await import_users(connection, source, file_format, args.offset, args.chunk_size)
+        logger.info('Import finished: {0} users'.format(imported))
+    finally:
+        await connection.close()
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Выгрузка и загрузка таблицы users')
+    parser.add_argument('command', choices=('export', 'import'), help='выгрузить или загрузить')
+    parser.add_argument('path', help='файл выгрузки')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, help='формат файла, по умолчанию по расширению')
+    parser.add_argument('--offset', type=int, default=0, help='пропустить столько пользователей в начале файла')
+    parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE, help='пользователей в одной транзакции')
+    sys.exit(asyncio.run(main(parser.parse_args())))
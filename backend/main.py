@@ -1,11 +1,18 @@
 """Основной файл приложения FastAPI (бэкенд) для работы Telegram Mini App."""
+from core.config import settings
 from db.database import lifespan
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from routes import profile, user
+from fastapi.responses import ORJSONResponse
+from routes import admin, health, metrics, profile, user
+from utils.admission import AdmissionMiddleware
+from utils.metrics import MetricsMiddleware
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
+# Добавляется до CORSMiddleware, чтобы отказы 429 и 503 тоже получали заголовки CORS
+if settings.admission_enabled:
+    app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=['*'],
@@ -13,6 +20,11 @@ app.add_middleware(
     allow_methods=['*'],
     allow_headers=['*'],
 )
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
 
 app.include_router(user.router, prefix='/user')
 app.include_router(profile.router, prefix='/profile')
+app.include_router(health.router, prefix='/health')
+app.include_router(metrics.router)
+app.include_router(admin.router, prefix='/admin')
@@ -0,0 +1,9 @@
+-- Таблица пользователей в том виде, в котором её создавал generate_schemas
+CREATE TABLE IF NOT EXISTS users (
+    user_id BIGINT NOT NULL PRIMARY KEY,
+    first_name VARCHAR(255) NOT NULL,
+    last_name VARCHAR(255),
+    username VARCHAR(50),
+    photo VARCHAR(127),
+    birthdate DATE
+);
@@ -0,0 +1,6 @@
+-- Номер дня рождения в году по календарю високосного года (29 февраля — 60-й день)
+ALTER TABLE users ADD COLUMN IF NOT EXISTS birth_day_of_year SMALLINT;
+
+UPDATE users
+SET birth_day_of_year = EXTRACT(DOY FROM make_date(2000, EXTRACT(MONTH FROM birthdate)::int, EXTRACT(DAY FROM birthdate)::int))
+WHERE birthdate IS NOT NULL AND birth_day_of_year IS NULL;
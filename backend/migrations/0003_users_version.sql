@@ -0,0 +1,2 @@
+-- Версия строки для ETag; значение по умолчанию не требует перезаписи таблицы
+ALTER TABLE users ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
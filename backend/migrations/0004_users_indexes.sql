@@ -0,0 +1,4 @@
+-- migrate: no-transaction
+-- Индексы создаются без блокировки записи в таблицу
+CREATE INDEX CONCURRENTLY IF NOT EXISTS users_birth_day_of_year_user_id_idx ON users (birth_day_of_year, user_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS users_username_idx ON users (username);
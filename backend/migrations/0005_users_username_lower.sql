@@ -0,0 +1,4 @@
+-- migrate: no-transaction
+-- Поиск по юзернейму без учёта регистра: точное совпадение и поиск по префиксу
+CREATE INDEX CONCURRENTLY IF NOT EXISTS users_username_lower_idx ON users (lower(username) text_pattern_ops);
+DROP INDEX CONCURRENTLY IF EXISTS users_username_idx;
@@ -19,6 +19,8 @@ class User(models.Model):
         username (str, optional): Имя пользователя в Telegram.
         photo (str, optional): URL фотографии профиля.
         birthdate (date, optional): Дата рождения пользователя.
+        birth_day_of_year (int, optional): Номер дня рождения в году по календарю високосного года.
+        version (int): Версия строки, увеличивается при каждом изменении данных пользователя.
     """
 
     user_id = fields.BigIntField(pk=True, unique=True)
@@ -27,11 +29,14 @@ class User(models.Model):
     username = fields.CharField(max_length=MAX_LENGTH_USERNAME, null=True)
     photo = fields.CharField(max_length=MAX_LENGTH_PHOTO, null=True)
     birthdate = fields.DateField(null=True)
+    birth_day_of_year = fields.SmallIntField(null=True)
+    version = fields.IntField(default=1)
 
     class Meta:
         """Meta информация для модели User."""
 
         table = 'users'
+        indexes = (('birth_day_of_year', 'user_id'),)
 
 
 User_Pydantic = pydantic_model_creator(User, name='User')
@@ -0,0 +1,64 @@
+"""Служебные маршруты для диагностики работающего сервиса.
+
+Маршруты доступны только при заданном ADMIN_TOKEN и требуют его в заголовке X-Admin-Token.
+"""
+import hmac
+from typing import Optional
+
+from core.config import settings
+from core.constants import (
+    DEFAULT_PROFILE_INTERVAL,
+    DEFAULT_PROFILE_SECONDS,
+    HTTP_CONFLICT,
+    HTTP_FORBIDDEN,
+    HTTP_NOT_FOUND,
+    MAX_PROFILE_SECONDS,
+)
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from utils.profiler import profile
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Проверяет токен администратора.
+
+    Args:
+        x_admin_token (str, optional): Значение заголовка X-Admin-Token.
+
+    Raises:
+        HTTPException: 404, если ADMIN_TOKEN не задан, и 403, если токен неверный.
+    """
+    if not settings.admin_token:
+        raise HTTPException(status_code=HTTP_NOT_FOUND, detail='Not Found')
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, settings.admin_token):
+        raise HTTPException(status_code=HTTP_FORBIDDEN, detail='Forbidden')
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+@router.post('/profile')
+async def run_profile(
+    seconds: float = Query(DEFAULT_PROFILE_SECONDS, gt=0, le=MAX_PROFILE_SECONDS),
+    interval: float = Query(DEFAULT_PROFILE_INTERVAL, ge=0.001, le=1),
+) -> PlainTextResponse:
+    """Профилирует процесс заданное время и возвращает стеки для flame graph.
+
+    Запросы продолжают обслуживаться во время профилирования, ответ приходит по его окончании.
+
+    Args:
+        seconds (float): Длительность профилирования в секундах.
+        interval (float): Интервал между снимками стека в секундах.
+
+    Returns:
+        PlainTextResponse: Стеки в формате collapsed stacks, путь к сохранённому
+        файлу передаётся в заголовке X-Profile-File.
+
+    Raises:
+        HTTPException: Если профилирование уже выполняется.
+    """
+    try:
+        path, collapsed = await profile(seconds, interval, settings.profile_dir, 'backend')
+    except RuntimeError as error:
+        raise HTTPException(status_code=HTTP_CONFLICT, detail=str(error))
+    return PlainTextResponse(collapsed, headers={'X-Profile-File': path})
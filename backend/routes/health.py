@@ -0,0 +1,42 @@
+"""Маршруты для проверки состояния сервиса."""
+import time
+
+from core.config import logger
+from core.constants import HTTP_SERVICE_UNAVAILABLE
+from db.database import get_pool_stats
+from db.routing import read_router
+from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+from tortoise import connections
+from utils.admission import admission_controller
+
+router = APIRouter()
+
+
+@router.get('/db')
+async def get_db_health() -> ORJSONResponse:
+    """Проверяет доступность базы данных и возвращает загрузку пула соединений.
+
+    Returns:
+        ORJSONResponse: Статус базы данных, время выполнения проверочного запроса,
+        статистика пула соединений (None, если база данных работает без пула)
+        распределение чтений между основной базой и репликами и состояние
+        ограничения запросов записи.
+        При недоступности базы данных возвращается код 503.
+    """
+    started_at = time.perf_counter()
+    try:
+        await connections.get('default').execute_query('SELECT 1')
+    except Exception as error:
+        logger.error('Database health check failed: {0}'.format(error))
+        return ORJSONResponse(
+            {'status': 'error', 'detail': str(error), 'pool': get_pool_stats('default')},
+            status_code=HTTP_SERVICE_UNAVAILABLE,
+        )
+    return ORJSONResponse({
+        'status': 'ok',
+        'latency_ms': (time.perf_counter() - started_at) * 1000,
+        'pool': get_pool_stats('default'),
+        'replication': read_router.stats(),
+        'admission': admission_controller.stats(),
+    })
@@ -0,0 +1,21 @@
+"""Маршрут метрик в формате Prometheus."""
+from fastapi import APIRouter, Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest, multiprocess
+from utils.metrics import MULTIPROCESS_MODE
+
+router = APIRouter()
+
+
+@router.get('/metrics')
+async def get_metrics() -> Response:
+    """Возвращает метрики бекенда в текстовом формате Prometheus.
+
+    Returns:
+        Response: Метрики запросов, запросов к базе данных и процесса. При работе
+        в нескольких процессах метрики суммируются по всем процессам.
+    """
+    if MULTIPROCESS_MODE:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
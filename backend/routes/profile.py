@@ -1,46 +1,117 @@
 """Маршруты для работы с профилем."""
 from datetime import datetime
+from typing import Optional
 
-from core.constants import HTTP_NOT_FOUND
-from fastapi import APIRouter, HTTPException
-from models.user import User, User_Pydantic
-from tortoise.exceptions import DoesNotExist
-from utils.calculate import calculate_time_until_next_birthday
+from core.constants import (
+    DEFAULT_UPCOMING_LIMIT,
+    DEFAULT_UPCOMING_WITHIN_DAYS,
+    HTTP_BAD_REQUEST,
+    HTTP_NOT_FOUND,
+    MAX_UPCOMING_LIMIT,
+)
+from db.crud import get_upcoming_birthdays, get_user_profile
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse
+from routes.admin import require_admin
+from utils.cache import user_cache
+from utils.calculate import (
+    calculate_days_until_next_birthdays,
+    calculate_time_until_next_birthday,
+)
+from utils.http_cache import conditional_response, make_etag
 
 router = APIRouter()
 
 
+@router.get('/cache/stats')
+async def get_cache_stats() -> dict:
+    """Возвращает статистику кэша профилей.
+
+    Returns:
+        dict: Размер кэша, количество попаданий и промахов.
+    """
+    return user_cache.stats()
+
+
+@router.get('/upcoming', dependencies=[Depends(require_admin)])
+async def get_upcoming(
+    within_days: int = Query(DEFAULT_UPCOMING_WITHIN_DAYS, ge=0, le=365),
+    limit: int = Query(DEFAULT_UPCOMING_LIMIT, ge=1, le=MAX_UPCOMING_LIMIT),
+    cursor: Optional[str] = None,
+) -> Response:
+    """Получает пользователей, чей день рождения наступает в ближайшие within_days дней.
+
+    Маршрут служебный: он отдаёт данные многих пользователей, поэтому требует X-Admin-Token.
+
+    Args:
+        within_days (int): Длина окна в днях, 0 — только сегодняшние дни рождения.
+        limit (int): Максимальное количество пользователей на странице.
+        cursor (str, optional): Значение next_cursor из предыдущей страницы.
+
+    Returns:
+        Response: Пользователи с количеством дней до дня рождения и курсор следующей страницы.
+
+    Raises:
+        HTTPException: Если курсор имеет неверный формат.
+    """
+    page_cursor = None
+    if cursor:
+        try:
+            day_of_year, user_id = cursor.split(':')
+            page_cursor = (int(day_of_year), int(user_id))
+        except ValueError:
+            raise HTTPException(status_code=HTTP_BAD_REQUEST, detail='Invalid cursor')
+
+    today = datetime.now().date()
+    users, next_cursor = await get_upcoming_birthdays(today, within_days, limit, page_cursor)
+    days_left = calculate_days_until_next_birthdays([user['birthdate'] for user in users], today)
+    for user, days in zip(users, days_left):
+        user['days_left'] = days
+
+    return ORJSONResponse({
+        'users': users,
+        'next_cursor': '{0}:{1}'.format(*next_cursor) if next_cursor else None,
+    })
+
+
 @router.get('/{user_id}')
-async def get_profile(user_id: int) -> dict:
+async def get_profile(user_id: int, request: Request, response: Response) -> Response:
     """Получает профиль пользователя и рассчитывает время до следующего дня рождения.
 
+    ETag строится из версии строки и оставшегося времени в минутах: если он совпадает
+    с If-None-Match, возвращается 304 без тела.
+
     Args:
         user_id (int): Идентификатор пользователя.
+        request (Request): Входящий запрос.
+        response (Response): Ответ для установки заголовков кэширования.
 
     Returns:
-        dict: Данные пользователя и время до следующего дня рождения.
+        Response: Данные пользователя и время до следующего дня рождения, сериализованные orjson.
 
     Raises:
         HTTPException: Если пользователь не найден.
     """
-    try:
-        user = await User_Pydantic.from_queryset_single(User.get(user_id=user_id))
-    except DoesNotExist:
+    user = await get_user_profile(user_id)
+    if user is None:
         raise HTTPException(status_code=HTTP_NOT_FOUND, detail='User not found')
 
     now = datetime.now()
 
-    birthdate = user.birthdate.strftime('%Y-%m-%d')
-    time_left_in_minutes = calculate_time_until_next_birthday(user.birthdate, now)
+    time_left_in_minutes = calculate_time_until_next_birthday(user['birthdate'], now)
+    etag = make_etag('p', user['user_id'], user['version'], int(time_left_in_minutes))
+    not_modified = conditional_response(request, response, etag)
+    if not_modified:
+        return not_modified
 
-    return {
+    return ORJSONResponse({
         'user': {
-            'user_id': user.user_id,
-            'first_name': user.first_name,
-            'last_name': user.last_name,
-            'username': user.username,
-            'photo': user.photo,
-            'birthdate': birthdate,
+            'user_id': user['user_id'],
+            'first_name': user['first_name'],
+            'last_name': user['last_name'],
+            'username': user['username'],
+            'photo': user['photo'],
+            'birthdate': user['birthdate'],
         },
         'time_left': time_left_in_minutes,
-    }
+    }, headers=response.headers)
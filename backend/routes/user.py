@@ -1,54 +1,233 @@
 """Маршруты для работы с пользователями."""
-from core.constants import HTTP_NOT_FOUND
+import asyncio
+from typing import List
+
+from core.constants import (
+    DEFAULT_USERNAME_SEARCH_LIMIT,
+    HTTP_NOT_FOUND,
+    HTTP_PAYLOAD_TOO_LARGE,
+    MAX_LENGTH_USERNAME,
+    MAX_USER_BATCH_SIZE,
+    MAX_USERNAME_SEARCH_LIMIT,
+)
 from db.crud import (
-    create_or_update_user,
+    bulk_create_or_update_users,
     get_user_by_id,
+    get_user_by_username,
+    get_user_profile,
+    register_user,
+    search_users_by_username,
     update_user_birthdate,
 )
-from fastapi import APIRouter, HTTPException
-from schemas.user import BirthdateData, UserData
+from db.transfer import EXPORT_FORMATS, FORMAT_NDJSON, MEDIA_TYPES, export_users
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from routes.admin import require_admin
+from schemas.user import BirthdateData, StartData, UserData
+from utils.http_cache import conditional_response, make_etag, mark_recent_write
 
 router = APIRouter()
 
 
+def _user_response(user: dict, request: Request, response: Response) -> Response:
+    """Формирует ответ с данными пользователя и ETag на основе версии строки.
+
+    Args:
+        user (dict): Данные пользователя и версия строки.
+        request (Request): Входящий запрос.
+        response (Response): Ответ для установки заголовков кэширования.
+
+    Returns:
+        Response: Данные пользователя или 304 без тела, если ETag совпадает с If-None-Match.
+    """
+    not_modified = conditional_response(request, response, make_etag('u', user['user_id'], user['version']))
+    if not_modified:
+        return not_modified
+    return ORJSONResponse({
+        'user_id': user['user_id'],
+        'first_name': user['first_name'],
+        'last_name': user['last_name'],
+        'username': user['username'],
+        'photo': user['photo'],
+        'birthdate': user['birthdate'],
+    }, headers=response.headers)
+
+
 @router.post('/user_data/')
-async def receive_user_data(user_data: UserData) -> dict:
+async def receive_user_data(user_data: UserData, response: Response) -> dict:
     """Принимает данные пользователя и создает или обновляет пользователя.
 
     Args:
         user_data (UserData): Данные пользователя для создания или обновления.
+        response (Response): Ответ для отметки клиента, изменившего свои данные.
 
     Returns:
         dict: Результат операции создания или обновления пользователя.
     """
-    return await create_or_update_user(user_data=user_data)
+    result = await register_user(user_data)
+    mark_recent_write(response)
+    return result
+
+
+@router.post('/start')
+async def start(start_data: StartData) -> dict:
+    """Регистрирует пользователя и возвращает профиль из ссылки за один запрос.
+
+    Профиль из ссылки ищется по идентификатору или по юзернейму. Регистрация
+    и чтение чужого профиля выполняются параллельно.
+
+    Args:
+        start_data (StartData): Данные пользователя и идентификатор или юзернейм профиля из ссылки.
+
+    Returns:
+        dict: Результат регистрации и данные профиля из ссылки (None, если он не найден или не указан).
+    """
+    user = start_data.user
+    if start_data.target_id is not None:
+        own_profile = start_data.target_id == user.user_id
+        fetch_target = get_user_profile(start_data.target_id)
+    elif start_data.target_username:
+        own_profile = start_data.target_username.lower() == (user.username or '').lower()
+        # Свой профиль читается по идентификатору: после записи он закреплён за основной базой
+        fetch_target = (
+            get_user_profile(user.user_id) if own_profile else get_user_by_username(start_data.target_username)
+        )
+    else:
+        return {**await register_user(user), 'target': None}
+    if own_profile:
+        # Свой профиль читается после регистрации, чтобы вернуть актуальные данные
+        registration = await register_user(user)
+        return {**registration, 'target': await fetch_target}
+    registration, target = await asyncio.gather(register_user(user), fetch_target)
+    return {**registration, 'target': target}
+
+
+@router.post('/user_data/batch')
+async def receive_user_data_batch(users: List[UserData]) -> dict:
+    """Принимает список пользователей и создает или обновляет их пакетами.
+
+    Args:
+        users (List[UserData]): Данные пользователей для создания или обновления.
+
+    Returns:
+        dict: Результат для каждого пользователя и количество созданных и существующих пользователей.
+
+    Raises:
+        HTTPException: Если в запросе больше MAX_USER_BATCH_SIZE пользователей.
+    """
+    if len(users) > MAX_USER_BATCH_SIZE:
+        raise HTTPException(
+            status_code=HTTP_PAYLOAD_TOO_LARGE,
+            detail='Batch size exceeds {0}'.format(MAX_USER_BATCH_SIZE),
+        )
+    results = await bulk_create_or_update_users(users)
+    created = sum(1 for result in results if result['message'] == 'User created')
+    return {'results': results, 'created': created, 'existing': len(results) - created}
 
 
 @router.get('/user_data/{user_id}')
-async def get_user_data(user_id: int) -> dict:
+async def get_user_data(user_id: int, request: Request, response: Response) -> Response:
     """Получает данные пользователя по его идентификатору.
 
+    Ответ содержит ETag на основе версии строки: если он совпадает с If-None-Match,
+    возвращается 304 без тела.
+
     Args:
         user_id (int): Идентификатор пользователя.
+        request (Request): Входящий запрос.
+        response (Response): Ответ для установки заголовков кэширования.
 
     Returns:
-        dict: Данные пользователя, если пользователь найден, иначе выбрасывает HTTPException с ошибкой 404.
+        Response: Данные пользователя, если пользователь найден, иначе выбрасывает HTTPException с ошибкой 404.
 
     Raises:
         HTTPException: Если пользователь не найден.
     """
     user = await get_user_by_id(user_id=user_id)
-    if user:
-        return user
-    raise HTTPException(status_code=HTTP_NOT_FOUND, detail='User not found')
+    if not user:
+        raise HTTPException(status_code=HTTP_NOT_FOUND, detail='User not found')
+    if 'error' in user:
+        return ORJSONResponse(user)
+    return _user_response(user, request, response)
+
+
+@router.get('/by_username/{username}')
+async def get_user_data_by_username(username: str, request: Request, response: Response) -> Response:
+    """Получает данные пользователя по юзернейму без учёта регистра.
+
+    Args:
+        username (str): Юзернейм пользователя в Telegram.
+        request (Request): Входящий запрос.
+        response (Response): Ответ для установки заголовков кэширования.
+
+    Returns:
+        Response: Данные пользователя с ETag на основе версии строки.
+
+    Raises:
+        HTTPException: Если пользователь не найден.
+    """
+    user = await get_user_by_username(username)
+    if user is None:
+        raise HTTPException(status_code=HTTP_NOT_FOUND, detail='User not found')
+    return _user_response(user, request, response)
+
+
+@router.get('/export', dependencies=[Depends(require_admin)])
+async def export_all_users(export_format: str = Query(
+    FORMAT_NDJSON, alias='format', pattern='^({0})$'.format('|'.join(EXPORT_FORMATS)),
+)):
+    """Выгружает всех пользователей потоком в NDJSON или CSV.
+
+    Доступно только с токеном администратора. Пользователи читаются порциями
+    серверным курсором, поэтому память не зависит от размера таблицы.
+
+    Args:
+        export_format (str): Формат выгрузки: ndjson или csv.
+
+    Returns:
+        StreamingResponse: Пользователи в порядке user_id.
+    """
+    return StreamingResponse(
+        export_users(export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': 'attachment; filename="users.{0}"'.format(export_format)},
+    )
+
+
+@router.get('/search')
+async def search_users(
+    prefix: str = Query(min_length=1, max_length=MAX_LENGTH_USERNAME),
+    limit: int = Query(DEFAULT_USERNAME_SEARCH_LIMIT, ge=1, le=MAX_USERNAME_SEARCH_LIMIT),
+) -> Response:
+    """Ищет пользователей по началу юзернейма для автодополнения.
+
+    Args:
+        prefix (str): Начало юзернейма, регистр не учитывается.
+        limit (int): Максимальное количество пользователей.
+
+    Returns:
+        Response: Пользователи, упорядоченные по юзернейму.
+    """
+    users = await search_users_by_username(prefix, limit)
+    return ORJSONResponse({'users': [
+        {
+            'user_id': user['user_id'],
+            'first_name': user['first_name'],
+            'last_name': user['last_name'],
+            'username': user['username'],
+            'photo': user['photo'],
+        }
+        for user in users
+    ]})
 
 
 @router.post('/save_birthdate/')
-async def save_birthdate(birthdate_data: BirthdateData) -> dict:
+async def save_birthdate(birthdate_data: BirthdateData, response: Response) -> dict:
     """Сохраняет дату рождения пользователя.
 
     Args:
         birthdate_data (BirthdateData): Данные о дате рождения пользователя.
+        response (Response): Ответ для отметки клиента, изменившего свои данные.
 
     Returns:
         dict: Результат операции обновления даты рождения. Если пользователь не найден, выбрасывается HTTPException с ошибкой 404.
@@ -56,7 +235,8 @@ async def save_birthdate(birthdate_data: BirthdateData) -> dict:
     Raises:
         HTTPException: Если пользователь не найден.
     """
-    response = await update_user_birthdate(birthdate_data.user_id, birthdate_data.birthdate)
-    if response.get('error') == 'User not found':
+    result = await update_user_birthdate(birthdate_data.user_id, birthdate_data.birthdate)
+    if result.get('error') == 'User not found':
         raise HTTPException(status_code=HTTP_NOT_FOUND, detail='User not found')
-    return response
+    mark_recent_write(response)
+    return result
@@ -1,8 +1,32 @@
 """Модели данных для работы с пользователями."""
 from datetime import date
-from typing import Optional
+from typing import Annotated, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, BeforeValidator
+
+
+def _reject_bool(value):
+    """Не даёт привести true и false к идентификаторам 1 и 0.
+
+    Raises:
+        ValueError: Если значение логическое.
+    """
+    if isinstance(value, bool):
+        raise ValueError('user_id must be an integer')
+    return value
+
+
+def _strip_at(value):
+    """Убирает @ в начале юзернейма, чтобы @name и name искали одного пользователя."""
+    if isinstance(value, str):
+        return value.lstrip('@')
+    return value
+
+
+# Идентификатор пользователя: int, число без дробной части или строка из цифр, но не bool
+UserId = Annotated[int, BeforeValidator(_reject_bool)]
+# Юзернейм Telegram, с @ в начале или без
+Username = Annotated[str, BeforeValidator(_strip_at)]
 
 
 class UserData(BaseModel):
@@ -16,7 +40,7 @@ class UserData(BaseModel):
         photo (Optional[str]): URL фотографии профиля.
     """
 
-    user_id: int
+    user_id: UserId
     first_name: str
     last_name: Optional[str] = None
     username: Optional[str] = None
@@ -31,5 +55,19 @@ class BirthdateData(BaseModel):
         birthdate (date): Дата рождения пользователя.
     """
 
-    user_id: int
+    user_id: UserId
     birthdate: date
+
+
+class StartData(BaseModel):
+    """Модель данных команды /start: регистрация пользователя и просмотр чужого профиля.
+
+    Attributes:
+        user (UserData): Данные пользователя, отправившего команду.
+        target_id (Optional[int]): Идентификатор пользователя из ссылки на профиль.
+        target_username (Optional[str]): Юзернейм пользователя из ссылки на профиль.
+    """
+
+    user: UserData
+    target_id: Optional[UserId] = None
+    target_username: Optional[Username] = None
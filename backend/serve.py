@@ -0,0 +1,182 @@
+"""Точка запуска бекенда в нескольких рабочих процессах.
+
+Gunicorn импортирует приложение один раз в главном процессе (preload) и
+запускает WEB_WORKERS рабочих процессов UvicornWorker с uvloop и httptools,
+если они установлены. Рабочие процессы наследуют уже импортированные модули,
+поэтому их запуск сводится к lifespan: подключению к базе данных и кэшу.
+Таблицы из моделей (GENERATE_SCHEMAS) создаются один раз до запуска процессов.
+
+Управление работающим сервером сигналами главному процессу:
+
+- HUP — плавный перезапуск рабочих процессов: новые процессы запускаются,
+  старые дообрабатывают запросы в течение WEB_GRACEFUL_TIMEOUT. Код приложения
+  при этом не перечитывается, для обновления кода перезапускается контейнер;
+- TTIN/TTOU — добавить или убрать один рабочий процесс;
+- TERM — плавная остановка.
+
+Если gunicorn не установлен (например, на Windows) или WEB_WORKERS равно 1,
+приложение запускается одним процессом uvicorn.
+
+Кэш в памяти без CACHE_REDIS_URL и лимиты пользователей без RATE_LIMIT_REDIS_URL
+у каждого процесса свои, поэтому с ними WEB_WORKERS по умолчанию равно 1, а
+запуск с несколькими процессами отклоняется. Закрепление за основной базой
+после записи (DATABASE_REPLICA_URLS) действует только в записавшем процессе.
+
+Маршруты импортируются сразу, а не при первом запросе: приложение
+импортируется один раз в главном процессе, и отложенный импорт только
+перенёс бы эту работу на первый запрос в каждом рабочем процессе.
+
+Запуск из каталога backend::
+
+    python serve.py
+"""
+import time
+
+STARTED_AT = time.perf_counter()
+
+import asyncio  # noqa: E402
+import glob  # noqa: E402
+import os  # noqa: E402
+import tempfile  # noqa: E402
+
+from core.config import logger, settings  # noqa: E402
+
+# Запас времени на lifespan после завершения запросов, прежде чем gunicorn остановит процесс принудительно
+SHUTDOWN_MARGIN = 5
+
+
+def prepare_metrics_dir() -> None:
+    """Готовит каталог общих метрик prometheus_client для нескольких процессов.
+
+    Переменная окружения должна быть задана до импорта prometheus_client.
+    Файлы метрик прошлых запусков удаляются.
+    """
+    directory = os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', tempfile.mkdtemp(prefix='prometheus-'))
+    os.makedirs(directory, exist_ok=True)
+    for path in glob.glob(os.path.join(directory, '*.db')):
+        os.remove(path)
+
+
+async def generate_schemas() -> None:
+    """Создаёт таблицы из моделей один раз в главном процессе."""
+    from tortoise import Tortoise
+
+    await Tortoise.init(db_url=settings.database_url, modules={'models': ['models.user']})
+    try:
+        await Tortoise.generate_schemas()
+    finally:
+        await Tortoise.close_connections()
+
+
+def load_app():
+    """Импортирует приложение и записывает в лог время импорта.
+
+    Returns:
+        FastAPI: Приложение бекенда.
+    """
+    if settings.generate_schemas:
+        asyncio.run(generate_schemas())
+        settings.generate_schemas = False
+    from main import app
+
+    logger.info('Application loaded in {0:.0f} ms'.format((time.perf_counter() - STARTED_AT) * 1000))
+    return app
+
+
+def run_gunicorn(app) -> None:
+    """Запускает приложение в WEB_WORKERS рабочих процессах gunicorn.
+
+    Args:
+        app (FastAPI): Приложение бекенда, импортированное в главном процессе.
+    """
+    from gunicorn.app.base import BaseApplication
+    from prometheus_client import multiprocess
+    from uvicorn_worker import UvicornWorker
+
+    class Worker(UvicornWorker):
+        """Рабочий процесс uvicorn с плавной остановкой в пределах WEB_GRACEFUL_TIMEOUT."""
+
+        CONFIG_KWARGS = {'loop': 'auto', 'http': 'auto', 'server_header': False}
+
+        def __init__(self, *args, **kwargs):
+            """Инициализирует рабочий процесс."""
+            super().__init__(*args, **kwargs)
+            self.config.timeout_graceful_shutdown = settings.web_graceful_timeout
+
+    def child_exit(server, worker) -> None:
+        """Удаляет метрики завершившегося рабочего процесса."""
+        multiprocess.mark_process_dead(worker.pid)
+
+    class Server(BaseApplication):
+        """Приложение gunicorn с настройками из Settings."""
+
+        def load_config(self) -> None:
+            """Передаёт настройки в gunicorn."""
+            options = {
+                'bind': '{0}:{1}'.format(settings.web_host, settings.web_port),
+                'workers': settings.web_workers,
+                'worker_class': Worker,
+                'preload_app': True,
+                'backlog': settings.web_backlog,
+                'keepalive': settings.web_keepalive,
+                'graceful_timeout': settings.web_graceful_timeout + SHUTDOWN_MARGIN,
+                'max_requests': settings.web_max_requests,
+                'max_requests_jitter': settings.web_max_requests // 10,
+                'child_exit': child_exit,
+            }
+            for name, value in options.items():
+                self.cfg.set(name, value)
+
+        def load(self):
+            """Возвращает приложение, импортированное до запуска рабочих процессов."""
+            return app
+
+    Server().run()
+
+
+def check_workers() -> None:
+    """Проверяет, что состояние процессов позволяет запустить WEB_WORKERS процессов.
+
+    Raises:
+        RuntimeError: Если процессов несколько, а кэш или лимиты хранятся в памяти процесса.
+    """
+    if settings.web_workers <= 1:
+        return
+    state = settings.process_local_state()
+    if state:
+        raise RuntimeError('WEB_WORKERS={0} needs shared state, set WEB_WORKERS=1 or configure Redis: {1}'.format(
+            settings.web_workers, '; '.join(state),
+        ))
+    if settings.database_replica_urls:
+        logger.warning('Read-your-writes pinning is per worker: reads in other workers may hit a lagging replica')
+
+
+def main() -> None:
+    """Запускает бекенд в нескольких процессах или, если это невозможно, в одном."""
+    check_workers()
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        gunicorn = None
+    if gunicorn is None or settings.web_workers <= 1:
+        import uvicorn
+
+        uvicorn.run(
+            load_app(),
+            host=settings.web_host,
+            port=settings.web_port,
+            loop='auto',
+            http='auto',
+            backlog=settings.web_backlog,
+            timeout_keep_alive=settings.web_keepalive,
+            timeout_graceful_shutdown=settings.web_graceful_timeout,
+            server_header=False,
+        )
+        return
+    if settings.metrics_enabled:
+        prepare_metrics_dir()
+    run_gunicorn(load_app())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""Общие настройки тестов бекенда.
+
+Настройки читаются из окружения при импорте core.config, поэтому переменные
+задаются до импорта модулей приложения. Асинхронные тесты выполняются
+плагином anyio на asyncio.
+"""
+import os
+
+os.environ.setdefault('DATABASE_URL', 'sqlite://:memory:')
+os.environ.setdefault('METRICS_ENABLED', '0')
+os.environ.setdefault('GENERATE_SCHEMAS', '1')
+
+import fakeredis  # noqa: E402
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+ADMIN_TOKEN = 'test-admin-token'
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    """Запускает асинхронные тесты на asyncio."""
+    return 'asyncio'
+
+
+@pytest.fixture
+def redis_server(monkeypatch) -> fakeredis.FakeServer:
+    """Подменяет подключение к Redis общим фиктивным сервером.
+
+    Returns:
+        fakeredis.FakeServer: Сервер, к которому подключаются все клиенты теста.
+    """
+    import utils.cache
+
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(
+        utils.cache, '_connect_redis', lambda url: fakeredis.FakeAsyncRedis(server=server, decode_responses=True),
+    )
+    return server
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    """Запускает приложение на SQLite в памяти и возвращает HTTP-клиент к нему.
+
+    Служебные маршруты включены токеном ADMIN_TOKEN.
+
+    Yields:
+        httpx.AsyncClient: Клиент, вызывающий приложение по ASGI.
+    """
+    from core.config import settings
+    from main import app
+
+    monkeypatch.setattr(settings, 'admin_token', ADMIN_TOKEN)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://test') as http_client:
+            yield http_client
@@ -0,0 +1,155 @@
+"""Тесты ограничения запросов к маршрутам записи."""
+import asyncio
+
+import httpx
+import pytest
+import utils.admission
+import utils.cache
+from fastapi import FastAPI, Request, Response
+from utils.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    RedisTokenBuckets,
+    TokenBuckets,
+    _extract_user_id,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize('body', [
+    b'{"user_id": 12345}',
+    b'{"user_id": 12345.0}',
+    b'{"user_id": "12345"}',
+    b'{"user_id": " 12345 "}',
+])
+def test_user_id_is_normalized_like_the_request_model(body):
+    assert _extract_user_id(body, ('user_id',)) == 12345
+
+
+@pytest.mark.parametrize('body', [b'{"user_id": true}', b'{"user_id": 1.5}', b'{"user_id": "1e3"}', b'{}', b'not json'])
+def test_invalid_user_id_is_left_to_validation(body):
+    assert _extract_user_id(body, ('user_id',)) is None
+
+
+@pytest.fixture
+def controller(monkeypatch) -> AdmissionController:
+    """Подменяет контроль допуска: бакет на 2 запроса с пополнением 1 в секунду и 1 запрос записи одновременно."""
+    admission = AdmissionController(TokenBuckets(rate=1, burst=2, maxsize=100), max_concurrent=1)
+    monkeypatch.setattr(utils.admission, 'admission_controller', admission)
+    return admission
+
+
+@pytest.fixture
+async def app_client(controller):
+    """Возвращает клиент приложения с AdmissionMiddleware и маршрутами-заглушками.
+
+    Маршрут сохранения даты рождения возвращает полученное тело, пакетная запись
+    ждёт события release в состоянии приложения.
+    """
+    app = FastAPI()
+    app.add_middleware(AdmissionMiddleware)
+    app.state.release = asyncio.Event()
+
+    @app.post('/user/save_birthdate/')
+    async def echo(request: Request) -> Response:
+        return Response(await request.body())
+
+    @app.post('/user/user_data/batch')
+    async def wait_for_release() -> dict:
+        await app.state.release.wait()
+        return {}
+
+    @app.get('/user/user_data/{user_id}')
+    async def read(user_id: int) -> dict:
+        return {'user_id': user_id}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        client.app = app
+        yield client
+
+
+async def test_token_bucket_refills_over_time(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(utils.admission.time, 'monotonic', lambda: now[0])
+    buckets = TokenBuckets(rate=2, burst=2, maxsize=10)
+
+    assert [await buckets.take(1) for _ in range(2)] == [0.0, 0.0]
+    assert await buckets.take(1) == pytest.approx(0.5)
+    now[0] += 0.5
+    assert await buckets.take(1) == 0.0
+
+
+async def test_user_over_burst_gets_429_with_retry_after(app_client, controller):
+    bodies = [{'user_id': 7}, {'user_id': '7'}, {'user_id': 7.0}]
+    responses = [await app_client.post('/user/save_birthdate/', json=body) for body in bodies]
+
+    # Все три записи одного пользователя расходуют один бакет
+    assert [response.status_code for response in responses] == [200, 200, 429]
+    assert responses[2].headers['retry-after'] == '1'
+    assert (await app_client.post('/user/save_birthdate/', json={'user_id': 8})).status_code == 200
+    assert controller.rejected_user_rate == 1
+
+
+async def test_saturated_writes_get_503(app_client, controller):
+    blocked = asyncio.ensure_future(app_client.post('/user/user_data/batch', json=[]))
+    while controller.in_flight == 0:
+        await asyncio.sleep(0.001)
+
+    response = await app_client.post('/user/save_birthdate/', json={'user_id': 1})
+    assert response.status_code == 503
+    assert response.headers['retry-after'] == '1'
+
+    app_client.app.state.release.set()
+    assert (await blocked).status_code == 200
+    assert controller.in_flight == 0
+    assert controller.rejected_busy == 1
+
+
+async def test_body_is_replayed_unchanged(app_client):
+    body = b'{"user_id": 9,  "birthdate": "2000-02-29", "note": "' + b'x' * 100000 + b'"}'
+
+    response = await app_client.post('/user/save_birthdate/', content=body)
+
+    assert response.status_code == 200
+    assert response.content == body
+
+
+async def test_reads_are_not_limited(app_client, controller):
+    responses = [await app_client.get('/user/user_data/7') for _ in range(10)]
+
+    assert all(response.status_code == 200 for response in responses)
+    assert controller.admitted == 0
+    assert len(controller.buckets) == 0
+
+
+async def test_redis_buckets_are_shared_and_failures_allow_requests(redis_server, monkeypatch):
+    monkeypatch.setattr(utils.admission, '_connect_redis', utils.cache._connect_redis)
+    first, second = RedisTokenBuckets(1, 2, 'redis://fake'), RedisTokenBuckets(1, 2, 'redis://fake')
+    await first.start()
+    await second.start()
+    try:
+        assert await first.take(7) == 0.0
+        assert await second.take(7) == 0.0
+        assert await first.take(7) > 0
+
+        redis_server.connected = False
+        assert await first.take(7) == 0.0
+    finally:
+        redis_server.connected = True
+        await first.close()
+        await second.close()
+
+
+async def test_redis_failure_lets_write_through(app_client, redis_server, monkeypatch, controller):
+    monkeypatch.setattr(utils.admission, '_connect_redis', utils.cache._connect_redis)
+    controller.buckets = RedisTokenBuckets(1, 1, 'redis://fake')
+    await controller.start()
+    try:
+        redis_server.connected = False
+        responses = [await app_client.post('/user/save_birthdate/', json={'user_id': 7}) for _ in range(3)]
+        assert [response.status_code for response in responses] == [200, 200, 200]
+    finally:
+        redis_server.connected = True
+        await controller.close()
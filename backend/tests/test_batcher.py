@@ -0,0 +1,55 @@
+"""Тесты сборщика пакетов."""
+import asyncio
+
+import pytest
+from utils.batcher import MicroBatcher
+
+pytestmark = pytest.mark.anyio
+
+
+async def handle_batch(items):
+    """Обрабатывает пакет целиком и отклоняет его, если в нём есть отрицательный элемент."""
+    if any(item < 0 for item in items):
+        raise ValueError('bad batch')
+    return [item * 2 for item in items]
+
+
+async def handle_one(item):
+    """Обрабатывает один элемент и отклоняет только отрицательный."""
+    if item < 0:
+        raise ValueError('bad item {0}'.format(item))
+    return item * 2
+
+
+async def test_batch_results_are_delivered_to_each_caller():
+    calls = []
+
+    async def handler(items):
+        calls.append(list(items))
+        return await handle_batch(items)
+
+    batcher = MicroBatcher(handler, max_size=10, max_delay=0.01)
+    assert await asyncio.gather(*(batcher.submit(item) for item in range(3))) == [0, 2, 4]
+    assert calls == [[0, 1, 2]]
+
+
+async def test_batch_error_without_fallback_fails_every_caller():
+    batcher = MicroBatcher(handle_batch, max_size=10, max_delay=0.01)
+    results = await asyncio.gather(*(batcher.submit(item) for item in (1, -1, 2)), return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def test_batch_error_falls_back_to_single_items():
+    batcher = MicroBatcher(handle_batch, max_size=10, max_delay=0.01, fallback=handle_one)
+    results = await asyncio.gather(*(batcher.submit(item) for item in (1, -1, 2)), return_exceptions=True)
+    assert results[0] == 2 and results[2] == 4
+    assert isinstance(results[1], ValueError) and str(results[1]) == 'bad item -1'
+    assert batcher.fallbacks == 1
+
+
+async def test_close_flushes_pending_items():
+    batcher = MicroBatcher(handle_batch, max_size=10, max_delay=60, fallback=handle_one)
+    pending = asyncio.ensure_future(batcher.submit(5))
+    await asyncio.sleep(0)
+    await batcher.close()
+    assert await pending == 10
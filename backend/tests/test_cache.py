@@ -0,0 +1,205 @@
+"""Тесты кэша пользователей на фиктивном Redis."""
+import asyncio
+from datetime import date
+
+import pytest
+import utils.cache
+from utils.cache import MemoryCache, RedisCache, TTLCache
+
+pytestmark = pytest.mark.anyio
+
+USER = {'user_id': 1, 'first_name': 'Ann', 'birthdate': date(2000, 2, 29), 'version': 3}
+
+
+async def wait_for(condition, timeout: float = 2) -> None:
+    """Ждёт, пока condition() не станет истинным."""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError('condition not met in {0}s'.format(timeout))
+        await asyncio.sleep(0.01)
+
+
+def test_ttl_cache_expires_and_evicts(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(utils.cache.time, 'monotonic', lambda: now[0])
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    now[0] += 11
+    assert cache.get('a') is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+async def test_redis_cache_round_trip(redis_server):
+    cache = RedisCache('redis://fake', ttl=60)
+    await cache.start()
+    try:
+        assert await cache.get(1) is None
+        await cache.set(1, USER)
+        assert await cache.get(1) == USER
+        await cache.delete(1)
+        assert await cache.get(1) is None
+        assert cache.stats()['hits'] == 1
+    finally:
+        await cache.close()
+
+
+async def test_redis_cache_errors_are_misses(redis_server):
+    cache = RedisCache('redis://fake', ttl=60)
+    await cache.start()
+    try:
+        await cache.set(1, USER)
+        redis_server.connected = False
+        assert await cache.get(1) is None
+        await cache.set(2, USER)
+        await cache.delete(1)
+        assert cache.misses == 1
+    finally:
+        redis_server.connected = True
+        await cache.close()
+
+
+async def test_memory_cache_invalidates_other_processes(redis_server):
+    first, second = MemoryCache(10, 60, 'redis://fake'), MemoryCache(10, 60, 'redis://fake')
+    await first.start()
+    await second.start()
+    try:
+        await first.set(1, USER)
+        await second.set(1, USER)
+        await first.delete(1)
+        assert await first.get(1) is None
+        await wait_for(lambda: len(second._cache) == 0)
+    finally:
+        await first.close()
+        await second.close()
+
+
+async def test_memory_cache_resubscribes_and_clears_after_disconnect(redis_server, monkeypatch):
+    monkeypatch.setattr(utils.cache, 'CACHE_RECONNECT_MIN_DELAY', 0.01)
+    publisher, listener = MemoryCache(10, 60, 'redis://fake'), MemoryCache(10, 60, 'redis://fake')
+    await publisher.start()
+    await listener.start()
+    try:
+        redis_server.connected = False
+        # Соединение подписки обрывается, а инвалидация за это время теряется
+        await listener._redis.connection_pool.disconnect()
+        await listener.set(1, USER)
+        await asyncio.sleep(0.05)
+        redis_server.connected = True
+        await wait_for(lambda: len(listener._cache) == 0)
+
+        await listener.set(2, USER)
+        await wait_for(lambda: redis_server.connected and listener._listener and not listener._listener.done())
+        # Подписка снова работает: инвалидация от другого процесса доходит
+        for _ in range(100):
+            await publisher.delete(2)
+            if await listener.get(2) is None:
+                break
+            await asyncio.sleep(0.02)
+        assert await listener.get(2) is None
+    finally:
+        await publisher.close()
+        await listener.close()
+
+
+async def test_redis_cache_ignores_entries_of_previous_format(redis_server):
+    cache = RedisCache('redis://fake', ttl=60)
+    await cache.start()
+    try:
+        # Запись, сохранённая до появления поля version
+        legacy = {key: value for key, value in USER.items() if key != 'version'}
+        await cache._redis.set('users:1', utils.cache._encode(legacy))
+        assert await cache.get(1) is None
+    finally:
+        await cache.close()
+
+
+async def test_memory_cache_holds_deleted_entries(redis_server):
+    first = MemoryCache(10, 60, 'redis://fake', write_hold=0.1)
+    second = MemoryCache(10, 60, 'redis://fake', write_hold=0.1)
+    await first.start()
+    await second.start()
+    try:
+        await first.delete(1)
+        await first.set(1, USER)
+        assert await first.get(1) is None
+        # Другой процесс получает инвалидацию и тоже не кэширует запись в окне после записи
+        await wait_for(lambda: second._held.get('1') is not None)
+        await second.set(1, USER)
+        assert await second.get(1) is None
+        await asyncio.sleep(0.15)
+        await second.set(1, USER)
+        assert await second.get(1) == USER
+    finally:
+        await first.close()
+        await second.close()
+
+
+async def test_redis_cache_holds_deleted_entries(redis_server):
+    writer = RedisCache('redis://fake', ttl=60, write_hold=0.1)
+    reader = RedisCache('redis://fake', ttl=60, write_hold=0.1)
+    await writer.start()
+    await reader.start()
+    try:
+        await reader.set(1, USER)
+        await writer.delete(1)
+        await reader.set(1, USER)
+        assert await reader.get(1) is None
+        await asyncio.sleep(0.15)
+        await reader.set(1, USER)
+        assert await reader.get(1) == USER
+    finally:
+        await writer.close()
+        await reader.close()
+
+
+async def test_memory_cache_skips_set_after_delete_during_read():
+    cache = MemoryCache(10, 60)
+    generation = await cache.generation(1)
+    await cache.delete(1)
+    await cache.set(1, USER, generation=generation)
+    assert await cache.get(1) is None
+
+    await cache.set(1, USER, generation=await cache.generation(1))
+    assert await cache.get(1) == USER
+
+
+async def test_redis_cache_skips_set_after_delete_during_read(redis_server):
+    reader, writer = RedisCache('redis://fake', ttl=60), RedisCache('redis://fake', ttl=60)
+    await reader.start()
+    await writer.start()
+    try:
+        generation = await reader.generation(1)
+        await writer.delete(1)
+        await reader.set(1, USER, generation=generation)
+        assert await reader.get(1) is None
+
+        await reader.set(1, USER, generation=await reader.generation(1))
+        assert await reader.get(1) == USER
+    finally:
+        await reader.close()
+        await writer.close()
+
+
+async def test_redis_cache_delete_many(redis_server):
+    cache = RedisCache('redis://fake', ttl=60, write_hold=5)
+    await cache.start()
+    try:
+        for user_id in (1, 2, 3):
+            await cache.set(user_id, USER)
+        generation = await cache.generation(1)
+
+        await cache.delete_many([1, 2])
+
+        assert await cache.get(1) is None and await cache.get(2) is None
+        assert await cache.get(3) == USER
+        assert await cache.generation(1) != generation
+        # Удалённые записи не кэшируются write_hold секунд
+        await cache.set(1, USER)
+        assert await cache.get(1) is None
+    finally:
+        await cache.close()
@@ -0,0 +1,96 @@
+"""Тесты расчёта времени до дня рождения: векторный расчёт NumPy против поэлементного."""
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+import utils.calculate
+from utils.calculate import (
+    _minutes_until_next_birthdays_numpy,
+    calculate_days_until_next_birthdays,
+    calculate_minutes_until_next_birthdays,
+    calculate_time_until_next_birthday,
+    day_of_year_window,
+    days_until_next_birthday,
+)
+
+np = pytest.importorskip('numpy')
+
+BIRTHDATES = [
+    date(2000, 2, 29),
+    date(1999, 2, 28),
+    date(1990, 3, 1),
+    date(1985, 1, 1),
+    date(1970, 12, 31),
+    None,
+    date(2004, 7, 15),
+]
+NOW_VALUES = [
+    # Невисокосный год: 29 февраля отмечается 1 марта
+    datetime(2023, 2, 28, 12, 30),
+    datetime(2023, 3, 1, 0, 0),
+    # Високосный год
+    datetime(2024, 2, 28, 23, 59, 59),
+    datetime(2024, 2, 29, 0, 0, 1),
+    # Переход через год
+    datetime(2023, 12, 31, 23, 0),
+    datetime(2024, 1, 1, 0, 0),
+    datetime(2025, 7, 15, 0, 0),
+]
+
+
+def pure_python(birthdates, now):
+    """Рассчитывает время до дней рождения поэлементно, как без NumPy."""
+    return [None if birthdate is None else calculate_time_until_next_birthday(birthdate, now) for birthdate in birthdates]
+
+
+@pytest.mark.parametrize('now', NOW_VALUES, ids=str)
+def test_numpy_matches_pure_python(now):
+    assert _minutes_until_next_birthdays_numpy(BIRTHDATES, now) == pure_python(BIRTHDATES, now)
+
+
+def test_numpy_matches_pure_python_on_random_dates():
+    generator = random.Random(0)
+    birthdates = [
+        None if generator.random() < 0.05 else date(1950, 1, 1) + timedelta(days=generator.randrange(60 * 365))
+        for _ in range(5000)
+    ]
+    now = datetime(2023, 2, 28, 18, 45, 30)
+    assert _minutes_until_next_birthdays_numpy(birthdates, now) == pure_python(birthdates, now)
+
+
+def test_datetime64_input_matches_dates():
+    birthdates = [birthdate for birthdate in BIRTHDATES if birthdate is not None]
+    now = NOW_VALUES[0]
+    array = np.array(birthdates, dtype='datetime64[D]')
+    assert _minutes_until_next_birthdays_numpy(array, now) == pure_python(birthdates, now)
+
+
+def test_feb_29_in_non_leap_year_is_march_1():
+    now = datetime(2023, 2, 28, 0, 0)
+    assert calculate_minutes_until_next_birthdays([date(2000, 2, 29)], now) == [24 * 60]
+
+
+def test_without_numpy_falls_back_to_pure_python(monkeypatch):
+    monkeypatch.setattr(utils.calculate, '_numpy', lambda: None)
+    now = NOW_VALUES[4]
+    assert calculate_minutes_until_next_birthdays(BIRTHDATES, now) == pure_python(BIRTHDATES, now)
+
+
+def test_empty_and_missing_dates():
+    assert calculate_minutes_until_next_birthdays([], NOW_VALUES[0]) == []
+    assert calculate_minutes_until_next_birthdays([None, None], NOW_VALUES[0]) == [None, None]
+
+
+@pytest.mark.parametrize('with_numpy', [True, False], ids=['numpy', 'python'])
+@pytest.mark.parametrize('now', NOW_VALUES, ids=str)
+def test_days_match_days_until_next_birthday(now, with_numpy, monkeypatch):
+    if not with_numpy:
+        monkeypatch.setattr(utils.calculate, '_numpy', lambda: None)
+    today = now.date()
+    expected = [None if birthdate is None else days_until_next_birthday(birthdate, today) for birthdate in BIRTHDATES]
+    assert calculate_days_until_next_birthdays(BIRTHDATES, today) == expected
+
+
+def test_day_of_year_window_wraps_around_new_year():
+    assert day_of_year_window(date(2023, 12, 30), 5) == ((365, 366), (1, 4))
+    assert day_of_year_window(date(2023, 3, 1), 0) == ((60, 61),)
@@ -0,0 +1,67 @@
+"""Тесты кэширования профиля в CRUD операциях."""
+import asyncio
+
+import db.crud
+import pytest
+from core.constants import MAX_LENGTH_FIRST_NAME
+from schemas.user import UserData
+from utils.cache import MemoryCache
+
+pytestmark = pytest.mark.anyio
+
+USER = {'user_id': 1, 'first_name': 'Ann', 'version': 1}
+
+
+class SlowRouter:
+    """Маршрутизатор чтений, который возвращает профиль только после release."""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def read(self, query, user_id=None):
+        self.started.set()
+        await self.release.wait()
+        return USER
+
+    def pin(self, user_id):
+        pass
+
+
+async def test_read_finished_after_write_is_not_cached(monkeypatch):
+    router = SlowRouter()
+    monkeypatch.setattr(db.crud, 'read_router', router)
+    monkeypatch.setattr(db.crud, 'user_cache', MemoryCache(10, 60))
+
+    read = asyncio.ensure_future(db.crud.get_user_profile(1))
+    await router.started.wait()
+    # Запись завершилась, пока чтение старых данных ещё выполнялось
+    await db.crud._invalidate_user(1)
+    router.release.set()
+
+    assert await read == USER
+    assert await db.crud.user_cache.get(1) is None
+    await db.crud.get_user_profile(1)
+    assert await db.crud.user_cache.get(1) == USER
+
+
+async def test_failed_batch_falls_back_with_per_user_status(client, monkeypatch):
+    monkeypatch.setattr(db.crud.settings, 'user_batch_window', 0.05)
+    monkeypatch.setattr(db.crud.user_batcher, 'max_delay', 0.05)
+    fallbacks = db.crud.user_batcher.fallbacks
+    assert (await client.post('/user/user_data/', json={'user_id': 201, 'first_name': 'Old'})).status_code == 200
+
+    results = await asyncio.gather(
+        db.crud.register_user(UserData(user_id=201, first_name='Ann')),
+        db.crud.register_user(UserData(user_id=202, first_name='Bob')),
+        # Имя длиннее столбца: пакет целиком отклоняется базой данных
+        db.crud.register_user(UserData(user_id=203, first_name='x' * (MAX_LENGTH_FIRST_NAME + 1))),
+        return_exceptions=True,
+    )
+
+    assert db.crud.user_batcher.fallbacks == fallbacks + 1
+    assert results[:2] == [{'message': 'User already created'}, {'message': 'User created'}]
+    assert isinstance(results[2], Exception)
+    assert (await client.get('/user/user_data/201')).json()['first_name'] == 'Ann'
+    assert (await client.get('/user/user_data/203')).json() == {'error': 'User not found'}
+
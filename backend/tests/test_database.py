@@ -0,0 +1,77 @@
+"""Тесты обёртки пула соединений."""
+from types import SimpleNamespace
+
+import db.database
+import pytest
+from db.database import InstrumentedPool, get_pool_stats, instrument_pool
+
+pytestmark = pytest.mark.anyio
+
+
+class FakePool:
+    """Пул с интерфейсом asyncpg.Pool, выдающий заглушки соединений."""
+
+    def __init__(self):
+        self.in_use = 0
+
+    async def acquire(self):
+        self.in_use += 1
+        return object()
+
+    async def release(self, connection):
+        self.in_use -= 1
+
+    def get_size(self):
+        return 4
+
+    def get_idle_size(self):
+        return 4 - self.in_use
+
+    def get_min_size(self):
+        return 1
+
+    def get_max_size(self):
+        return 10
+
+
+def postgres_client(**attributes) -> SimpleNamespace:
+    """Создаёт клиент Tortoise ORM для PostgreSQL с заданными атрибутами."""
+    return SimpleNamespace(capabilities=SimpleNamespace(dialect='postgres'), **attributes)
+
+
+@pytest.fixture
+def clients(monkeypatch) -> dict:
+    """Подменяет соединения Tortoise ORM словарём клиентов."""
+    registry = {}
+    monkeypatch.setattr(db.database, 'connections', SimpleNamespace(get=registry.__getitem__))
+    return registry
+
+
+async def test_pool_is_created_and_wrapped(clients):
+    async def create_connection(with_db):
+        clients['default']._pool = FakePool()
+
+    clients['default'] = postgres_client(_pool=None, create_connection=create_connection)
+    await instrument_pool('default')
+    assert isinstance(clients['default']._pool, InstrumentedPool)
+
+    connection = await clients['default']._pool.acquire()
+    stats = get_pool_stats('default')
+    assert (stats['in_use'], stats['acquire_count'], stats['utilization']) == (1, 1, 0.1)
+    await clients['default']._pool.release(connection)
+
+
+async def test_client_without_pool_attribute_is_left_alone(clients, caplog):
+    clients['default'] = postgres_client()
+    await instrument_pool('default')
+    assert not hasattr(clients['default'], '_pool')
+    assert get_pool_stats('default') is None
+    assert 'pool stats are disabled' in caplog.text
+
+
+async def test_unknown_pool_type_is_not_wrapped(clients, caplog):
+    pool = object()
+    clients['default'] = postgres_client(_pool=pool, create_connection=None)
+    await instrument_pool('default')
+    assert clients['default']._pool is pool
+    assert 'is not an asyncpg pool' in caplog.text
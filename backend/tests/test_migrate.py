@@ -0,0 +1,61 @@
+"""Тесты миграций и проверки планов горячих запросов.
+
+Проверка EXPLAIN выполняется только на PostgreSQL: задайте TEST_POSTGRES_URL
+с базой, которую тест может мигрировать.
+"""
+import os
+
+import pytest
+from db.migrate import check_query_plans, get_pending_migrations, init_orm, load_migrations, split_statements
+from tortoise import Tortoise
+
+pytestmark = pytest.mark.anyio
+
+TEST_POSTGRES_URL = os.getenv('TEST_POSTGRES_URL')
+
+
+def test_split_statements_skips_comments():
+    sql = '-- migrate: no-transaction\nCREATE INDEX a ON users (x);\n-- comment\nDROP INDEX b;\n'
+
+    assert split_statements(sql) == ['CREATE INDEX a ON users (x)', 'DROP INDEX b']
+
+
+def test_pending_migrations():
+    versions = [version for version, _, _ in load_migrations()]
+
+    assert len(get_pending_migrations(set())) == len(versions)
+    assert get_pending_migrations(set(versions)) == []
+    assert get_pending_migrations(set(versions[:-1])) == [get_pending_migrations(set())[-1]]
+
+
+@pytest.fixture
+async def postgres_connection():
+    if not TEST_POSTGRES_URL:
+        pytest.skip('TEST_POSTGRES_URL is not set')
+    import asyncpg
+    from db.migrate import apply_migrations
+
+    connection = await asyncpg.connect(TEST_POSTGRES_URL)
+    await apply_migrations(connection)
+    await init_orm(TEST_POSTGRES_URL)
+    try:
+        yield connection
+    finally:
+        await Tortoise.close_connections()
+        await connection.close()
+
+
+async def test_hot_queries_use_index(postgres_connection):
+    assert await check_query_plans(postgres_connection) == []
+
+
+async def test_missing_index_is_reported(postgres_connection):
+    transaction = postgres_connection.transaction()
+    await transaction.start()
+    try:
+        await postgres_connection.execute('DROP INDEX users_username_lower_idx')
+        failures = await check_query_plans(postgres_connection)
+    finally:
+        await transaction.rollback()
+
+    assert [failure.split(':')[0] for failure in failures] == ['get_user_by_username', 'search_users_by_username']
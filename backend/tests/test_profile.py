@@ -0,0 +1,86 @@
+"""Тесты маршрутов профиля."""
+from datetime import date, datetime, timedelta
+
+import pytest
+import routes.profile
+from core.constants import CACHE_CONTROL_REVALIDATE, RECENT_WRITE_COOKIE
+from tests.conftest import ADMIN_TOKEN
+
+pytestmark = pytest.mark.anyio
+
+
+async def create_user(client, user_id: int, birthdate: date) -> None:
+    """Регистрирует пользователя и сохраняет дату его рождения."""
+    response = await client.post('/user/user_data/', json={'user_id': user_id, 'first_name': 'User'})
+    assert response.status_code == 200
+    response = await client.post(
+        '/user/save_birthdate/', json={'user_id': user_id, 'birthdate': birthdate.isoformat()},
+    )
+    assert response.status_code == 200
+
+
+async def test_upcoming_requires_admin_token(client):
+    tomorrow = date.today() + timedelta(days=1)
+    await create_user(client, 1, date(2000, tomorrow.month, tomorrow.day))
+
+    assert (await client.get('/profile/upcoming')).status_code == 403
+    assert (await client.get('/profile/upcoming', headers={'X-Admin-Token': 'wrong'})).status_code == 403
+
+    response = await client.get('/profile/upcoming?within_days=1', headers={'X-Admin-Token': ADMIN_TOKEN})
+    assert response.status_code == 200
+    assert [user['user_id'] for user in response.json()['users']] == [1]
+    assert response.json()['users'][0]['days_left'] == 1
+
+
+async def test_upcoming_is_disabled_without_admin_token(client, monkeypatch):
+    from core.config import settings
+
+    monkeypatch.setattr(settings, 'admin_token', None)
+    assert (await client.get('/profile/upcoming', headers={'X-Admin-Token': ADMIN_TOKEN})).status_code == 404
+
+
+async def test_profile_is_public(client):
+    await create_user(client, 2, date(1990, 5, 17))
+    response = await client.get('/profile/2')
+    assert response.status_code == 200
+    assert response.json()['user']['user_id'] == 2
+
+
+class FrozenDatetime(datetime):
+    """datetime с постоянным now(): ETag профиля зависит от минут до дня рождения."""
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2024, 3, 1, 12, 0, 0)
+
+
+@pytest.mark.parametrize('path', ['/user/user_data/3', '/profile/3'])
+async def test_conditional_get_by_etag(client, monkeypatch, path):
+    monkeypatch.setattr(routes.profile, 'datetime', FrozenDatetime)
+    await create_user(client, 3, date(1990, 5, 17))
+
+    response = await client.get(path)
+    assert response.status_code == 200
+    etag = response.headers['etag']
+    assert response.headers['cache-control'] == CACHE_CONTROL_REVALIDATE
+
+    not_modified = await client.get(path, headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b''
+    assert not_modified.headers['etag'] == etag
+    assert not_modified.headers['cache-control'] == CACHE_CONTROL_REVALIDATE
+
+    # Новая дата рождения увеличивает версию строки, и прежний ETag больше не совпадает
+    response = await client.post('/user/save_birthdate/', json={'user_id': 3, 'birthdate': '1991-06-18'})
+    assert response.status_code == 200
+    changed = await client.get(path, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['etag'] != etag
+    assert '1991-06-18' in changed.text
+
+
+async def test_writes_mark_client_for_cache_bypass(client):
+    response = await client.post('/user/user_data/', json={'user_id': 4, 'first_name': 'User'})
+    assert RECENT_WRITE_COOKIE in response.cookies
+    response = await client.post('/user/save_birthdate/', json={'user_id': 4, 'birthdate': '1990-05-17'})
+    assert RECENT_WRITE_COOKIE in response.cookies
@@ -0,0 +1,38 @@
+"""Тесты семплирующего профилировщика."""
+from pathlib import Path
+
+import pytest
+from utils.profiler import profile
+
+pytestmark = pytest.mark.anyio
+
+BACKEND_PROFILER = Path(__file__).resolve().parent.parent / 'utils' / 'profiler.py'
+BOT_PROFILER = Path(__file__).resolve().parents[2] / 'bot' / 'utils' / 'profiler.py'
+
+
+async def test_profile_saves_collapsed_stacks(tmp_path):
+    path, collapsed = await profile(0.05, 0.005, str(tmp_path), 'test')
+
+    assert Path(path).read_text() == collapsed
+    # Пока профилировщик ждёт, цикл событий простаивает в ожидании событий
+    stack, count = collapsed.splitlines()[0].rsplit(' ', 1)
+    assert 'asyncio' in stack and int(count) > 0
+
+
+async def test_concurrent_profile_is_rejected(tmp_path):
+    import anyio
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(profile, 0.05, 0.005, str(tmp_path), 'test')
+        await anyio.sleep(0.01)
+        with pytest.raises(RuntimeError):
+            await profile(0.05, 0.005, str(tmp_path), 'test')
+
+
+def test_bot_copy_matches_backend():
+    if not BOT_PROFILER.exists():
+        pytest.skip('bot sources are not available')
+    bot_source = BOT_PROFILER.read_text(encoding='utf-8')
+
+    assert bot_source.startswith('#')
+    assert bot_source.split('\n', 2)[2] == BACKEND_PROFILER.read_text(encoding='utf-8')
@@ -0,0 +1,88 @@
+"""Тесты маршрутизации чтений между основной базой и репликой на двух файлах SQLite."""
+import asyncio
+
+import db.crud
+import pytest
+from db.routing import PRIMARY_CONNECTION, ReadRouter
+from models.user import User
+from tortoise import Tortoise, connections
+from tortoise.exceptions import DBConnectionError
+from tortoise.utils import get_schema_sql
+from utils.cache import MemoryCache
+
+pytestmark = pytest.mark.anyio
+
+REPLICA = 'replica_0'
+PIN_WINDOW = 0.1
+
+
+@pytest.fixture
+async def databases(tmp_path):
+    """Создаёт основную базу и реплику с разными данными одного пользователя.
+
+    На основной базе пользователь называется primary, на реплике — replica.
+    """
+    await Tortoise.init(config={
+        'connections': {
+            PRIMARY_CONNECTION: 'sqlite://{0}'.format(tmp_path / 'default.db'),
+            REPLICA: 'sqlite://{0}'.format(tmp_path / 'replica_0.db'),
+        },
+        'apps': {'models': {'models': ['models.user'], 'default_connection': PRIMARY_CONNECTION}},
+    })
+    try:
+        primary = connections.get(PRIMARY_CONNECTION)
+        replica = connections.get(REPLICA)
+        await Tortoise.generate_schemas()
+        await replica.execute_script(get_schema_sql(primary, safe=True))
+        await User.create(user_id=1, first_name='primary', using_db=primary)
+        await User.create(user_id=1, first_name='replica', using_db=replica)
+        yield
+    finally:
+        await Tortoise.close_connections()
+
+
+@pytest.fixture
+def router(databases, monkeypatch) -> ReadRouter:
+    """Подменяет маршрутизатор и кэш crud на маршрутизатор с репликой и пустой кэш."""
+    read_router = ReadRouter([REPLICA], pin_window=PIN_WINDOW, retry_interval=60)
+    monkeypatch.setattr(db.crud, 'read_router', read_router)
+    monkeypatch.setattr(db.crud, 'user_cache', MemoryCache(10, 60, write_hold=PIN_WINDOW))
+    return read_router
+
+
+async def read_first_name(read_router: ReadRouter) -> str:
+    user = await read_router.read(lambda client: db.crud.user_profile_query(1, client), 1)
+    return user['first_name']
+
+
+async def test_pinned_read_goes_to_primary_until_pin_expires(router):
+    assert await read_first_name(router) == 'replica'
+    router.pin(1)
+    assert await read_first_name(router) == 'primary'
+    await asyncio.sleep(PIN_WINDOW + 0.05)
+    assert await read_first_name(router) == 'replica'
+    assert (router.replica_reads, router.primary_reads) == (2, 1)
+
+
+async def test_replica_error_fails_over_to_primary(router):
+    async def query(client):
+        if client is connections.get(REPLICA):
+            raise DBConnectionError('replica is down')
+        return await db.crud.user_profile_query(1, client)
+
+    assert (await router.read(query, 1))['first_name'] == 'primary'
+    # Недоступная реплика пропускается до истечения retry_interval
+    assert await read_first_name(router) == 'primary'
+    assert router.failovers == 1
+    assert router.stats()['replicas'] == {REPLICA: False}
+
+
+async def test_replica_read_is_not_cached_after_write(router):
+    await db.crud._invalidate_user(1)
+    # Другой процесс без закрепления читает с реплики в окне после записи
+    router._pinned.clear()
+    assert (await db.crud.get_user_profile(1))['first_name'] == 'replica'
+    assert await db.crud.user_cache.get(1) is None
+    await asyncio.sleep(PIN_WINDOW + 0.05)
+    await db.crud.get_user_profile(1)
+    assert await db.crud.user_cache.get(1) is not None
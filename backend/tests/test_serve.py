@@ -0,0 +1,35 @@
+"""Тесты проверки запуска бекенда в нескольких процессах."""
+import pytest
+import serve
+from core.config import settings
+
+
+@pytest.fixture
+def shared_state(monkeypatch):
+    """Настраивает общий кэш и общие лимиты в Redis и четыре рабочих процесса."""
+    monkeypatch.setattr(settings, 'web_workers', 4)
+    monkeypatch.setattr(settings, 'cache_backend', 'memory')
+    monkeypatch.setattr(settings, 'cache_redis_url', 'redis://cache')
+    monkeypatch.setattr(settings, 'admission_enabled', True)
+    monkeypatch.setattr(settings, 'user_write_rate', 5.0)
+    monkeypatch.setattr(settings, 'rate_limit_redis_url', 'redis://limits')
+
+
+def test_workers_with_shared_state_are_allowed(shared_state):
+    assert settings.process_local_state() == []
+    serve.check_workers()
+
+
+@pytest.mark.parametrize('name', ['cache_redis_url', 'rate_limit_redis_url'])
+def test_workers_with_process_local_state_are_refused(shared_state, monkeypatch, name):
+    monkeypatch.setattr(settings, name, None)
+
+    with pytest.raises(RuntimeError, match='WEB_WORKERS=4'):
+        serve.check_workers()
+
+
+def test_single_worker_is_always_allowed(shared_state, monkeypatch):
+    monkeypatch.setattr(settings, 'web_workers', 1)
+    monkeypatch.setattr(settings, 'cache_redis_url', None)
+
+    serve.check_workers()
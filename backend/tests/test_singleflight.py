@@ -0,0 +1,96 @@
+"""Тесты объединения одновременных одинаковых запросов."""
+import asyncio
+
+import pytest
+from utils.singleflight import SingleFlight
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_calls_share_one_request():
+    flights, started = SingleFlight(), []
+
+    async def load():
+        started.append(1)
+        await asyncio.sleep(0.01)
+        return 'user'
+
+    results = await asyncio.gather(*(flights.do('key', load) for _ in range(5)))
+
+    assert results == ['user'] * 5
+    assert (len(started), flights.executed, flights.shared, len(flights)) == (1, 1, 4, 0)
+
+
+async def test_error_is_propagated_to_all_waiters():
+    flights = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise ValueError('database error')
+
+    results = await asyncio.gather(*(flights.do('key', load) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(flights) == 0
+
+
+async def test_cancelled_waiter_does_not_cancel_others():
+    flights, release = SingleFlight(), asyncio.Event()
+
+    async def load():
+        await release.wait()
+        return 'user'
+
+    first = asyncio.ensure_future(flights.do('key', load))
+    second = asyncio.ensure_future(flights.do('key', load))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await second == 'user'
+    assert first.cancelled()
+
+
+async def test_last_cancelled_waiter_cancels_request_and_frees_key():
+    flights, cancelled = SingleFlight(), asyncio.Event()
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def fast():
+        return 'user'
+
+    waiter = asyncio.ensure_future(flights.do('key', slow))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    await asyncio.sleep(0)
+
+    # Новый вызов сразу после отмены запускает новый запрос, а не ждёт отменяемый
+    assert len(flights) == 0
+    assert await flights.do('key', fast) == 'user'
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert flights.executed == 2
+
+
+async def test_forget_starts_new_request_for_new_calls():
+    flights, release = SingleFlight(), asyncio.Event()
+    versions = iter(('old', 'new'))
+
+    async def load():
+        version = next(versions)
+        if version == 'old':
+            await release.wait()
+        return version
+
+    old = asyncio.ensure_future(flights.do('key', load))
+    await asyncio.sleep(0)
+    flights.forget('key')
+
+    assert await flights.do('key', load) == 'new'
+    release.set()
+    assert await old == 'old'
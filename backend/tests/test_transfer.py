@@ -0,0 +1,104 @@
+"""Тесты выгрузки и загрузки таблицы users на SQLite."""
+import io
+from datetime import date
+
+import db.transfer
+import pytest
+from db.transfer import import_users
+from models.user import User
+from tests.conftest import ADMIN_TOKEN
+
+pytestmark = pytest.mark.anyio
+
+USERS = [
+    {'user_id': 401, 'first_name': 'Ann', 'last_name': 'Lee', 'username': 'ann', 'photo': None},
+    {'user_id': 402, 'first_name': 'Bob', 'last_name': '', 'username': None, 'photo': 'https://t.me/i/bob.jpg'},
+    {'user_id': 403, 'first_name': 'Кира, "К"', 'last_name': None, 'username': 'kira', 'photo': None},
+    {'user_id': 404, 'first_name': 'Dan', 'last_name': None, 'username': None, 'photo': None},
+    {'user_id': 405, 'first_name': 'Eve', 'last_name': None, 'username': 'eve', 'photo': None},
+]
+
+
+async def table_rows() -> list:
+    """Возвращает все строки таблицы users в порядке user_id."""
+    return await User.all().order_by('user_id').values()
+
+
+@pytest.fixture
+async def users(client, monkeypatch):
+    """Создаёт пользователей и уменьшает порцию выгрузки, чтобы выгрузка шла в несколько страниц."""
+    monkeypatch.setattr(db.transfer, 'EXPORT_FETCH_SIZE', 2)
+    for user in USERS:
+        assert (await client.post('/user/user_data/', json=user)).status_code == 200
+    for user_id, birthdate in ((401, date(2000, 2, 29)), (403, date(1990, 12, 31))):
+        response = await client.post(
+            '/user/save_birthdate/', json={'user_id': user_id, 'birthdate': birthdate.isoformat()},
+        )
+        assert response.status_code == 200
+    return await table_rows()
+
+
+async def export(client, export_format: str) -> io.StringIO:
+    """Выгружает пользователей через маршрут и возвращает файл выгрузки."""
+    response = await client.get(
+        '/user/export', params={'format': export_format}, headers={'X-Admin-Token': ADMIN_TOKEN},
+    )
+    assert response.status_code == 200
+    return io.StringIO(response.text, newline='')
+
+
+async def test_export_requires_admin_token(client):
+    assert (await client.get('/user/export')).status_code == 403
+
+
+async def test_ndjson_round_trip(client, users):
+    dump = await export(client, 'ndjson')
+    assert len(dump.getvalue().splitlines()) == len(USERS)
+    await User.all().delete()
+
+    assert await import_users(None, dump, 'ndjson', chunk_size=2) == len(USERS)
+    assert await table_rows() == users
+
+
+async def test_csv_round_trip_reads_empty_fields_as_null(client, users):
+    dump = await export(client, 'csv')
+    await User.all().delete()
+
+    assert await import_users(None, dump, 'csv', chunk_size=2) == len(USERS)
+    expected = [{**user, 'last_name': user['last_name'] or None} for user in users]
+    assert await table_rows() == expected
+
+
+async def test_resume_from_offset_does_not_duplicate_rows(client, users, monkeypatch):
+    dump = (await export(client, 'ndjson')).getvalue()
+    await User.all().delete()
+    write_chunk = db.transfer.import_chunk_orm
+    chunks = []
+
+    async def fail_on_second_chunk(rows):
+        chunks.append(rows)
+        if len(chunks) == 2:
+            raise RuntimeError('connection lost')
+        await write_chunk(rows)
+
+    monkeypatch.setattr(db.transfer, 'import_chunk_orm', fail_on_second_chunk)
+    with pytest.raises(RuntimeError):
+        await import_users(None, io.StringIO(dump), 'ndjson', chunk_size=2)
+    assert [row['user_id'] for row in await table_rows()] == [401, 402]
+
+    # Продолжение с более раннего смещения повторно загружает уже записанные строки
+    monkeypatch.setattr(db.transfer, 'import_chunk_orm', write_chunk)
+    assert await import_users(None, io.StringIO(dump), 'ndjson', offset=1, chunk_size=2) == len(USERS)
+    assert await table_rows() == users
+
+
+async def test_import_updates_changed_users_only(client, users):
+    dump = (await export(client, 'ndjson')).getvalue()
+    await User.filter(user_id=401).update(first_name='Renamed')
+
+    await import_users(None, io.StringIO(dump), 'ndjson')
+
+    rows = {row['user_id']: row for row in await table_rows()}
+    assert rows[401]['first_name'] == 'Ann'
+    assert rows[401]['version'] == users[0]['version'] + 1
+    assert [rows[user['user_id']]['version'] for user in users[1:]] == [user['version'] for user in users[1:]]
@@ -0,0 +1,95 @@
+"""Тесты маршрутов пользователей."""
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def register(client, user_id: int, username: str = None) -> None:
+    """Регистрирует пользователя с юзернеймом."""
+    response = await client.post(
+        '/user/user_data/', json={'user_id': user_id, 'first_name': 'User', 'username': username},
+    )
+    assert response.status_code == 200
+
+
+async def test_start_without_target_registers_user(client):
+    response = await client.post('/user/start', json={'user': {'user_id': 301, 'first_name': 'Ann'}})
+
+    assert response.status_code == 200
+    assert response.json() == {'message': 'User created', 'target': None}
+    assert (await client.get('/user/user_data/301')).json()['first_name'] == 'Ann'
+
+
+async def test_start_with_target_id(client):
+    await register(client, 302, 'target_by_id')
+
+    response = await client.post(
+        '/user/start', json={'user': {'user_id': 303, 'first_name': 'Ann'}, 'target_id': 302},
+    )
+
+    assert response.json()['message'] == 'User created'
+    assert response.json()['target']['username'] == 'target_by_id'
+
+
+async def test_start_with_target_username_strips_at(client):
+    await register(client, 304, 'Target_By_Name')
+
+    response = await client.post(
+        '/user/start', json={'user': {'user_id': 305, 'first_name': 'Ann'}, 'target_username': '@target_by_name'},
+    )
+
+    assert response.json()['target']['user_id'] == 304
+
+
+async def test_start_with_own_username_returns_fresh_profile(client):
+    await register(client, 306, 'own_name')
+
+    response = await client.post('/user/start', json={
+        'user': {'user_id': 306, 'first_name': 'Renamed', 'username': 'own_name'},
+        'target_username': '@OWN_NAME',
+    })
+
+    assert response.json()['message'] == 'User already created'
+    assert response.json()['target']['first_name'] == 'Renamed'
+
+
+@pytest.mark.parametrize('target', [{'target_id': 399999}, {'target_username': '@nobody_here'}])
+async def test_start_with_unknown_target(client, target):
+    response = await client.post('/user/start', json={'user': {'user_id': 307, 'first_name': 'Ann'}, **target})
+
+    assert response.status_code == 200
+    assert response.json()['target'] is None
+
+
+async def test_by_username_is_case_insensitive_exact_match(client):
+    await register(client, 311, 'Exact_Name')
+    await register(client, 312, 'exact_name_longer')
+
+    response = await client.get('/user/by_username/EXACT_name')
+
+    assert response.status_code == 200
+    assert response.json()['user_id'] == 311
+    assert response.headers['etag']
+    assert (await client.get('/user/by_username/exact')).status_code == 404
+
+
+async def test_search_by_prefix(client):
+    for user_id, username in ((321, 'prefix_b'), (322, 'Prefix_A'), (323, 'other_prefix')):
+        await register(client, user_id, username)
+
+    response = await client.get('/user/search', params={'prefix': 'PREFIX'})
+
+    assert response.status_code == 200
+    assert [user['username'] for user in response.json()['users']] == ['Prefix_A', 'prefix_b']
+    response = await client.get('/user/search', params={'prefix': 'prefix', 'limit': 1})
+    assert [user['user_id'] for user in response.json()['users']] == [322]
+
+
+@pytest.mark.parametrize('prefix, expected', [('like_', ['like_x']), ('like%', ['like%x'])])
+async def test_search_treats_like_metacharacters_literally(client, prefix, expected):
+    for user_id, username in ((331, 'like_x'), (332, 'likeax'), (333, 'like%x'), (334, 'likebbx')):
+        await register(client, user_id, username)
+
+    response = await client.get('/user/search', params={'prefix': prefix})
+
+    assert [user['username'] for user in response.json()['users']] == expected
@@ -0,0 +1,409 @@
+"""Модуль ограничения запросов к маршрутам записи.
+
+Запросы записи пользователя ограничиваются токен-бакетом по user_id из тела
+запроса: USER_WRITE_BURST запросов подряд, затем USER_WRITE_RATE в секунду.
+Сверх лимита запрос сразу отклоняется с кодом 429 и заголовком Retry-After.
+Кроме того, в процессе одновременно обрабатывается не более
+MAX_CONCURRENT_WRITES запросов записи: остальные отклоняются с кодом 503,
+а не ждут свободного соединения с базой данных, поэтому всплеск записей
+не занимает весь пул и не замедляет чтения.
+
+Бакеты хранятся в памяти процесса без блокировок: проверка выполняется
+синхронно в цикле событий. В памяти лимит действует в каждом процессе
+отдельно; если задан RATE_LIMIT_REDIS_URL, бакеты хранятся в Redis и лимит
+общий для всех процессов. Ограничение одновременных запросов всегда
+действует в пределах процесса.
+"""
+import math
+import re
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+import orjson
+from core.config import logger, settings
+from core.constants import (
+    ADMISSION_RETRY_AFTER,
+    HTTP_SERVICE_UNAVAILABLE,
+    HTTP_TOO_MANY_REQUESTS,
+    RATE_LIMIT_KEY_PREFIX,
+)
+from fastapi.responses import ORJSONResponse
+from utils.cache import _connect_redis
+from utils.metrics import ADMISSION_REJECTIONS
+
+# Маршруты записи и путь к user_id в теле запроса; пустой путь — только ограничение одновременных запросов
+WRITE_ROUTES = {
+    '/user/user_data/': ('user_id',),
+    '/user/save_birthdate/': ('user_id',),
+    '/user/start': ('user', 'user_id'),
+    '/user/user_data/batch': (),
+}
+# Строки, которые модель запроса приводит к int: знак, цифры с подчёркиваниями,
+# нулевая дробная часть и пробелы по краям
+USER_ID_STRING_PATTERN = re.compile(r'\s*([+-]?[0-9](?:_?[0-9])*)(?:\.0+)?\s*')
+REJECT_USER_RATE = 'user_rate'
+REJECT_BUSY = 'busy'
+
+# Токен-бакет в Redis: время берётся на сервере Redis, чтобы процессы не зависели от своих часов
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or burst
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated_at) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class TokenBuckets:
+    """Токен-бакеты по ключу в памяти процесса.
+
+    Бакет хранится как количество токенов и время последнего обновления и
+    пополняется при обращении. Хранится не более maxsize бакетов: давно не
+    использованные вытесняются, что равносильно полному бакету.
+
+    Атрибуты:
+        rate (float): Скорость пополнения в токенах в секунду.
+        burst (int): Ёмкость бакета.
+        maxsize (int): Максимальное количество хранимых бакетов.
+    """
+
+    def __init__(self, rate: float, burst: int, maxsize: int):
+        """Инициализирует бакеты.
+
+        Args:
+            rate (float): Скорость пополнения в токенах в секунду.
+            burst (int): Ёмкость бакета.
+            maxsize (int): Максимальное количество хранимых бакетов.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self._buckets: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        """Возвращает количество хранимых бакетов."""
+        return len(self._buckets)
+
+    async def start(self) -> None:
+        """Подключает бакеты к внешним ресурсам."""
+
+    async def close(self) -> None:
+        """Освобождает ресурсы бакетов."""
+
+    async def take(self, key: Hashable) -> float:
+        """Забирает токен из бакета.
+
+        Args:
+            key (Hashable): Ключ бакета.
+
+        Returns:
+            float: 0, если токен получен, иначе время в секундах до появления токена.
+        """
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / self.rate
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return retry_after
+
+
+class RedisTokenBuckets(TokenBuckets):
+    """Токен-бакеты в Redis, общие для всех процессов.
+
+    Ошибки Redis не прерывают запрос: токен считается полученным.
+    """
+
+    def __init__(self, rate: float, burst: int, redis_url: str):
+        """Инициализирует бакеты.
+
+        Args:
+            rate (float): Скорость пополнения в токенах в секунду.
+            burst (int): Ёмкость бакета.
+            redis_url (str): URL сервера Redis.
+        """
+        super().__init__(rate, burst, maxsize=0)
+        self._redis_url = redis_url
+        self._redis = None
+        self._script = None
+
+    async def start(self) -> None:
+        """Создаёт клиент Redis и регистрирует скрипт бакета."""
+        self._redis = _connect_redis(self._redis_url)
+        self._script = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def close(self) -> None:
+        """Закрывает соединение с Redis."""
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def take(self, key: Hashable) -> float:
+        """Забирает токен из бакета в Redis.
+
+        Args:
+            key (Hashable): Ключ бакета.
+
+        Returns:
+            float: 0, если токен получен или Redis недоступен, иначе время в секундах до появления токена.
+        """
+        try:
+            retry_after = await self._script(
+                keys=['{0}{1}'.format(RATE_LIMIT_KEY_PREFIX, key)], args=[self.rate, self.burst],
+            )
+        except Exception as error:
+            logger.error('Ошибка проверки ограничения запросов: {0}'.format(error))
+            return 0.0
+        return float(retry_after)
+
+
+class AdmissionController:
+    """Допуск запросов записи по лимиту пользователя и количеству одновременных запросов.
+
+    Атрибуты:
+        buckets (TokenBuckets, optional): Бакеты пользователей, None — без ограничения по пользователю.
+        max_concurrent (int): Количество одновременных запросов записи, 0 — без ограничения.
+        in_flight (int): Количество запросов записи в обработке.
+        admitted (int): Количество допущенных запросов.
+        rejected_user_rate (int): Количество запросов, отклонённых по лимиту пользователя.
+        rejected_busy (int): Количество запросов, отклонённых из-за загрузки.
+    """
+
+    def __init__(self, buckets: Optional[TokenBuckets], max_concurrent: int):
+        """Инициализирует контроль допуска.
+
+        Args:
+            buckets (TokenBuckets, optional): Бакеты пользователей.
+            max_concurrent (int): Количество одновременных запросов записи, 0 — без ограничения.
+        """
+        self.buckets = buckets
+        self.max_concurrent = max_concurrent
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected_user_rate = 0
+        self.rejected_busy = 0
+
+    async def start(self) -> None:
+        """Подключает бакеты к внешним ресурсам."""
+        if self.buckets is not None:
+            await self.buckets.start()
+
+    async def close(self) -> None:
+        """Освобождает ресурсы бакетов."""
+        if self.buckets is not None:
+            await self.buckets.close()
+
+    def acquire_slot(self) -> bool:
+        """Занимает место для запроса записи.
+
+        Returns:
+            bool: True, если место занято, False, если достигнут предел одновременных запросов.
+        """
+        if self.max_concurrent and self.in_flight >= self.max_concurrent:
+            self.rejected_busy += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def release_slot(self) -> None:
+        """Освобождает место запроса записи."""
+        self.in_flight -= 1
+
+    async def check_user(self, user_id: Hashable) -> float:
+        """Проверяет лимит запросов записи пользователя.
+
+        Args:
+            user_id (Hashable): Идентификатор пользователя.
+
+        Returns:
+            float: 0, если запрос допущен, иначе время в секундах до следующего допустимого запроса.
+        """
+        if self.buckets is None:
+            return 0.0
+        retry_after = await self.buckets.take(user_id)
+        if retry_after:
+            self.rejected_user_rate += 1
+        return retry_after
+
+    def stats(self) -> dict:
+        """Возвращает состояние контроля допуска.
+
+        Returns:
+            dict: Лимиты, количество запросов в обработке, допущенных и отклонённых запросов.
+        """
+        return {
+            'user_write_rate': self.buckets.rate if self.buckets is not None else None,
+            'max_concurrent': self.max_concurrent,
+            'in_flight': self.in_flight,
+            'admitted': self.admitted,
+            'rejected_user_rate': self.rejected_user_rate,
+            'rejected_busy': self.rejected_busy,
+        }
+
+
+def create_admission_controller() -> AdmissionController:
+    """Создаёт контроль допуска согласно настройкам.
+
+    Returns:
+        AdmissionController: Контроль допуска запросов записи.
+    """
+    buckets = None
+    if settings.user_write_rate > 0:
+        if settings.rate_limit_redis_url:
+            buckets = RedisTokenBuckets(
+                settings.user_write_rate, settings.user_write_burst, settings.rate_limit_redis_url,
+            )
+        else:
+            buckets = TokenBuckets(settings.user_write_rate, settings.user_write_burst, settings.rate_limit_max_users)
+    return AdmissionController(buckets, settings.max_concurrent_writes)
+
+
+admission_controller = create_admission_controller()
+
+
+def _normalize_user_id(value) -> Optional[int]:
+    """Приводит user_id из JSON к int так же, как модель запроса.
+
+    Модель принимает целое число, число с плавающей точкой без дробной части
+    и строку из цифр, поэтому 12345, 12345.0 и "12345" — один пользователь
+    с одним бакетом. Логические значения модель отклоняет.
+
+    Args:
+        value: Значение user_id из тела запроса.
+
+    Returns:
+        Optional[int]: Идентификатор пользователя или None, если модель его не примет.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else None
+    if isinstance(value, str):
+        match = USER_ID_STRING_PATTERN.fullmatch(value)
+        return int(match.group(1)) if match else None
+    return None
+
+
+def _extract_user_id(body: bytes, key_path: Tuple[str, ...]) -> Optional[int]:
+    """Достаёт user_id из JSON-тела запроса.
+
+    Args:
+        body (bytes): Тело запроса.
+        key_path (Tuple[str, ...]): Путь к user_id в теле запроса.
+
+    Returns:
+        Optional[int]: Идентификатор пользователя или None, если тело некорректно:
+        такой запрос отклонит валидация FastAPI.
+    """
+    try:
+        value = orjson.loads(body)
+        for key in key_path:
+            value = value[key]
+    except (orjson.JSONDecodeError, KeyError, TypeError, IndexError):
+        return None
+    return _normalize_user_id(value)
+
+
+class AdmissionMiddleware:
+    """ASGI middleware, отклоняющее запросы записи сверх лимитов admission_controller.
+
+    Предел одновременных запросов проверяется до чтения тела, лимит пользователя —
+    после: тело читается целиком и передаётся приложению без изменений.
+    """
+
+    def __init__(self, app):
+        """Инициализирует middleware.
+
+        Args:
+            app: Следующее ASGI-приложение.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        """Допускает или отклоняет запрос записи."""
+        if scope['type'] != 'http' or scope['method'] != 'POST' or scope['path'] not in WRITE_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        controller = admission_controller
+        if not controller.acquire_slot():
+            ADMISSION_REJECTIONS.labels(scope['path'], REJECT_BUSY).inc()
+            await self._reject(
+                scope, receive, send, HTTP_SERVICE_UNAVAILABLE, 'Service Unavailable', ADMISSION_RETRY_AFTER,
+            )
+            return
+        try:
+            key_path = WRITE_ROUTES[scope['path']]
+            if key_path and controller.buckets is not None:
+                messages = []
+                while True:
+                    message = await receive()
+                    messages.append(message)
+                    if message['type'] != 'http.request' or not message.get('more_body', False):
+                        break
+                user_id = _extract_user_id(b''.join(message.get('body', b'') for message in messages), key_path)
+                retry_after = await controller.check_user(user_id) if user_id is not None else 0.0
+                if retry_after:
+                    ADMISSION_REJECTIONS.labels(scope['path'], REJECT_USER_RATE).inc()
+                    await self._reject(scope, receive, send, HTTP_TOO_MANY_REQUESTS, 'Too Many Requests', retry_after)
+                    return
+                receive = self._replay(messages, receive)
+            controller.admitted += 1
+            await self.app(scope, receive, send)
+        finally:
+            controller.release_slot()
+
+    @staticmethod
+    def _replay(messages: list, receive):
+        """Возвращает receive, который сначала отдаёт уже прочитанные сообщения.
+
+        Args:
+            messages (list): Прочитанные сообщения запроса.
+            receive: Исходный receive.
+
+        Returns:
+            Callable: Функция receive для приложения.
+        """
+        pending = iter(messages)
+
+        async def replay_receive():
+            message = next(pending, None)
+            if message is None:
+                return await receive()
+            return message
+
+        return replay_receive
+
+    @staticmethod
+    async def _reject(scope, receive, send, status_code: int, detail: str, retry_after: float) -> None:
+        """Отправляет отказ с заголовком Retry-After.
+
+        Args:
+            status_code (int): Код ответа.
+            detail (str): Описание ошибки.
+            retry_after (float): Время в секундах до повторной попытки.
+        """
+        response = ORJSONResponse(
+            {'detail': detail}, status_code=status_code, headers={'Retry-After': str(max(math.ceil(retry_after), 1))},
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,122 @@
+"""Модуль для объединения одиночных операций в пакеты."""
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+from core.config import logger
+
+
+class MicroBatcher:
+    """Собирает одиночные вызовы в пакеты за короткое окно времени.
+
+    Пакет обрабатывается, когда истекает окно ожидания или набирается
+    максимальное количество элементов. Каждый вызывающий получает результат
+    для своего элемента. Если обработка пакета завершилась ошибкой и задан
+    fallback, элементы пакета обрабатываются по одному, и ошибку получает только
+    вызывающий с неподходящим элементом; без fallback ошибка пакета передаётся
+    всем вызывающим.
+
+    Атрибуты:
+        handler (Callable): Корутина, обрабатывающая список элементов и возвращающая список результатов.
+        max_size (int): Максимальный размер пакета.
+        max_delay (float): Максимальное время ожидания пакета в секундах.
+        fallback (Optional[Callable]): Корутина, обрабатывающая один элемент после ошибки пакета.
+        fallbacks (int): Количество пакетов, обработанных по одному элементу.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_size: int,
+        max_delay: float,
+        fallback: Optional[Callable[[Any], Awaitable[Any]]] = None,
+    ):
+        """Инициализирует сборщик пакетов.
+
+        Args:
+            handler (Callable): Корутина, обрабатывающая список элементов и возвращающая список результатов.
+            max_size (int): Максимальный размер пакета.
+            max_delay (float): Максимальное время ожидания пакета в секундах.
+            fallback (Optional[Callable]): Корутина, обрабатывающая один элемент после ошибки пакета.
+        """
+        self.handler = handler
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self.fallback = fallback
+        self.fallbacks = 0
+        self._pending: List[tuple] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any) -> Any:
+        """Добавляет элемент в текущий пакет и ожидает результат его обработки.
+
+        Args:
+            item (Any): Элемент для обработки.
+
+        Returns:
+            Any: Результат обработки элемента.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+        if len(self._pending) >= self.max_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        """Отправляет накопленные элементы на обработку."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._process(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, batch: List[tuple]) -> None:
+        """Обрабатывает пакет и передаёт результаты ожидающим вызовам.
+
+        Args:
+            batch (List[tuple]): Пары из элемента и future для его результата.
+        """
+        try:
+            results = await self.handler([item for item, _ in batch])
+        except Exception as error:
+            if self.fallback is None or len(batch) == 1:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                return
+            self.fallbacks += 1
+            logger.warning('Ошибка обработки пакета из {0} элементов, обработка по одному: {1}'.format(len(batch), error))
+            await asyncio.gather(*(self._process_one(item, future) for item, future in batch))
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _process_one(self, item: Any, future: asyncio.Future) -> None:
+        """Обрабатывает один элемент пакета через fallback и передаёт результат ожидающему вызову.
+
+        Args:
+            item (Any): Элемент для обработки.
+            future (asyncio.Future): Future для результата элемента.
+        """
+        try:
+            result = await self.fallback(item)
+        except Exception as error:
+            if not future.done():
+                future.set_exception(error)
+            return
+        if not future.done():
+            future.set_result(result)
+
+    async def close(self) -> None:
+        """Обрабатывает оставшиеся элементы и дожидается завершения всех пакетов."""
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,593 @@
+"""Модуль для кэширования данных пользователей.
+
+Модуль предоставляет LRU-кэш с ограниченным временем жизни записей и
+асинхронные бэкенды кэша: кэш в памяти процесса и общий кэш в Redis.
+Кэш в памяти может подписываться на канал Redis, чтобы получать
+инвалидации от других процессов бэкенда.
+
+Каждое удаление записи увеличивает поколение ключа. Чтение из базы запоминает
+поколение до запроса и передаёт его в set: если за время чтения запись была
+удалена после изменения данных, прочитанное значение устарело и не кэшируется.
+
+При чтении с реплик удалённая после записи запись не кэшируется ещё
+READ_YOUR_WRITES_WINDOW секунд: закрепление за основной базой действует только
+в записавшем процессе, а остальные процессы в это время могут прочитать
+с отстающей реплики старые данные.
+"""
+import asyncio
+import itertools
+import json
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Hashable, Iterable, Optional
+
+from core.config import logger, settings
+from core.constants import (
+    CACHE_BACKEND_MEMORY,
+    CACHE_BACKEND_NONE,
+    CACHE_BACKEND_REDIS,
+    CACHE_GENERATION_KEY_PREFIX,
+    CACHE_HOLD_KEY_PREFIX,
+    CACHE_INVALIDATION_CHANNEL,
+    CACHE_KEY_PREFIX,
+    CACHE_RECONNECT_MAX_DELAY,
+    CACHE_RECONNECT_MIN_DELAY,
+)
+
+# Запись сохраняется, только если поколение ключа не изменилось (пустое ARGV[3] —
+# без проверки) и после удаления не действует запрет кэширования
+CACHE_SET_SCRIPT = """
+if ARGV[3] ~= '' and (redis.call('GET', KEYS[3]) or '0') ~= ARGV[3] then
+    return
+end
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+end
+"""
+
+
+class TTLCache:
+    """LRU-кэш с ограниченным размером и временем жизни записей.
+
+    Атрибуты:
+        maxsize (int): Максимальное количество записей в кэше.
+        ttl (float): Время жизни записи в секундах.
+        hits (int): Количество попаданий в кэш.
+        misses (int): Количество промахов кэша.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """Инициализирует кэш.
+
+        Args:
+            maxsize (int): Максимальное количество записей в кэше.
+            ttl (float): Время жизни записи в секундах.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        """Возвращает количество записей в кэше."""
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Возвращает значение из кэша, если оно есть и не устарело.
+
+        Args:
+            key (Hashable): Ключ записи.
+
+        Returns:
+            Optional[Any]: Значение из кэша или None при промахе.
+        """
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Сохраняет значение в кэш, вытесняя самые старые записи при переполнении.
+
+        Args:
+            key (Hashable): Ключ записи.
+            value (Any): Значение для сохранения.
+        """
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Удаляет запись из кэша.
+
+        Args:
+            key (Hashable): Ключ записи.
+        """
+        self._data.pop(key, None)
+
+    def clear(self, reset_stats: bool = True) -> None:
+        """Очищает кэш.
+
+        Args:
+            reset_stats (bool): Сбросить ли счётчики попаданий и промахов.
+        """
+        self._data.clear()
+        if reset_stats:
+            self.hits = 0
+            self.misses = 0
+
+
+def _encode(value: Any) -> str:
+    """Сериализует значение кэша в JSON, сохраняя даты.
+
+    Args:
+        value (Any): Значение для сериализации.
+
+    Returns:
+        str: JSON-строка.
+    """
+    def default(obj):
+        if isinstance(obj, date):
+            return {'__date__': obj.isoformat()}
+        raise TypeError('Object of type {0} is not JSON serializable'.format(type(obj).__name__))
+
+    return json.dumps(value, default=default)
+
+
+def _decode(raw: str) -> Any:
+    """Восстанавливает значение кэша из JSON.
+
+    Args:
+        raw (str): JSON-строка.
+
+    Returns:
+        Any: Значение кэша.
+    """
+    def object_hook(obj):
+        if '__date__' in obj:
+            return date.fromisoformat(obj['__date__'])
+        return obj
+
+    return json.loads(raw, object_hook=object_hook)
+
+
+def _connect_redis(url: str):
+    """Создаёт клиент Redis.
+
+    Args:
+        url (str): URL сервера Redis.
+
+    Returns:
+        Redis: Асинхронный клиент Redis.
+    """
+    from redis import asyncio as aioredis
+
+    return aioredis.from_url(url, decode_responses=True)
+
+
+class CacheBackend:
+    """Базовый асинхронный бэкенд кэша, который ничего не хранит.
+
+    Используется, когда кэширование отключено (CACHE_BACKEND=none).
+
+    Атрибуты:
+        hits (int): Количество попаданий в кэш.
+        misses (int): Количество промахов кэша.
+    """
+
+    name = CACHE_BACKEND_NONE
+
+    def __init__(self):
+        """Инициализирует счётчики кэша."""
+        self.hits = 0
+        self.misses = 0
+
+    async def start(self) -> None:
+        """Подключает кэш к внешним ресурсам."""
+
+    async def close(self) -> None:
+        """Освобождает ресурсы кэша."""
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        """Возвращает значение из кэша.
+
+        Args:
+            key (Hashable): Ключ записи.
+
+        Returns:
+            Optional[Any]: Значение из кэша или None при промахе.
+        """
+        self.misses += 1
+        return None
+
+    async def generation(self, key: Hashable) -> Optional[Any]:
+        """Возвращает поколение ключа, которое увеличивается при каждом удалении записи.
+
+        Args:
+            key (Hashable): Ключ записи.
+
+        Returns:
+            Optional[Any]: Поколение ключа для передачи в set или None, если кэш ничего не хранит.
+        """
+        return None
+
+    async def set(self, key: Hashable, value: Any, generation: Optional[Any] = None) -> None:
+        """Сохраняет значение в кэш.
+
+        Args:
+            key (Hashable): Ключ записи.
+            value (Any): Значение для сохранения.
+            generation (Any, optional): Поколение ключа до чтения значения; если с тех пор
+                запись удалялась, значение не сохраняется.
+        """
+
+    async def delete(self, key: Hashable) -> None:
+        """Удаляет запись из кэша во всех процессах.
+
+        Args:
+            key (Hashable): Ключ записи.
+        """
+        await self.delete_many((key,))
+
+    async def delete_many(self, keys: Iterable[Hashable]) -> None:
+        """Удаляет несколько записей из кэша во всех процессах.
+
+        Args:
+            keys (Iterable[Hashable]): Ключи записей.
+        """
+
+    def stats(self) -> dict:
+        """Возвращает статистику использования кэша.
+
+        Returns:
+            dict: Бэкенд кэша, количество попаданий и промахов, доля попаданий.
+        """
+        total = self.hits + self.misses
+        return {
+            'backend': self.name,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+
+class MemoryCache(CacheBackend):
+    """Кэш в памяти процесса.
+
+    Если указан URL Redis, удаление записи публикуется в канал инвалидации,
+    а фоновая задача удаляет записи, инвалидированные другими процессами.
+    Удалённая запись, в том числе другим процессом, не кэшируется write_hold секунд.
+    """
+
+    name = CACHE_BACKEND_MEMORY
+
+    def __init__(self, maxsize: int, ttl: float, redis_url: Optional[str] = None, write_hold: float = 0):
+        """Инициализирует кэш.
+
+        Args:
+            maxsize (int): Максимальное количество записей в кэше.
+            ttl (float): Время жизни записи в секундах.
+            redis_url (str, optional): URL Redis для межпроцессной инвалидации.
+            write_hold (float): Время в секундах после удаления записи, в течение которого она не кэшируется.
+        """
+        super().__init__()
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._held = TTLCache(maxsize=maxsize, ttl=write_hold) if write_hold > 0 else None
+        # Поколения нужны, пока идёт чтение, поэтому хранятся не дольше записей
+        self._generations = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._next_generation = itertools.count(1)
+        self._redis_url = redis_url
+        self._redis = None
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        """Подписывается на канал инвалидации, если задан URL Redis."""
+        if self._redis_url:
+            self._redis = _connect_redis(self._redis_url)
+            pubsub = self._redis.pubsub()
+            await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def close(self) -> None:
+        """Останавливает подписку и закрывает соединение с Redis."""
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def _listen(self, pubsub) -> None:
+        """Удаляет из кэша записи, инвалидированные другими процессами.
+
+        При потере соединения с Redis подписка восстанавливается с экспоненциальной
+        задержкой от CACHE_RECONNECT_MIN_DELAY до CACHE_RECONNECT_MAX_DELAY секунд.
+        Инвалидации, отправленные без подписки, потеряны, поэтому после
+        восстановления кэш процесса очищается.
+
+        Args:
+            pubsub (PubSub): Подписка на канал инвалидации.
+        """
+        delay = CACHE_RECONNECT_MIN_DELAY
+        while True:
+            try:
+                async for message in pubsub.listen():
+                    delay = CACHE_RECONNECT_MIN_DELAY
+                    if message['type'] == 'message':
+                        self._invalidate(message['data'])
+                logger.error('Подписка на инвалидацию кэша завершилась')
+            except Exception as error:
+                logger.error('Потеряна подписка на инвалидацию кэша: {0}'.format(error))
+            finally:
+                await pubsub.aclose()
+            pubsub = await self._resubscribe(delay)
+            delay = CACHE_RECONNECT_MIN_DELAY
+            self._cache.clear(reset_stats=False)
+            logger.info('Подписка на инвалидацию кэша восстановлена, кэш процесса очищен')
+
+    async def _resubscribe(self, delay: float):
+        """Подписывается на канал инвалидации заново, пока это не удастся.
+
+        Args:
+            delay (float): Задержка перед первой попыткой в секундах.
+
+        Returns:
+            PubSub: Новая подписка на канал инвалидации.
+        """
+        while True:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, CACHE_RECONNECT_MAX_DELAY)
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+            except Exception as error:
+                await pubsub.aclose()
+                logger.error('Ошибка подписки на инвалидацию кэша: {0}'.format(error))
+                continue
+            return pubsub
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        """Возвращает значение из кэша.
+
+        Args:
+            key (Hashable): Ключ записи.
+
+        Returns:
+            Optional[Any]: Значение из кэша или None при промахе.
+        """
+        return self._cache.get(str(key))
+
+    async def generation(self, key: Hashable) -> int:
+        """Возвращает поколение ключа, которое увеличивается при каждом удалении записи.
+
+        Args:
+            key (Hashable): Ключ записи.
+
+        Returns:
+            int: Поколение ключа, 0 — запись не удалялась.
+        """
+        return self._generations.get(str(key)) or 0
+
+    async def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        """Сохраняет значение в кэш, если запись не удалялась после чтения и недавно.
+
+        Args:
+            key (Hashable): Ключ записи.
+            value (Any): Значение для сохранения.
+            generation (int, optional): Поколение ключа до чтения значения.
+        """
+        key = str(key)
+        if generation is not None and (self._generations.get(key) or 0) != generation:
+            return
+        if self._held is not None and self._held.get(key) is not None:
+            return
+        self._cache.set(key, value)
+
+    def _invalidate(self, key: str) -> None:
+        """Удаляет запись из кэша процесса, меняет поколение ключа и запрещает кэширование на write_hold секунд.
+
+        Args:
+            key (str): Ключ записи.
+        """
+        self._cache.delete(key)
+        self._generations.set(key, next(self._next_generation))
+        if self._held is not None:
+            self._held.set(key, True)
+
+    async def delete_many(self, keys: Iterable[Hashable]) -> None:
+        """Удаляет записи из кэша и оповещает остальные процессы.
+
+        Инвалидации публикуются в канал одним конвейером Redis.
+
+        Args:
+            keys (Iterable[Hashable]): Ключи записей.
+        """
+        keys = [str(key) for key in keys]
+        for key in keys:
+            self._invalidate(key)
+        if self._redis and keys:
+            try:
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for key in keys:
+                        pipe.publish(CACHE_INVALIDATION_CHANNEL, key)
+                    await pipe.execute()
+            except Exception as error:
+                logger.error('Ошибка публикации инвалидации кэша: {0}'.format(error))
+
+    def stats(self) -> dict:
+        """Возвращает статистику использования кэша.
+
+        Returns:
+            dict: Статистика кэша с текущим и максимальным размером.
+        """
+        self.hits = self._cache.hits
+        self.misses = self._cache.misses
+        stats = super().stats()
+        stats['size'] = len(self._cache)
+        stats['maxsize'] = self._cache.maxsize
+        return stats
+
+
+class RedisCache(CacheBackend):
+    """Общий для всех процессов кэш в Redis.
+
+    Ошибки Redis не прерывают запрос: чтение считается промахом,
+    а запись пропускается. Удалённая запись не кэшируется write_hold секунд:
+    запрет хранится в Redis и действует для всех процессов.
+    """
+
+    name = CACHE_BACKEND_REDIS
+
+    def __init__(self, redis_url: str, ttl: float, write_hold: float = 0):
+        """Инициализирует кэш.
+
+        Args:
+            redis_url (str): URL сервера Redis.
+            ttl (float): Время жизни записи в секундах.
+            write_hold (float): Время в секундах после удаления записи, в течение которого она не кэшируется.
+        """
+        super().__init__()
+        self._redis_url = redis_url
+        self._ttl = int(ttl)
+        self._write_hold_ms = int(write_hold * 1000)
+        self._redis = None
+        self._set_script = None
+
+    async def start(self) -> None:
+        """Создаёт клиент Redis и регистрирует скрипт записи."""
+        self._redis = _connect_redis(self._redis_url)
+        self._set_script = self._redis.register_script(CACHE_SET_SCRIPT)
+
+    async def close(self) -> None:
+        """Закрывает соединение с Redis."""
+        if self._redis:
+            await self._redis.aclose()
+            self._redis = None
+
+    async def get(self, key: Hashable) -> Optional[Any]:
+        """Возвращает значение из кэша.
+
+        Args:
+            key (Hashable): Ключ записи.
+
+        Returns:
+            Optional[Any]: Значение из кэша или None при промахе.
+        """
+        try:
+            raw = await self._redis.get('{0}{1}'.format(CACHE_KEY_PREFIX, key))
+        except Exception as error:
+            logger.error('Ошибка чтения из кэша: {0}'.format(error))
+            raw = None
+        if raw is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _decode(raw)
+
+    async def generation(self, key: Hashable) -> Optional[str]:
+        """Возвращает поколение ключа, которое увеличивается при каждом удалении записи.
+
+        Args:
+            key (Hashable): Ключ записи.
+
+        Returns:
+            Optional[str]: Поколение ключа, '0' — запись не удалялась, None — Redis недоступен.
+        """
+        try:
+            return await self._redis.get('{0}{1}'.format(CACHE_GENERATION_KEY_PREFIX, key)) or '0'
+        except Exception as error:
+            logger.error('Ошибка чтения из кэша: {0}'.format(error))
+            return None
+
+    async def set(self, key: Hashable, value: Any, generation: Optional[str] = None) -> None:
+        """Сохраняет значение в кэш, если запись не удалялась после чтения и недавно.
+
+        Args:
+            key (Hashable): Ключ записи.
+            value (Any): Значение для сохранения.
+            generation (str, optional): Поколение ключа до чтения значения.
+        """
+        try:
+            if self._write_hold_ms or generation is not None:
+                await self._set_script(
+                    keys=[
+                        '{0}{1}'.format(CACHE_KEY_PREFIX, key),
+                        '{0}{1}'.format(CACHE_HOLD_KEY_PREFIX, key),
+                        '{0}{1}'.format(CACHE_GENERATION_KEY_PREFIX, key),
+                    ],
+                    args=[_encode(value), self._ttl, generation or ''],
+                )
+            else:
+                await self._redis.set('{0}{1}'.format(CACHE_KEY_PREFIX, key), _encode(value), ex=self._ttl)
+        except Exception as error:
+            logger.error('Ошибка записи в кэш: {0}'.format(error))
+
+    async def delete_many(self, keys: Iterable[Hashable]) -> None:
+        """Удаляет записи из кэша, меняет поколения ключей и запрещает кэширование на write_hold секунд.
+
+        Все ключи удаляются одной транзакцией MULTI/EXEC за один обмен с Redis.
+
+        Args:
+            keys (Iterable[Hashable]): Ключи записей.
+        """
+        keys = list(keys)
+        if not keys:
+            return
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                for key in keys:
+                    generation_key = '{0}{1}'.format(CACHE_GENERATION_KEY_PREFIX, key)
+                    if self._write_hold_ms:
+                        pipe.set('{0}{1}'.format(CACHE_HOLD_KEY_PREFIX, key), 1, px=self._write_hold_ms)
+                    pipe.incr(generation_key)
+                    # Поколения нужны, пока идёт чтение, поэтому хранятся не дольше записей
+                    pipe.expire(generation_key, self._ttl)
+                    pipe.delete('{0}{1}'.format(CACHE_KEY_PREFIX, key))
+                await pipe.execute()
+        except Exception as error:
+            logger.error('Ошибка удаления из кэша: {0}'.format(error))
+
+
+def create_cache() -> CacheBackend:
+    """Создаёт бэкенд кэша согласно настройкам.
+
+    Returns:
+        CacheBackend: Бэкенд кэша.
+
+    Raises:
+        ValueError: Если указан неизвестный бэкенд или для Redis не задан URL.
+    """
+    if settings.cache_backend == CACHE_BACKEND_NONE:
+        return CacheBackend()
+    # Без реплик все чтения идут в основную базу и сразу видят запись
+    write_hold = settings.read_your_writes_window if settings.database_replica_urls else 0
+    if settings.cache_backend == CACHE_BACKEND_MEMORY:
+        return MemoryCache(
+            maxsize=settings.cache_max_size,
+            ttl=settings.cache_ttl,
+            redis_url=settings.cache_redis_url,
+            write_hold=write_hold,
+        )
+    if settings.cache_backend == CACHE_BACKEND_REDIS:
+        if not settings.cache_redis_url:
+            raise ValueError('CACHE_REDIS_URL is required for the redis cache backend')
+        return RedisCache(redis_url=settings.cache_redis_url, ttl=settings.cache_ttl, write_hold=write_hold)
+    raise ValueError('Unknown cache backend: {0}'.format(settings.cache_backend))
+
+
+user_cache = create_cache()
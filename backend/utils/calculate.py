@@ -1,21 +1,218 @@
 """Модуль для расчетов."""
-from datetime import datetime
+import calendar
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional, Sequence
 
+# Високосный год, по календарю которого нумеруются дни рождения: 29 февраля — 60-й день
+LEAP_YEAR = 2000
+FEB_29_DAY_OF_YEAR = 60
+DAYS_IN_LEAP_YEAR = 366
+UNIX_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+MISSING_ORDINAL = 0
+MINUTES_IN_DAY = 24 * 60
 
-def calculate_time_until_next_birthday(birthdate: datetime, now: datetime) -> float:
-    """Рассчитывает время до следующего дня рождения.
+
+def birthday_in_year(birthdate: date, year: int) -> date:
+    """Возвращает дату дня рождения в указанном году.
+
+    В невисокосные годы день рождения 29 февраля отмечается 1 марта.
 
     Args:
-        birthdate (datetime): Дата рождения пользователя.
+        birthdate (date): Дата рождения пользователя.
+        year (int): Год.
+
+    Returns:
+        date: Дата дня рождения в указанном году.
+    """
+    if (birthdate.month, birthdate.day) == (2, 29) and not calendar.isleap(year):
+        return date(year, 3, 1)
+    return date(year, birthdate.month, birthdate.day)
+
+
+def birthday_day_of_year(birthdate: date) -> int:
+    """Возвращает номер дня рождения в году по календарю високосного года.
+
+    Нумерация не зависит от года рождения, поэтому её можно хранить в базе
+    данных и использовать для поиска по индексу: 1 января — 1, 29 февраля — 60,
+    1 марта — 61, 31 декабря — 366.
+
+    Args:
+        birthdate (date): Дата рождения пользователя.
+
+    Returns:
+        int: Номер дня рождения от 1 до 366.
+    """
+    return date(LEAP_YEAR, birthdate.month, birthdate.day).timetuple().tm_yday
+
+
+def day_of_year_window(today: date, within_days: int) -> tuple:
+    """Рассчитывает диапазоны номеров дней рождения, попадающих в окно от сегодня до сегодня + within_days.
+
+    Если окно переходит через конец года, возвращается два диапазона.
+
+    Args:
+        today (date): Текущая дата.
+        within_days (int): Длина окна в днях.
+
+    Returns:
+        tuple: Диапазоны (начало, конец) номеров дней включительно в порядке наступления дней рождения.
+    """
+    start = birthday_day_of_year(today)
+    if not calendar.isleap(today.year) and (today.month, today.day) == (3, 1):
+        # В невисокосный год 29 февраля отмечается 1 марта
+        start = FEB_29_DAY_OF_YEAR
+    end_date = today + timedelta(days=within_days)
+    end = birthday_day_of_year(end_date)
+    if end_date.year == today.year:
+        return ((start, end),)
+    ranges = [(start, DAYS_IN_LEAP_YEAR)]
+    if start > 1:
+        ranges.append((1, min(end, start - 1)))
+    return tuple(ranges)
+
+
+def days_until_next_birthday(birthdate: date, today: date) -> int:
+    """Рассчитывает количество дней до ближайшего дня рождения, включая сегодняшний.
+
+    Args:
+        birthdate (date): Дата рождения пользователя.
+        today (date): Текущая дата.
+
+    Returns:
+        int: Количество дней до дня рождения, 0 — если он сегодня.
+    """
+    next_birthday = birthday_in_year(birthdate, today.year)
+    if next_birthday < today:
+        next_birthday = birthday_in_year(birthdate, today.year + 1)
+    return (next_birthday - today).days
+
+
+def _minutes_until_next_birthday(birthdate: date, now: datetime) -> float:
+    """Рассчитывает время до следующего дня рождения в минутах без NumPy.
+
+    Args:
+        birthdate (date): Дата рождения пользователя.
         now (datetime): Текущая дата и время.
 
     Returns:
         float: Время до следующего дня рождения в минутах.
     """
-    next_birthday = datetime(now.year, birthdate.month, birthdate.day)
+    next_birthday = datetime.combine(birthday_in_year(birthdate, now.year), datetime.min.time())
 
     if next_birthday < now:
-        next_birthday = datetime(now.year + 1, birthdate.month, birthdate.day)
+        next_birthday = datetime.combine(birthday_in_year(birthdate, now.year + 1), datetime.min.time())
 
     time_diff = next_birthday - now
     return time_diff.total_seconds() // 60
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """Импортирует NumPy при первом векторном расчёте, чтобы не замедлять запуск приложения.
+
+    Returns:
+        module: Модуль numpy или None, если NumPy не установлен.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _minutes_until_next_birthdays_numpy(birthdates: Sequence[Optional[date]], now: datetime) -> List[Optional[float]]:
+    """Рассчитывает время до следующего дня рождения для массива дат с помощью NumPy.
+
+    Args:
+        birthdates (Sequence[Optional[date]]): Даты рождения пользователей или массив datetime64.
+        now (datetime): Текущая дата и время.
+
+    Returns:
+        List[Optional[float]]: Время до следующего дня рождения в минутах для каждой даты.
+    """
+    np = _numpy()
+    if isinstance(birthdates, np.ndarray):
+        days = birthdates.astype('datetime64[D]')
+    else:
+        # Преобразование через порядковый номер дня намного быстрее разбора объектов date самим NumPy
+        ordinals = np.fromiter(
+            (MISSING_ORDINAL if birthdate is None else birthdate.toordinal() for birthdate in birthdates),
+            dtype=np.int64,
+            count=len(birthdates),
+        )
+        days = (ordinals - UNIX_EPOCH_ORDINAL).astype('datetime64[D]')
+        days[ordinals == MISSING_ORDINAL] = np.datetime64('NaT')
+    missing = np.isnat(days)
+    month_starts = days.astype('datetime64[M]')
+    months = month_starts.astype(np.int64) % 12
+    days_of_month = (days - month_starts).astype(np.int64)
+    now_us = np.datetime64(now, 'us')
+
+    def birthdays_in_year(year: int):
+        # Прибавление дней к началу месяца переносит 29 февраля на 1 марта в невисокосный год
+        return (np.datetime64(str(year), 'M') + months).astype('datetime64[D]') + days_of_month
+
+    next_birthdays = birthdays_in_year(now.year).astype('datetime64[us]')
+    passed = next_birthdays < now_us
+    next_birthdays[passed] = birthdays_in_year(now.year + 1)[passed]
+    minutes = ((next_birthdays - now_us).astype(np.int64) // 60_000_000).astype(float)
+    result = minutes.tolist()
+    if missing.any():
+        for index in np.flatnonzero(missing).tolist():
+            result[index] = None
+    return result
+
+
+def calculate_minutes_until_next_birthdays(
+    birthdates: Sequence[Optional[date]],
+    now: datetime,
+) -> List[Optional[float]]:
+    """Рассчитывает время до следующего дня рождения для списка дат рождения.
+
+    Если установлен NumPy, расчёт выполняется векторно, иначе — поэлементно.
+    Результат совпадает с calculate_time_until_next_birthday для каждой даты.
+
+    Args:
+        birthdates (Sequence[Optional[date]]): Даты рождения пользователей.
+        now (datetime): Текущая дата и время.
+
+    Returns:
+        List[Optional[float]]: Время до следующего дня рождения в минутах, None для отсутствующих дат.
+    """
+    if len(birthdates) and _numpy() is not None:
+        return _minutes_until_next_birthdays_numpy(birthdates, now)
+    return [
+        None if birthdate is None else _minutes_until_next_birthday(birthdate, now)
+        for birthdate in birthdates
+    ]
+
+
+def calculate_days_until_next_birthdays(birthdates: Sequence[Optional[date]], today: date) -> List[Optional[int]]:
+    """Рассчитывает количество дней до ближайшего дня рождения для списка дат рождения.
+
+    Считает минуты от начала текущего дня через calculate_minutes_until_next_birthdays,
+    поэтому результат совпадает с days_until_next_birthday для каждой даты.
+
+    Args:
+        birthdates (Sequence[Optional[date]]): Даты рождения пользователей.
+        today (date): Текущая дата.
+
+    Returns:
+        List[Optional[int]]: Количество дней до дня рождения, None для отсутствующих дат.
+    """
+    minutes = calculate_minutes_until_next_birthdays(birthdates, datetime.combine(today, datetime.min.time()))
+    return [None if value is None else int(value // MINUTES_IN_DAY) for value in minutes]
+
+
+def calculate_time_until_next_birthday(birthdate: datetime, now: datetime) -> float:
+    """Рассчитывает время до следующего дня рождения.
+
+    Args:
+        birthdate (datetime): Дата рождения пользователя.
+        now (datetime): Текущая дата и время.
+
+    Returns:
+        float: Время до следующего дня рождения в минутах.
+    """
+    return _minutes_until_next_birthday(birthdate, now)
@@ -0,0 +1,68 @@
+"""Модуль для условных GET-запросов по ETag."""
+import math
+from typing import Optional
+
+from core.config import settings
+from core.constants import CACHE_CONTROL_REVALIDATE, HTTP_NOT_MODIFIED, RECENT_WRITE_COOKIE
+from fastapi import Request, Response
+
+
+def make_etag(*parts) -> str:
+    """Создаёт строгий ETag из частей, однозначно определяющих представление ресурса.
+
+    Args:
+        *parts: Части ETag, например идентификатор и версия строки.
+
+    Returns:
+        str: ETag в кавычках.
+    """
+    return '"{0}"'.format('-'.join(str(part) for part in parts))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Проверяет, совпадает ли ETag с заголовком If-None-Match.
+
+    Args:
+        if_none_match (str, optional): Значение заголовка If-None-Match.
+        etag (str): Текущий ETag ресурса.
+
+    Returns:
+        bool: True, если у клиента актуальная версия ресурса.
+    """
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(',')}
+    return '*' in tags or etag in tags or 'W/{0}'.format(etag) in tags
+
+
+def conditional_response(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Устанавливает заголовки кэширования и возвращает ответ 304, если клиенту не нужно тело.
+
+    Args:
+        request (Request): Входящий запрос.
+        response (Response): Ответ, в который добавляются заголовки.
+        etag (str): Текущий ETag ресурса.
+
+    Returns:
+        Optional[Response]: Ответ 304 без тела или None, если нужно вернуть полный ответ.
+    """
+    headers = {'ETag': etag, 'Cache-Control': CACHE_CONTROL_REVALIDATE}
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=HTTP_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def mark_recent_write(response: Response) -> None:
+    """Отмечает клиента, который изменил свои данные, на READ_YOUR_WRITES_WINDOW секунд.
+
+    Пока cookie не истекла, nginx не отдаёт этому клиенту профили из микрокэша
+    (proxy_cache_bypass), и он сразу видит свои изменения.
+
+    Args:
+        response (Response): Ответ на запрос записи.
+    """
+    response.set_cookie(
+        RECENT_WRITE_COOKIE, '1',
+        max_age=max(1, math.ceil(settings.read_your_writes_window)), httponly=True, samesite='lax',
+    )
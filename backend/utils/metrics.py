@@ -0,0 +1,287 @@
+"""Модуль метрик бекенда в формате Prometheus.
+
+Middleware измеряет время обработки каждого запроса по шаблону маршрута,
+количество запросов в работе, а также количество и время запросов к базе
+данных, выполненных при обработке запроса. Запросы к базе данных учитываются
+обёртками методов клиента Tortoise ORM (instrument_client).
+
+Метрики горячего пути хранятся в LocklessHistogram: приложение работает в одном
+цикле событий, поэтому блокировки prometheus_client на каждое наблюдение не нужны,
+а гистограммы собираются в формат Prometheus только при чтении /metrics.
+
+Если задан PROMETHEUS_MULTIPROC_DIR (несколько процессов, см. serve.py), метрики
+пишутся в общие файлы prometheus_client, и /metrics суммирует все процессы.
+"""
+import itertools
+import os
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Optional, Sequence, Tuple
+
+from core.config import logger, settings
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import HistogramMetricFamily
+from tortoise import connections
+
+# Методы клиента Tortoise ORM, через которые выполняются все запросы
+CLIENT_QUERY_METHODS = ('execute_query', 'execute_query_dict', 'execute_insert', 'execute_many', 'execute_script')
+UNMATCHED_ROUTE = 'unmatched'
+REQUEST_ID_HEADER = b'x-request-id'
+MULTIPROCESS_MODE = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+
+class LocklessHistogram:
+    """Гистограмма Prometheus без блокировок для кода, выполняемого в одном цикле событий.
+
+    Атрибуты:
+        name (str): Имя метрики.
+        documentation (str): Описание метрики.
+        labelnames (Sequence[str]): Имена меток.
+        buckets (Tuple[float, ...]): Верхние границы интервалов.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        """Инициализирует гистограмму и регистрирует её в реестре Prometheus.
+
+        Args:
+            name (str): Имя метрики.
+            documentation (str): Описание метрики.
+            labelnames (Sequence[str]): Имена меток.
+            buckets (Sequence[float]): Верхние границы интервалов по возрастанию.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        REGISTRY.register(self)
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        """Добавляет наблюдение.
+
+        Args:
+            labels (Tuple): Значения меток в порядке labelnames.
+            value (float): Наблюдаемое значение.
+        """
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def collect(self):
+        """Возвращает гистограмму в формате реестра Prometheus."""
+        family = HistogramMetricFamily(self.name, self.documentation, labels=self.labelnames)
+        for labels, (counts, total) in list(self._series.items()):
+            cumulative = list(itertools.accumulate(counts))
+            buckets = [(str(bound), count) for bound, count in zip(self.buckets, cumulative)]
+            buckets.append(('+Inf', cumulative[-1]))
+            family.add_metric([str(value) for value in labels], buckets, total)
+        yield family
+
+
+class SharedHistogram:
+    """Гистограмма prometheus_client с интерфейсом LocklessHistogram для работы в нескольких процессах."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float]):
+        """Инициализирует гистограмму.
+
+        Args:
+            name (str): Имя метрики.
+            documentation (str): Описание метрики.
+            labelnames (Sequence[str]): Имена меток.
+            buckets (Sequence[float]): Верхние границы интервалов по возрастанию.
+        """
+        self._histogram = Histogram(name, documentation, labelnames, buckets=buckets)
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        """Добавляет наблюдение.
+
+        Args:
+            labels (Tuple): Значения меток в порядке labelnames.
+            value (float): Наблюдаемое значение.
+        """
+        self._histogram.labels(*labels).observe(value)
+
+
+HistogramClass = SharedHistogram if MULTIPROCESS_MODE else LocklessHistogram
+
+REQUEST_DURATION = HistogramClass(
+    'http_request_duration_seconds',
+    'Время обработки HTTP-запроса',
+    ['method', 'route', 'status'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+REQUEST_DB_QUERIES = HistogramClass(
+    'http_request_db_queries',
+    'Количество запросов к базе данных на один HTTP-запрос',
+    ['route'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50),
+)
+REQUEST_DB_DURATION = HistogramClass(
+    'http_request_db_duration_seconds',
+    'Суммарное время запросов к базе данных на один HTTP-запрос',
+    ['route'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'Количество HTTP-запросов в обработке', multiprocess_mode='livesum',
+)
+DB_QUERIES = Counter('db_queries', 'Количество запросов к базе данных', ['method'])
+DB_QUERY_ERRORS = Counter('db_query_errors', 'Количество запросов к базе данных, завершившихся ошибкой', ['method'])
+ADMISSION_REJECTIONS = Counter(
+    'admission_rejections', 'Количество отклонённых запросов записи', ['route', 'reason'],
+)
+
+
+class RequestStats:
+    """Статистика запросов к базе данных в рамках одного HTTP-запроса.
+
+    Атрибуты:
+        db_queries (int): Количество запросов к базе данных.
+        db_time (float): Суммарное время запросов к базе данных в секундах.
+    """
+
+    __slots__ = ('db_queries', 'db_time')
+
+    def __init__(self):
+        """Инициализирует пустую статистику."""
+        self.db_queries = 0
+        self.db_time = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar('request_stats', default=None)
+
+
+def _timed_query(method_name: str, method):
+    """Оборачивает метод клиента базы данных для учёта количества и времени запросов.
+
+    Args:
+        method_name (str): Имя метода клиента.
+        method: Исходный метод клиента.
+
+    Returns:
+        Обёрнутый метод.
+    """
+    queries = DB_QUERIES.labels(method_name)
+    errors = DB_QUERY_ERRORS.labels(method_name)
+
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        started_at = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            queries.inc()
+            stats = _request_stats.get()
+            if stats is not None:
+                stats.db_queries += 1
+                stats.db_time += time.perf_counter() - started_at
+
+    wrapper.__metrics_wrapped__ = True
+    return wrapper
+
+
+def instrument_client(connection_name: str) -> None:
+    """Подключает учёт запросов к клиенту Tortoise ORM.
+
+    Запросы внутри транзакций выполняются отдельным клиентом транзакции и не учитываются.
+
+    Args:
+        connection_name (str): Имя соединения Tortoise ORM.
+    """
+    client = connections.get(connection_name)
+    for method_name in CLIENT_QUERY_METHODS:
+        method = getattr(client, method_name)
+        if not getattr(method, '__metrics_wrapped__', False):
+            setattr(client, method_name, _timed_query(method_name, method))
+
+
+class MetricsMiddleware:
+    """ASGI middleware, записывающее метрики и идентификатор каждого HTTP-запроса.
+
+    Идентификатор берётся из заголовка X-Request-ID или создаётся из префикса процесса
+    и номера запроса и возвращается в ответе. Запросы дольше settings.slow_request_threshold
+    записываются в лог вместе с количеством и временем запросов к базе данных.
+
+    Атрибуты:
+        in_flight (int): Количество запросов в обработке во всех экземплярах middleware.
+    """
+
+    in_flight = 0
+    _request_prefix = os.urandom(4).hex().encode() + b'-'
+    _request_counter = itertools.count(1)
+
+    def __init__(self, app):
+        """Инициализирует middleware.
+
+        Args:
+            app: Следующее ASGI-приложение.
+        """
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        """Обрабатывает запрос и записывает метрики."""
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope['headers']:
+            if name == REQUEST_ID_HEADER:
+                request_id = value
+                break
+        if request_id is None:
+            request_id = self._request_prefix + str(next(self._request_counter)).encode()
+        status = 500
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                message['headers'] = [*message.get('headers', ()), (REQUEST_ID_HEADER, request_id)]
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        MetricsMiddleware.in_flight += 1
+        if MULTIPROCESS_MODE:
+            REQUESTS_IN_PROGRESS.inc()
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            duration = time.perf_counter() - started_at
+            MetricsMiddleware.in_flight -= 1
+            if MULTIPROCESS_MODE:
+                REQUESTS_IN_PROGRESS.dec()
+            _request_stats.reset(token)
+            # Маршрут известен после обработки: FastAPI записывает его в scope
+            route = scope.get('route')
+            route_path = route.path if route is not None else UNMATCHED_ROUTE
+            REQUEST_DURATION.observe((scope['method'], route_path, status), duration)
+            REQUEST_DB_QUERIES.observe((route_path,), stats.db_queries)
+            REQUEST_DB_DURATION.observe((route_path,), stats.db_time)
+            if duration >= settings.slow_request_threshold:
+                logger.warning(
+                    'Slow request {0} {1} {2} status={3} duration={4:.3f}s db_queries={5} db_time={6:.3f}s'.format(
+                        request_id.decode(), scope['method'], scope['path'], status,
+                        duration, stats.db_queries, stats.db_time,
+                    ),
+                )
+
+
+def _reset_request_ids() -> None:
+    """Задаёт новый префикс идентификаторов запросов в дочернем процессе после fork."""
+    MetricsMiddleware._request_prefix = os.urandom(4).hex().encode() + b'-'
+    MetricsMiddleware._request_counter = itertools.count(1)
+
+
+os.register_at_fork(after_in_child=_reset_request_ids)
+if not MULTIPROCESS_MODE:
+    REQUESTS_IN_PROGRESS.set_function(lambda: MetricsMiddleware.in_flight)
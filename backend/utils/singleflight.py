@@ -0,0 +1,111 @@
+"""Модуль для объединения одновременных одинаковых запросов."""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    """Выполняющийся запрос и количество ожидающих его вызовов."""
+
+    __slots__ = ('task', 'waiters')
+
+    def __init__(self, task: asyncio.Task):
+        """Инициализирует запрос.
+
+        Args:
+            task (asyncio.Task): Задача запроса.
+        """
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Выполняет одновременные вызовы с одинаковым ключом одним запросом.
+
+    Первый вызов запускает запрос в отдельной задаче, остальные вызовы с тем же
+    ключом, пришедшие до его завершения, ожидают ту же задачу и получают тот же
+    результат или ту же ошибку. Результат не запоминается: следующий вызов после
+    завершения запускает новый запрос.
+
+    Отмена одного вызова не отменяет запрос для остальных; если отменены все
+    ожидающие вызовы, запрос отменяется. Завершённый или отменённый запрос сразу
+    удаляется из таблицы выполняющихся.
+
+    Атрибуты:
+        executed (int): Количество запущенных запросов.
+        shared (int): Количество вызовов, получивших результат чужого запроса.
+    """
+
+    def __init__(self):
+        """Инициализирует таблицу выполняющихся запросов."""
+        self.executed = 0
+        self.shared = 0
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def __len__(self) -> int:
+        """Возвращает количество выполняющихся запросов."""
+        return len(self._calls)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполняет запрос или присоединяется к уже выполняющемуся запросу с тем же ключом.
+
+        Args:
+            key (Hashable): Ключ запроса.
+            func (Callable[[], Awaitable[Any]]): Функция, создающая корутину запроса.
+
+        Returns:
+            Any: Результат запроса.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(func()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._done(key, call))
+            self.executed += 1
+        else:
+            self.shared += 1
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                call.task.cancel()
+                # Отменённая задача завершится позже; новые вызовы не должны к ней присоединяться
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+
+    def forget(self, key: Hashable) -> None:
+        """Отвязывает выполняющийся запрос от ключа.
+
+        Вызывается после записи: уже ожидающие вызовы получат результат начатого
+        запроса, а новые вызовы запустят новый запрос и увидят изменения.
+
+        Args:
+            key (Hashable): Ключ запроса.
+        """
+        self._calls.pop(key, None)
+
+    def _done(self, key: Hashable, call: _Call) -> None:
+        """Удаляет завершённый запрос из таблицы выполняющихся.
+
+        Args:
+            key (Hashable): Ключ запроса.
+            call (_Call): Завершённый запрос.
+        """
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.task.cancelled():
+            # Ошибка уже передана ожидающим; если их не осталось, asyncio не пишет её в лог
+            call.task.exception()
+
+    def stats(self) -> dict:
+        """Возвращает статистику объединения запросов.
+
+        Returns:
+            dict: Количество запущенных, объединённых и выполняющихся запросов.
+        """
+        return {
+            'executed': self.executed,
+            'shared': self.shared,
+            'in_flight': len(self._calls),
+        }
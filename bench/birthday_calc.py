@@ -0,0 +1,139 @@
+"""Время расчёта минут до дня рождения для списка дат: NumPy против поэлементного расчёта.
+
+Для каждого размера списка (по умолчанию 10 000 и 1 000 000 дат) измеряется
+calculate_minutes_until_next_birthdays в трёх вариантах:
+
+- python — поэлементный расчёт, как без установленного NumPy;
+- numpy — векторный расчёт из списка объектов date;
+- numpy_datetime64 — векторный расчёт из готового массива datetime64[D].
+
+Около 5% дат отсутствуют (None). Перед замером проверяется, что результаты
+вариантов совпадают. Сохраняется лучшее время из --repeat повторов.
+
+Запуск из корня репозитория::
+
+    python bench/birthday_calc.py --sizes 10000 1000000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import date, datetime, timedelta
+
+from common import add_project_path, compare_results, save_results
+
+add_project_path('backend')
+
+import numpy as np  # noqa: E402
+import utils.calculate  # noqa: E402
+from utils.calculate import calculate_minutes_until_next_birthdays  # noqa: E402
+
+MISSING_SHARE = 0.05
+NOW = datetime(2023, 2, 28, 18, 45, 30)
+
+
+def random_birthdates(size: int) -> list:
+    """Создаёт список дат рождения с долей MISSING_SHARE отсутствующих.
+
+    Args:
+        size (int): Количество дат.
+
+    Returns:
+        list: Даты рождения и None.
+    """
+    first = date(1950, 1, 1)
+    return [
+        None if random.random() < MISSING_SHARE else first + timedelta(days=random.randrange(60 * 365))
+        for _ in range(size)
+    ]
+
+
+def best_time(func, repeat: int) -> float:
+    """Возвращает лучшее время выполнения функции в секундах из repeat повторов.
+
+    Args:
+        func: Функция без аргументов.
+        repeat (int): Количество повторов.
+
+    Returns:
+        float: Лучшее время в секундах.
+    """
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+def run_size(size: int, repeat: int) -> dict:
+    """Измеряет варианты расчёта на списке заданного размера.
+
+    Args:
+        size (int): Количество дат.
+        repeat (int): Количество повторов каждого замера.
+
+    Returns:
+        dict: Лучшее время каждого варианта в миллисекундах и ускорение NumPy.
+    """
+    birthdates = random_birthdates(size)
+    present = [birthdate for birthdate in birthdates if birthdate is not None]
+    array = np.array(present, dtype='datetime64[D]')
+    numpy_module = utils.calculate._numpy
+
+    def python() -> list:
+        utils.calculate._numpy = lambda: None
+        try:
+            return calculate_minutes_until_next_birthdays(birthdates, NOW)
+        finally:
+            utils.calculate._numpy = numpy_module
+
+    expected = python()
+    if calculate_minutes_until_next_birthdays(birthdates, NOW) != expected:
+        raise AssertionError('numpy and pure Python results differ')
+    if calculate_minutes_until_next_birthdays(array, NOW) != [value for value in expected if value is not None]:
+        raise AssertionError('datetime64 and pure Python results differ')
+
+    timings = {
+        'python_ms': best_time(python, repeat),
+        'numpy_ms': best_time(lambda: calculate_minutes_until_next_birthdays(birthdates, NOW), repeat),
+        'numpy_datetime64_ms': best_time(lambda: calculate_minutes_until_next_birthdays(array, NOW), repeat),
+    }
+    results = {name: round(value * 1000, 3) for name, value in timings.items()}
+    results['numpy_speedup'] = round(timings['python_ms'] / timings['numpy_ms'], 2)
+    return results
+
+
+def main(args: argparse.Namespace) -> None:
+    """Выполняет замеры для всех размеров и сохраняет результаты.
+
+    Args:
+        args (argparse.Namespace): Параметры запуска.
+    """
+    random.seed(args.seed)
+    sizes = {}
+    for size in args.sizes:
+        sizes[str(size)] = run_size(size, args.repeat)
+        print('{0}: python={1}ms numpy={2}ms datetime64={3}ms speedup={4}x'.format(
+            size, sizes[str(size)]['python_ms'], sizes[str(size)]['numpy_ms'],
+            sizes[str(size)]['numpy_datetime64_ms'], sizes[str(size)]['numpy_speedup'],
+        ), flush=True)
+
+    results = {
+        'sizes': sizes,
+        'parameters': {'repeat': args.repeat, 'missing_share': MISSING_SHARE, 'numpy': np.__version__},
+    }
+    print(json.dumps(results, indent=2))
+    print('Результаты сохранены в {0}'.format(save_results('birthday_calc', results, args.output)))
+    if args.baseline:
+        compare_results(results, args.baseline)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Расчёт минут до дня рождения: NumPy против поэлементного')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 1000000], help='размеры списков дат')
+    parser.add_argument('--repeat', type=int, default=5, help='количество повторов каждого замера')
+    parser.add_argument('--seed', type=int, default=0, help='начальное значение генератора случайных чисел')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--baseline', help='JSON предыдущего запуска для сравнения')
+    main(parser.parse_args())
@@ -0,0 +1,233 @@
+"""Сценарий бота: команда /start против фиктивных серверов Telegram и бекенда.
+
+Обработчик send_welcome_message вызывается напрямую с готовыми сообщениями, а все
+его исходящие запросы уходят на локальные aiohttp-серверы: фиктивный Bot API
+(getUserProfilePhotos, getFile, sendMessage) и фиктивный бекенд (/api/user/...).
+Задержку каждого сервера можно задать, чтобы оценить влияние сети.
+
+Запуск из корня репозитория::
+
+    python bench/bot_start.py --users 500 --rounds 2 --concurrency 50 --backend-latency 5
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import Counter, defaultdict
+
+from aiohttp import web
+from common import add_project_path, compare_results, latency_summary, save_results
+
+add_project_path('bot')
+
+SCENARIOS = ('start', 'start_link', 'start_username')
+BENCH_TOKEN = '123456:bench'
+
+
+def create_fake_telegram(calls: Counter, latency: float) -> web.Application:
+    """Создаёт фиктивный Bot API, отвечающий на методы, которые вызывает /start.
+
+    Args:
+        calls (Counter): Счётчик вызовов по методам.
+        latency (float): Задержка ответа в секундах.
+
+    Returns:
+        web.Application: Приложение aiohttp.
+    """
+    async def handle(request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        calls[method] += 1
+        data = await request.post()
+        if latency:
+            await asyncio.sleep(latency)
+        if method == 'getUserProfilePhotos':
+            user_id = data['user_id']
+            result = {'total_count': 1, 'photos': [[{
+                'file_id': 'file-{0}'.format(user_id),
+                'file_unique_id': 'unique-{0}'.format(user_id),
+                'width': 160,
+                'height': 160,
+            }]]}
+        elif method == 'getFile':
+            result = {
+                'file_id': data['file_id'],
+                'file_unique_id': data['file_id'].replace('file-', 'unique-'),
+                'file_path': 'photos/{0}.jpg'.format(data['file_id']),
+            }
+        else:
+            result = {
+                'message_id': 1,
+                'date': int(time.time()),
+                'chat': {'id': int(data['chat_id']), 'type': 'private'},
+                'text': data.get('text', ''),
+            }
+        return web.json_response({'ok': True, 'result': result})
+
+    app = web.Application()
+    app.router.add_post('/bot{token}/{method}', handle)
+    return app
+
+
+def create_fake_backend(calls: Counter, latency: float) -> web.Application:
+    """Создаёт фиктивный бекенд с маршрутами регистрации и /start.
+
+    Args:
+        calls (Counter): Счётчик вызовов по маршрутам.
+        latency (float): Задержка ответа в секундах.
+
+    Returns:
+        web.Application: Приложение aiohttp.
+    """
+    async def user_data(request: web.Request) -> web.Response:
+        calls['user_data'] += 1
+        await request.json()
+        if latency:
+            await asyncio.sleep(latency)
+        return web.json_response({'message': 'User already created'})
+
+    async def start(request: web.Request) -> web.Response:
+        calls['start'] += 1
+        data = await request.json()
+        if latency:
+            await asyncio.sleep(latency)
+        target = None
+        if data.get('target_id') or data.get('target_username'):
+            target = {
+                'user_id': data.get('target_id') or 1,
+                'first_name': 'Target',
+                'last_name': None,
+                'username': data.get('target_username'),
+                'photo': None,
+                'birthdate': None,
+                'version': 1,
+            }
+        return web.json_response({'message': 'User already created', 'target': target})
+
+    app = web.Application()
+    app.router.add_post('/api/user/user_data', user_data)
+    app.router.add_post('/api/user/start', start)
+    return app
+
+
+async def serve(app: web.Application) -> tuple:
+    """Запускает приложение aiohttp на свободном локальном порту.
+
+    Args:
+        app (web.Application): Приложение aiohttp.
+
+    Returns:
+        tuple: Объект AppRunner и базовый URL сервера.
+    """
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 0).start()
+    return runner, 'http://127.0.0.1:{0}'.format(runner.addresses[0][1])
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Поднимает фиктивные серверы, выполняет сценарии и сохраняет результаты.
+
+    Args:
+        args (argparse.Namespace): Параметры запуска.
+    """
+    telegram_calls, backend_calls = Counter(), Counter()
+    telegram_runner, telegram_url = await serve(create_fake_telegram(telegram_calls, args.telegram_latency / 1000))
+    backend_runner, backend_url = await serve(create_fake_backend(backend_calls, args.backend_latency / 1000))
+
+    # Конфигурация бота читается из окружения при импорте модулей
+    os.environ['TELEGRAM_BOT_TOKEN'] = BENCH_TOKEN
+    os.environ['NGROK_URL'] = backend_url
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.filters import CommandObject
+    from aiogram.types import Chat, Message, User
+    from bot_instance import bot
+    from handlers.main_commands import send_welcome_message
+    from utils.backend_client import close_session, start_session
+
+    # Журнал бота пишет несколько строк на каждое сообщение и искажает замер
+    logging.getLogger().setLevel(logging.WARNING)
+    # Адрес Bot API меняется у существующей сессии, чтобы сохранить её middleware
+    bot.session.api = TelegramAPIServer.from_base(telegram_url)
+    await start_session()
+
+    samples = defaultdict(list)
+    errors = Counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def run_one(scenario: str, user_id: int) -> None:
+        args_text = None
+        if scenario == 'start_link':
+            args_text = str(random.randint(1, args.users))
+        elif scenario == 'start_username':
+            args_text = 'user_{0}'.format(random.randint(1, args.users))
+        message = Message(
+            message_id=user_id,
+            date=int(time.time()),
+            chat=Chat(id=user_id, type='private'),
+            from_user=User(id=user_id, is_bot=False, first_name='User', username='user_{0}'.format(user_id)),
+            text='/start {0}'.format(args_text) if args_text else '/start',
+        ).as_(bot)
+        command = CommandObject(prefix='/', command='start', args=args_text)
+        async with semaphore:
+            started_at = time.perf_counter()
+            try:
+                await send_welcome_message(message, command)
+            except Exception:
+                errors[scenario] += 1
+            samples[scenario].append(time.perf_counter() - started_at)
+
+    scenarios = SCENARIOS if args.scenario == 'all' else (args.scenario,)
+    random.seed(args.seed)
+    started_at = time.perf_counter()
+    try:
+        for _ in range(args.rounds):
+            await asyncio.gather(*(
+                run_one(random.choice(scenarios), user_id) for user_id in range(1, args.users + 1)
+            ))
+    finally:
+        elapsed = time.perf_counter() - started_at
+        await close_session()
+        await bot.session.close()
+        await telegram_runner.cleanup()
+        await backend_runner.cleanup()
+
+    total = sum(len(values) for values in samples.values())
+    results = {
+        'elapsed_s': round(elapsed, 3),
+        'requests': total,
+        'throughput_rps': round(total / elapsed, 1),
+        'errors': dict(errors),
+        'overall': latency_summary([value for values in samples.values() for value in values]),
+        'scenarios': {scenario: latency_summary(values) for scenario, values in sorted(samples.items())},
+        'telegram_calls': dict(telegram_calls),
+        'backend_calls': dict(backend_calls),
+        'parameters': {
+            'users': args.users,
+            'rounds': args.rounds,
+            'concurrency': args.concurrency,
+            'scenario': args.scenario,
+            'telegram_latency_ms': args.telegram_latency,
+            'backend_latency_ms': args.backend_latency,
+        },
+    }
+    print(json.dumps(results, indent=2))
+    print('Результаты сохранены в {0}'.format(save_results('bot_start', results, args.output)))
+    if args.baseline:
+        compare_results(results, args.baseline)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Сценарий /start бота против фиктивных серверов')
+    parser.add_argument('--users', type=int, default=500, help='количество пользователей в раунде')
+    parser.add_argument('--rounds', type=int, default=2, help='количество раундов; со второго работает кэш фото')
+    parser.add_argument('--concurrency', type=int, default=50, help='количество одновременных обработчиков')
+    parser.add_argument('--scenario', choices=SCENARIOS + ('all',), default='all', help='сценарий /start')
+    parser.add_argument('--telegram-latency', type=float, default=0, help='задержка Bot API в миллисекундах')
+    parser.add_argument('--backend-latency', type=float, default=0, help='задержка бекенда в миллисекундах')
+    parser.add_argument('--seed', type=int, default=0, help='начальное значение генератора случайных чисел')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--baseline', help='JSON предыдущего запуска для сравнения')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,112 @@
+"""Общие функции бенчмарков: перцентили задержки, сохранение и сравнение результатов."""
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+
+def add_project_path(name: str) -> None:
+    """Добавляет каталог backend или bot в sys.path, чтобы импортировать их модули.
+
+    Args:
+        name (str): Имя каталога в корне репозитория.
+    """
+    path = str(ROOT_DIR / name)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def latency_summary(samples: list) -> dict:
+    """Считает количество запросов и перцентили задержки в миллисекундах.
+
+    Args:
+        samples (list): Время выполнения запросов в секундах.
+
+    Returns:
+        dict: Количество, среднее, p50, p95, p99 и максимум в миллисекундах.
+    """
+    if not samples:
+        return {'count': 0}
+    # quantiles требует хотя бы двух значений
+    quantiles = statistics.quantiles(samples * 2 if len(samples) == 1 else samples, n=100)
+    return {
+        'count': len(samples),
+        'mean_ms': round(statistics.fmean(samples) * 1000, 3),
+        'p50_ms': round(quantiles[49] * 1000, 3),
+        'p95_ms': round(quantiles[94] * 1000, 3),
+        'p99_ms': round(quantiles[98] * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3),
+    }
+
+
+def git_commit() -> Optional[str]:
+    """Возвращает короткий хеш текущего коммита или None, если git недоступен."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR, stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(name: str, results: dict, output: Optional[str] = None) -> Path:
+    """Сохраняет результаты в JSON вместе с коммитом и окружением запуска.
+
+    Args:
+        name (str): Имя бенчмарка.
+        results (dict): Результаты замеров.
+        output (str, optional): Путь к файлу; по умолчанию bench/results/<name>-<commit>-<время>.json.
+
+    Returns:
+        Path: Путь к сохранённому файлу.
+    """
+    commit = git_commit()
+    document = {
+        'benchmark': name,
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        **results,
+    }
+    if output:
+        path = Path(output)
+    else:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / '{0}-{1}-{2}.json'.format(name, commit or 'nogit', time.strftime('%Y%m%d-%H%M%S'))
+    path.write_text(json.dumps(document, indent=2, ensure_ascii=False))
+    return path
+
+
+def compare_results(results: dict, baseline_path: str) -> None:
+    """Печатает изменение пропускной способности и перцентилей относительно базового запуска.
+
+    Сравниваются словари с ключами throughput_rps и p*_ms на любой глубине вложенности.
+
+    Args:
+        results (dict): Результаты текущего запуска.
+        baseline_path (str): Путь к JSON-файлу базового запуска.
+    """
+    baseline = json.loads(Path(baseline_path).read_text())
+    print('Сравнение с {0} (коммит {1}):'.format(baseline_path, baseline.get('commit')))
+
+    def walk(current, previous, prefix):
+        if not isinstance(current, dict) or not isinstance(previous, dict):
+            return
+        for key, value in current.items():
+            name = '{0}.{1}'.format(prefix, key) if prefix else key
+            old = previous.get(key)
+            if isinstance(value, dict):
+                walk(value, old, name)
+            elif key == 'throughput_rps' or (key.startswith('p') and key.endswith('_ms')):
+                if isinstance(old, (int, float)) and old:
+                    print('  {0}: {1} -> {2} ({3:+.1f}%)'.format(name, old, value, (value - old) / old * 100))
+
+    walk(results, baseline, '')
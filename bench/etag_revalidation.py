@@ -0,0 +1,153 @@
+"""Условные GET по ETag: байты ответа и задержка с If-None-Match и без него.
+
+Приложение вызывается по ASGI внутри процесса через httpx. Для --users
+пользователей выполняются запросы GET /user/user_data/{id} и GET /profile/{id}
+в трёх раундах:
+
+- full — без If-None-Match, каждый ответ 200 с телом;
+- revalidate — с ETag из раунда full, данные не менялись, ответы 304 без тела;
+- revalidate_changed — с теми же ETag после смены даты рождения у доли
+  --change-share пользователей: для них ответ 200 с новым телом, для остальных 304.
+
+Перед раундами выполняется прогревочный проход, чтобы все раунды читали из
+тёплого кэша. ETag профиля включает минуты до дня рождения, поэтому при смене
+минуты между раундами часть ответов /profile в revalidate тоже будет 200.
+Для каждого раунда сохраняются коды ответов, байты тела и заголовков на запрос
+и перцентили задержки.
+
+Пример запуска из корня репозитория::
+
+    DATABASE_URL=sqlite:///tmp/bench.db python bench/etag_revalidation.py --users 2000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+
+from backend_load import random_birthdate, seed
+from common import add_project_path, compare_results, latency_summary, save_results
+
+add_project_path('backend')
+
+PATHS = ('/user/user_data/{0}', '/profile/{0}')
+
+
+async def run_round(client, requests: list, etags: dict, concurrency: int) -> dict:
+    """Выполняет запросы и сохраняет полученные ETag.
+
+    Args:
+        client (httpx.AsyncClient): Клиент приложения.
+        requests (list): Пути запросов.
+        etags (dict): ETag по пути; если путь есть в словаре, отправляется If-None-Match.
+        concurrency (int): Количество параллельных клиентов.
+
+    Returns:
+        dict: Коды ответов, байты на запрос и задержки.
+    """
+    samples, statuses = [], Counter()
+    body_bytes = header_bytes = 0
+    pending = iter(requests)
+
+    async def worker() -> None:
+        nonlocal body_bytes, header_bytes
+        for path in pending:
+            headers = {'If-None-Match': etags[path]} if path in etags else {}
+            started_at = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            samples.append(time.perf_counter() - started_at)
+            statuses[response.status_code] += 1
+            body_bytes += len(response.content)
+            # Размер заголовков в HTTP/1.1: "name: value\r\n"
+            header_bytes += sum(len(name) + len(value) + 4 for name, value in response.headers.raw)
+            if 'etag' in response.headers:
+                etags[path] = response.headers['etag']
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'body_bytes_per_request': round(body_bytes / len(requests), 1),
+        'header_bytes_per_request': round(header_bytes / len(requests), 1),
+        'latency': latency_summary(samples),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Поднимает приложение, готовит данные, выполняет раунды и сохраняет результаты.
+
+    Args:
+        args (argparse.Namespace): Параметры запуска.
+    """
+    import httpx
+    from core.config import settings
+
+    if settings.database_url.startswith('sqlite'):
+        settings.generate_schemas = True
+    else:
+        import asyncpg
+        from db.migrate import apply_migrations
+
+        connection = await asyncpg.connect(settings.database_url)
+        try:
+            await apply_migrations(connection)
+        finally:
+            await connection.close()
+
+    from db.database import lifespan
+    from main import app
+
+    random.seed(args.seed)
+    requests = [path.format(user_id) for user_id in range(1, args.users + 1) for path in PATHS]
+    rounds = {}
+    async with lifespan(app):
+        await seed(app, args.users)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+            await run_round(client, requests, {}, args.concurrency)
+            # Каждый путь запрашивается в раунде один раз, поэтому раунд full идёт без If-None-Match
+            etags = {}
+            rounds['full'] = await run_round(client, requests, etags, args.concurrency)
+            rounds['revalidate'] = await run_round(client, requests, dict(etags), args.concurrency)
+            for user_id in random.sample(range(1, args.users + 1), int(args.users * args.change_share)):
+                response = await client.post(
+                    '/user/save_birthdate/', json={'user_id': user_id, 'birthdate': random_birthdate()},
+                )
+                if response.status_code != 200:
+                    raise RuntimeError('Birthdate update failed: {0}'.format(response.status_code))
+            rounds['revalidate_changed'] = await run_round(client, requests, dict(etags), args.concurrency)
+        for name, result in rounds.items():
+            print('{0}: statuses={1} body={2} B/req headers={3} B/req p50={4}ms p99={5}ms'.format(
+                name, result['statuses'], result['body_bytes_per_request'], result['header_bytes_per_request'],
+                result['latency'].get('p50_ms'), result['latency'].get('p99_ms'),
+            ), flush=True)
+
+    results = {
+        'rounds': rounds,
+        'parameters': {
+            'database': settings.database_url.split(':', 1)[0],
+            'users': args.users,
+            'concurrency': args.concurrency,
+            'change_share': args.change_share,
+            'cache_backend': settings.cache_backend,
+        },
+    }
+    print(json.dumps(results, indent=2))
+    print('Результаты сохранены в {0}'.format(save_results('etag_revalidation', results, args.output)))
+    if args.baseline:
+        compare_results(results, args.baseline)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Условные GET по ETag: байты и задержка')
+    parser.add_argument('--users', type=int, default=2000, help='количество пользователей')
+    parser.add_argument('--concurrency', type=int, default=32, help='количество параллельных клиентов')
+    parser.add_argument('--change-share', type=float, default=0.1, help='доля пользователей, меняющих данные')
+    parser.add_argument('--seed', type=int, default=0, help='начальное значение генератора случайных чисел')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--baseline', help='JSON предыдущего запуска для сравнения')
+    arguments = parser.parse_args()
+    if not os.getenv('DATABASE_URL'):
+        parser.error('DATABASE_URL is not set')
+    asyncio.run(main(arguments))
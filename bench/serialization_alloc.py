@@ -0,0 +1,140 @@
+"""Микробенчмарк чтения и сериализации профиля: операций в секунду и память на операцию.
+
+Сравниваются прежний и текущий пути ответа бекенда:
+
+- serialize_json — jsonable_encoder и JSONResponse (стандартный json), как до ORJSONResponse;
+- serialize_orjson — ORJSONResponse;
+- read_model — объект модели Tortoise и User_Pydantic, скопированный в словарь;
+- read_values — запрос .first().values() сразу в словарь;
+- route_profile — GET /profile/{id} по ASGI при попадании в кэш, текущий маршрут целиком.
+
+Для каждой операции измеряется количество операций в секунду без трассировки
+памяти и, отдельным проходом под tracemalloc, средний пик памяти, выделенной
+за операцию сверх уже занятой. Чтения выполняются на SQLite в памяти.
+
+Запуск из корня репозитория::
+
+    python bench/serialization_alloc.py --operations 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import tracemalloc
+from datetime import date
+
+from backend_load import call
+from common import add_project_path, compare_results, save_results
+
+add_project_path('backend')
+os.environ['DATABASE_URL'] = 'sqlite://:memory:'
+os.environ['GENERATE_SCHEMAS'] = '1'
+os.environ['METRICS_ENABLED'] = '0'
+
+USER_ID = 1
+PROFILE = {
+    'user': {
+        'user_id': USER_ID,
+        'first_name': 'Bench',
+        'last_name': 'User',
+        'username': 'bench_user',
+        'photo': 'https://example.com/photo.jpg',
+        'birthdate': date(1990, 5, 17),
+    },
+    'time_left': 123456.0,
+}
+
+
+async def measure(operation, operations: int) -> dict:
+    """Измеряет скорость операции и память, выделяемую за одну операцию.
+
+    Args:
+        operation: Корутина без аргументов.
+        operations (int): Количество операций в каждом проходе.
+
+    Returns:
+        dict: Операций в секунду и средний пик памяти на операцию в байтах.
+    """
+    for _ in range(min(operations, 100)):
+        await operation()
+    started_at = time.perf_counter()
+    for _ in range(operations):
+        await operation()
+    ops = operations / (time.perf_counter() - started_at)
+
+    tracemalloc.start()
+    peak_total = 0
+    try:
+        for _ in range(operations):
+            current, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            await operation()
+            peak_total += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    return {'ops_per_s': round(ops, 1), 'peak_bytes_per_op': round(peak_total / operations, 1)}
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Готовит приложение и данные, измеряет операции и сохраняет результаты.
+
+    Args:
+        args (argparse.Namespace): Параметры запуска.
+    """
+    from db.crud import USER_FIELDS
+    from db.database import lifespan
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from main import app
+    from models.user import User, User_Pydantic
+
+    async def serialize_json():
+        return JSONResponse(jsonable_encoder(PROFILE))
+
+    async def serialize_orjson():
+        return ORJSONResponse(PROFILE)
+
+    async def read_model():
+        user = await User.get(user_id=USER_ID)
+        return dict(await User_Pydantic.from_tortoise_orm(user))
+
+    async def read_values():
+        return await User.filter(user_id=USER_ID).first().values(*USER_FIELDS)
+
+    async def route_profile():
+        status, _ = await call(app, 'GET', '/profile/{0}'.format(USER_ID))
+        if status != 200:
+            raise RuntimeError('GET /profile failed: {0}'.format(status))
+
+    operations = {
+        'serialize_json': serialize_json,
+        'serialize_orjson': serialize_orjson,
+        'read_model': read_model,
+        'read_values': read_values,
+        'route_profile': route_profile,
+    }
+    results = {}
+    async with lifespan(app):
+        user = dict(PROFILE['user'])
+        await call(app, 'POST', '/user/user_data/', {key: value for key, value in user.items() if key != 'birthdate'})
+        await call(app, 'POST', '/user/save_birthdate/', {'user_id': USER_ID, 'birthdate': user['birthdate'].isoformat()})
+        for name, operation in operations.items():
+            results[name] = await measure(operation, args.operations)
+            print('{0}: {1} ops/s, peak {2} B/op'.format(
+                name, results[name]['ops_per_s'], results[name]['peak_bytes_per_op'],
+            ), flush=True)
+
+    results = {'operations': results, 'parameters': {'operations': args.operations}}
+    print(json.dumps(results, indent=2))
+    print('Результаты сохранены в {0}'.format(save_results('serialization_alloc', results, args.output)))
+    if args.baseline:
+        compare_results(results, args.baseline)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Чтение и сериализация профиля: скорость и память')
+    parser.add_argument('--operations', type=int, default=5000, help='количество операций в каждом проходе')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--baseline', help='JSON предыдущего запуска для сравнения')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,190 @@
+"""Нагрузочный тест вебхука: воспроизведение записанных обновлений Telegram.
+
+Обновления отправляются по HTTP в настоящий обработчик вебхука (UpdateQueue из
+bot/webhook.py) с диспетчером и роутерами бота, а исходящие запросы бота уходят
+на фиктивные серверы Bot API и бекенда из bot_start.py. Обновления читаются из
+файла JSON Lines (одно обновление Telegram в строке, например из журнала
+getUpdates) или, без --updates, создаются как сообщения /start от --users
+пользователей. Отправители повторяют обновление после ответа 503, как Telegram.
+
+Сохраняются пропускная способность приёма и обработки, коды ответов вебхука,
+задержка ответа вебхука и время дообработки очереди после приёма.
+
+Запуск из корня репозитория::
+
+    python bench/webhook_replay.py --requests 5000 --senders 100 --telegram-latency 20
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import time
+from collections import Counter
+
+import aiohttp
+from bot_start import BENCH_TOKEN, create_fake_backend, create_fake_telegram, serve
+from common import add_project_path, compare_results, latency_summary, save_results
+
+add_project_path('bot')
+
+BENCH_SECRET = 'bench-secret'
+BENCH_PATH = '/bot/webhook'
+
+
+def load_updates(path: str) -> list:
+    """Читает записанные обновления Telegram из файла JSON Lines.
+
+    Args:
+        path (str): Путь к файлу.
+
+    Returns:
+        list: Обновления в виде словарей.
+    """
+    with open(path, encoding='utf-8') as updates_file:
+        return [json.loads(line) for line in updates_file if line.strip()]
+
+
+def generate_updates(users: int) -> list:
+    """Создаёт обновления с командой /start от разных пользователей.
+
+    Args:
+        users (int): Количество пользователей.
+
+    Returns:
+        list: Обновления в виде словарей.
+    """
+    updates = []
+    for user_id in range(1, users + 1):
+        text = random.choice(('/start', '/start {0}'.format(random.randint(1, users)), '/start user_1'))
+        updates.append({
+            'update_id': user_id,
+            'message': {
+                'message_id': user_id,
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': {'id': user_id, 'is_bot': False, 'first_name': 'User', 'username': 'user_{0}'.format(user_id)},
+                'text': text,
+                'entities': [{'type': 'bot_command', 'offset': 0, 'length': len('/start')}],
+            },
+        })
+    return updates
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Поднимает вебхук и фиктивные серверы, воспроизводит обновления и сохраняет результаты.
+
+    Args:
+        args (argparse.Namespace): Параметры запуска.
+    """
+    telegram_calls, backend_calls = Counter(), Counter()
+    telegram_runner, telegram_url = await serve(create_fake_telegram(telegram_calls, args.telegram_latency / 1000))
+    backend_runner, backend_url = await serve(create_fake_backend(backend_calls, args.backend_latency / 1000))
+
+    # Конфигурация бота читается из окружения при импорте модулей
+    os.environ['TELEGRAM_BOT_TOKEN'] = BENCH_TOKEN
+    os.environ['NGROK_URL'] = backend_url
+    os.environ['WEBHOOK_SECRET'] = BENCH_SECRET
+    from aiogram import Dispatcher
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiohttp import web
+    from bot_instance import bot
+    from handlers.main_commands import router as main_router
+    from utils.backend_client import close_session, start_session
+    from webhook import SECRET_HEADER, UpdateQueue
+
+    logging.getLogger().setLevel(logging.WARNING)
+    bot.session.api = TelegramAPIServer.from_base(telegram_url)
+    await start_session()
+
+    dp = Dispatcher()
+    dp.include_router(main_router)
+    update_queue = UpdateQueue(dp, bot, maxsize=args.queue_size, concurrency=args.concurrency)
+    app = web.Application()
+    app.router.add_post(BENCH_PATH, update_queue.handle)
+    webhook_runner, webhook_url = await serve(app)
+    update_queue.start()
+
+    random.seed(args.seed)
+    recorded = load_updates(args.updates) if args.updates else generate_updates(args.users)
+    # Записанные обновления повторяются по кругу с новыми update_id
+    updates = []
+    for update_id, update in zip(range(1, args.requests + 1), itertools.cycle(recorded)):
+        updates.append(dict(update, update_id=update_id))
+
+    samples, statuses = [], Counter()
+    pending = iter(updates)
+
+    async def sender(session: aiohttp.ClientSession) -> None:
+        for update in pending:
+            while True:
+                started_at = time.perf_counter()
+                async with session.post(
+                    webhook_url + BENCH_PATH, json=update, headers={SECRET_HEADER: BENCH_SECRET},
+                ) as response:
+                    await response.read()
+                samples.append(time.perf_counter() - started_at)
+                statuses[response.status] += 1
+                if response.status != 503:
+                    break
+                await asyncio.sleep(args.retry_delay)
+
+    connector = aiohttp.TCPConnector(limit=args.senders)
+    started_at = time.perf_counter()
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            await asyncio.gather(*(sender(session) for _ in range(args.senders)))
+        accepted_at = time.perf_counter()
+        await update_queue.drain(args.drain_timeout)
+        finished_at = time.perf_counter()
+    finally:
+        await webhook_runner.cleanup()
+        await close_session()
+        await bot.session.close()
+        await telegram_runner.cleanup()
+        await backend_runner.cleanup()
+
+    results = {
+        'accepted_rps': round(args.requests / (accepted_at - started_at), 1),
+        'processed_rps': round(update_queue.processed / (finished_at - started_at), 1),
+        'processed': update_queue.processed,
+        'rejected': update_queue.rejected,
+        'drain_s': round(finished_at - accepted_at, 3),
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'webhook_latency': latency_summary(samples),
+        'telegram_calls': dict(telegram_calls),
+        'backend_calls': dict(backend_calls),
+        'parameters': {
+            'requests': args.requests,
+            'recorded_updates': len(recorded),
+            'senders': args.senders,
+            'queue_size': args.queue_size,
+            'concurrency': args.concurrency,
+            'telegram_latency_ms': args.telegram_latency,
+            'backend_latency_ms': args.backend_latency,
+        },
+    }
+    print(json.dumps(results, indent=2))
+    print('Результаты сохранены в {0}'.format(save_results('webhook_replay', results, args.output)))
+    if args.baseline:
+        compare_results(results, args.baseline)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Воспроизведение обновлений Telegram в вебхук бота')
+    parser.add_argument('--updates', help='файл JSON Lines с записанными обновлениями Telegram')
+    parser.add_argument('--users', type=int, default=1000, help='пользователей в созданных обновлениях без --updates')
+    parser.add_argument('--requests', type=int, default=5000, help='количество отправляемых обновлений')
+    parser.add_argument('--senders', type=int, default=100, help='одновременных соединений с вебхуком')
+    parser.add_argument('--queue-size', type=int, default=1000, help='размер очереди обновлений (WEBHOOK_QUEUE_SIZE)')
+    parser.add_argument('--concurrency', type=int, default=50, help='одновременных обработчиков (WEBHOOK_CONCURRENCY)')
+    parser.add_argument('--telegram-latency', type=float, default=0, help='задержка Bot API в миллисекундах')
+    parser.add_argument('--backend-latency', type=float, default=0, help='задержка бекенда в миллисекундах')
+    parser.add_argument('--retry-delay', type=float, default=0.5, help='пауза перед повтором после 503 в секундах')
+    parser.add_argument('--drain-timeout', type=float, default=60, help='время дообработки очереди в секундах')
+    parser.add_argument('--seed', type=int, default=0, help='начальное значение генератора случайных чисел')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--baseline', help='JSON предыдущего запуска для сравнения')
+    asyncio.run(main(parser.parse_args()))
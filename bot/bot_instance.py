@@ -1,5 +1,7 @@
 """Инициализация экземпляра бота Telegram."""
 from aiogram import Bot
 from utils.config import TOKEN
+from utils.metrics import TelegramMetricsMiddleware
 
 bot = Bot(token=TOKEN)
+bot.session.middleware(TelegramMetricsMiddleware())
@@ -1,12 +1,13 @@
 """Модуль с основными командами бота."""
+import asyncio
+
 from aiogram import Router
 from aiogram.filters import Command, CommandObject
 from aiogram.types import Message
-from utils.backend_client import send_user_data
-from utils.config import logger
 from utils.telegram import (
     create_response_with_keyboard,
-    get_and_structure_user_data,
+    register_user,
+    register_user_and_fetch_target,
 )
 
 router = Router()
@@ -16,6 +17,9 @@ router = Router()
 async def send_welcome_message(message: Message, command: CommandObject) -> None:
     """Приветственное сообщение.
 
+    Без аргумента приветствие отправляется параллельно с регистрацией пользователя.
+    С аргументом регистрация и получение профиля из ссылки выполняются одним запросом к бекенду.
+
     Args:
         message (Message): Сообщение от пользователя
         command (CommandObject): Объект команды
@@ -23,8 +27,8 @@ async def send_welcome_message(message: Message, command: CommandObject) -> None
     Return:
         None
     """
-    user_data = await get_and_structure_user_data(message)
-    response = await send_user_data(user_data)
-    if response:
-        logger.info('response: {0}'.format(response))
-    await create_response_with_keyboard(message, command.args)
+    if command.args:
+        target_user = await register_user_and_fetch_target(message, command.args)
+        await create_response_with_keyboard(message, command.args, target_user)
+    else:
+        await asyncio.gather(register_user(message), create_response_with_keyboard(message))
@@ -4,16 +4,32 @@ import asyncio
 from aiogram import Dispatcher
 from bot_instance import bot
 from handlers.main_commands import router as main_router
+from utils.backend_client import close_session, start_session
+from utils.config import BOT_MODE, BOT_MODE_WEBHOOK
+from utils.metrics import HandlerMetricsMiddleware, start_metrics_server
+from utils.photo_cache import photo_cache
+from utils.profile_signal import install_signal_handler
+from webhook import run_webhook
 
 
 async def main_commands():
-    """Настраивает и запускает Telegram бота."""
+    """Настраивает и запускает Telegram бота в режиме long polling или вебхука (BOT_MODE)."""
     dp = Dispatcher()
+    dp.message.middleware(HandlerMetricsMiddleware())
 
     dp.include_router(main_router)
+    dp.startup.register(start_session)
+    dp.startup.register(photo_cache.start)
+    dp.shutdown.register(close_session)
+    dp.shutdown.register(photo_cache.stop)
+    start_metrics_server()
+    install_signal_handler()
 
-    await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    if BOT_MODE == BOT_MODE_WEBHOOK:
+        await run_webhook(dp, bot)
+    else:
+        await bot.delete_webhook(drop_pending_updates=True)
+        await dp.start_polling(bot)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,288 @@
+"""Планировщик уведомлений о днях рождения.
+
+Раз в сутки (в NOTIFY_HOUR часов) планировщик постранично забирает с бекенда
+пользователей, чей день рождения наступает через NOTIFY_DAYS дней, и отправляет
+им уведомления через бота. Количество дней до дня рождения рассчитывает бекенд
+(utils/calculate.py). Отправка ограничивается общим лимитом Telegram и лимитом
+на чат, а журнал доставки не даёт отправить одно уведомление дважды, в том
+числе после перезапуска.
+
+Запуск:
+    python scheduler.py              # ежедневные рассылки
+    python scheduler.py --once       # одна рассылка и выход
+    python scheduler.py --simulate 10000 --global-rate 1000
+                                     # рассылка фиктивным пользователям через локальный фиктивный Bot API
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramAPIError, TelegramRetryAfter
+from aiohttp import web
+from utils.backend_client import close_session, fetch_upcoming_birthdays
+from utils.config import (
+    NOTIFY_CONCURRENCY,
+    NOTIFY_DAYS,
+    NOTIFY_DB_PATH,
+    NOTIFY_HOUR,
+    NOTIFY_PAGE_SIZE,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_GLOBAL_RATE,
+    logger,
+)
+from utils.delivery_log import STATUS_FAILED, STATUS_SENT, DeliveryLog
+from utils.rate_limiter import TelegramRateLimiter
+
+MAX_SEND_ATTEMPTS = 3
+
+
+def create_notification_text(user: Dict[str, Any]) -> str:
+    """Создаёт текст уведомления о дне рождения.
+
+    Args:
+        user (Dict[str, Any]): Данные пользователя с количеством дней до дня рождения.
+
+    Returns:
+        str: Текст уведомления.
+    """
+    if user['days_left'] == 0:
+        return 'С днём рождения, {0}! 🎉'.format(user['first_name'])
+    return '{0}, до вашего дня рождения осталось дней: {1}'.format(user['first_name'], user['days_left'])
+
+
+class BirthdayNotifier:
+    """Рассылка уведомлений о днях рождения.
+
+    Атрибуты:
+        sent (int): Количество отправленных уведомлений.
+        skipped (int): Количество уведомлений, отправленных ранее.
+        failed (int): Количество уведомлений, которые не удалось отправить.
+    """
+
+    def __init__(
+        self,
+        bot: Bot,
+        delivery_log: DeliveryLog,
+        limiter: TelegramRateLimiter,
+        fetch_page: Callable[..., Awaitable[Optional[Dict[str, Any]]]] = fetch_upcoming_birthdays,
+    ):
+        """Инициализирует рассылку.
+
+        Args:
+            bot (Bot): Экземпляр бота для отправки сообщений.
+            delivery_log (DeliveryLog): Журнал доставки уведомлений.
+            limiter (TelegramRateLimiter): Ограничитель частоты отправки.
+            fetch_page (Callable): Корутина, возвращающая страницу пользователей с ближайшими днями рождения.
+        """
+        self.bot = bot
+        self.delivery_log = delivery_log
+        self.limiter = limiter
+        self.fetch_page = fetch_page
+        self.sent = 0
+        self.skipped = 0
+        self.failed = 0
+
+    async def run(self, today: date) -> None:
+        """Отправляет все уведомления, которые положены на указанную дату.
+
+        Страницы пользователей загружаются, пока воркеры отправляют сообщения
+        из предыдущих страниц.
+
+        Args:
+            today (date): Дата рассылки.
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=NOTIFY_PAGE_SIZE)
+        workers = [asyncio.create_task(self._worker(queue, today)) for _ in range(NOTIFY_CONCURRENCY)]
+        cursor = None
+        try:
+            while True:
+                page = await self.fetch_page(max(NOTIFY_DAYS), NOTIFY_PAGE_SIZE, cursor)
+                if page is None:
+                    logger.error('Не удалось получить пользователей для рассылки')
+                    break
+                for user in page['users']:
+                    if user['days_left'] in NOTIFY_DAYS:
+                        await queue.put(user)
+                cursor = page['next_cursor']
+                if not cursor:
+                    break
+                self.limiter.cleanup()
+            await queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _worker(self, queue: asyncio.Queue, today: date) -> None:
+        """Отправляет уведомления из очереди.
+
+        Args:
+            queue (asyncio.Queue): Очередь пользователей для уведомления.
+            today (date): Дата рассылки.
+        """
+        while True:
+            user = await queue.get()
+            try:
+                await self._notify(user, today)
+            except Exception as error:
+                logger.error('Ошибка отправки уведомления {0}: {1}'.format(user['user_id'], error))
+            finally:
+                queue.task_done()
+
+    async def _notify(self, user: Dict[str, Any], today: date) -> None:
+        """Отправляет уведомление пользователю, если оно ещё не отправлялось.
+
+        Args:
+            user (Dict[str, Any]): Данные пользователя с количеством дней до дня рождения.
+            today (date): Дата рассылки.
+        """
+        user_id = user['user_id']
+        birthday = (today + timedelta(days=user['days_left'])).isoformat()
+        if not self.delivery_log.claim(user_id, birthday, user['days_left']):
+            self.skipped += 1
+            return
+
+        status = STATUS_FAILED
+        for _ in range(MAX_SEND_ATTEMPTS):
+            await self.limiter.acquire(user_id)
+            try:
+                await self.bot.send_message(user_id, create_notification_text(user))
+            except TelegramRetryAfter as error:
+                await asyncio.sleep(error.retry_after)
+                continue
+            except TelegramAPIError as error:
+                logger.error('Не удалось отправить уведомление {0}: {1}'.format(user_id, error))
+                break
+            status = STATUS_SENT
+            break
+
+        self.delivery_log.mark(user_id, birthday, user['days_left'], status)
+        if status == STATUS_SENT:
+            self.sent += 1
+        else:
+            self.failed += 1
+
+
+async def run_daily(notifier: BirthdayNotifier) -> None:
+    """Запускает рассылку сразу и затем ежедневно в NOTIFY_HOUR часов.
+
+    Повторный запуск в тот же день безопасен: отправленные уведомления пропускаются.
+
+    Args:
+        notifier (BirthdayNotifier): Рассылка уведомлений.
+    """
+    while True:
+        await notifier.run(date.today())
+        logger.info('Рассылка завершена: отправлено {0}, пропущено {1}, ошибок {2}'.format(
+            notifier.sent, notifier.skipped, notifier.failed,
+        ))
+        now = datetime.now()
+        next_run = datetime.combine(now.date() + timedelta(days=1), datetime.min.time()) + timedelta(hours=NOTIFY_HOUR)
+        await asyncio.sleep((next_run - now).total_seconds())
+
+
+async def fake_bot_api(request: web.Request) -> web.Response:
+    """Обрабатывает запрос к фиктивному Bot API, возвращая успешную отправку сообщения.
+
+    Args:
+        request (web.Request): Запрос бота.
+
+    Returns:
+        web.Response: Ответ в формате Bot API.
+    """
+    data = await request.post()
+    return web.json_response({
+        'ok': True,
+        'result': {
+            'message_id': 1,
+            'date': int(time.time()),
+            'chat': {'id': int(data['chat_id']), 'type': 'private'},
+            'text': data['text'],
+        },
+    })
+
+
+async def simulate(users_count: int, global_rate: float) -> None:
+    """Выполняет рассылку фиктивным пользователям через локальный фиктивный Bot API и выводит скорость отправки.
+
+    Args:
+        users_count (int): Количество фиктивных пользователей.
+        global_rate (float): Общий лимит сообщений в секунду.
+    """
+    app = web.Application()
+    app.router.add_post('/bot{token}/{method}', fake_bot_api)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', 0).start()
+    port = runner.addresses[0][1]
+
+    async def fetch_page(within_days: int, limit: int, cursor: Optional[str] = None) -> Dict[str, Any]:
+        start = int(cursor or 0)
+        end = min(start + limit, users_count)
+        users = [
+            {'user_id': user_id + 1, 'first_name': 'User {0}'.format(user_id + 1), 'days_left': 0}
+            for user_id in range(start, end)
+        ]
+        return {'users': users, 'next_cursor': str(end) if end < users_count else None}
+
+    session = AiohttpSession(api=TelegramAPIServer.from_base('http://127.0.0.1:{0}'.format(port)))
+    simulation_bot = Bot(token='123456:simulation', session=session)
+    delivery_log = DeliveryLog(os.path.join(tempfile.mkdtemp(), 'notifications.db'))
+    notifier = BirthdayNotifier(
+        simulation_bot,
+        delivery_log,
+        TelegramRateLimiter(global_rate, TELEGRAM_CHAT_RATE),
+        fetch_page=fetch_page,
+    )
+    started_at = time.perf_counter()
+    try:
+        await notifier.run(date.today())
+    finally:
+        elapsed = time.perf_counter() - started_at
+        await simulation_bot.session.close()
+        delivery_log.close()
+        await runner.cleanup()
+    print('Отправлено {0} сообщений за {1:.2f} с: {2:.1f} сообщений/с, ошибок {3}'.format(
+        notifier.sent, elapsed, notifier.sent / elapsed, notifier.failed,
+    ))
+
+
+async def main(once: bool) -> None:
+    """Запускает рассылку уведомлений через общий экземпляр бота.
+
+    Args:
+        once (bool): Выполнить одну рассылку и завершиться.
+    """
+    from bot_instance import bot
+
+    delivery_log = DeliveryLog(NOTIFY_DB_PATH)
+    notifier = BirthdayNotifier(bot, delivery_log, TelegramRateLimiter(TELEGRAM_GLOBAL_RATE, TELEGRAM_CHAT_RATE))
+    try:
+        if once:
+            await notifier.run(date.today())
+        else:
+            await run_daily(notifier)
+    finally:
+        logger.info('Отправлено {0}, пропущено {1}, ошибок {2}'.format(notifier.sent, notifier.skipped, notifier.failed))
+        delivery_log.close()
+        await close_session()
+        await bot.session.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Планировщик уведомлений о днях рождения')
+    parser.add_argument('--once', action='store_true', help='выполнить одну рассылку и завершиться')
+    parser.add_argument('--simulate', type=int, metavar='USERS', help='рассылка фиктивным пользователям')
+    parser.add_argument('--global-rate', type=float, default=TELEGRAM_GLOBAL_RATE, help='общий лимит сообщений в секунду')
+    args = parser.parse_args()
+    if args.simulate:
+        asyncio.run(simulate(args.simulate, args.global_rate))
+    else:
+        asyncio.run(main(args.once))
@@ -2,24 +2,79 @@
 Модуль для выполнения HTTP-запросов к API.
 
 Этот модуль предоставляет функции для отправки данных пользователя на бекенд
-и получения их из него с использованием библиотеки aiohttp. Также он включает
-контекстный менеджер для работы с aiohttp-сессией.
+и получения их из него с использованием библиотеки aiohttp. Все запросы
+выполняются через одну долгоживущую aiohttp-сессию с пулом keep-alive
+соединений и кэшем DNS, которая открывается и закрывается вместе с ботом.
 """
-from contextlib import asynccontextmanager
+import asyncio
+import random
 from typing import Any, Dict, Optional
 
 import aiohttp
-from utils.config import HTTP_OK, NGROK_URL, logger
+from utils.config import (
+    ADMIN_TOKEN,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_GET_RETRIES,
+    HTTP_KEEPALIVE_TIMEOUT,
+    HTTP_OK,
+    HTTP_POOL_LIMIT,
+    HTTP_REQUEST_TIMEOUT,
+    HTTP_RETRY_BACKOFF,
+    HTTP_SERVER_ERROR,
+    NGROK_URL,
+    logger,
+)
+from utils.metrics import create_backend_trace_config
 
+_session: Optional[aiohttp.ClientSession] = None
+
+
+async def start_session() -> None:
+    """Создаёт общую aiohttp сессию для запросов к бекенду."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            keepalive_timeout=HTTP_KEEPALIVE_TIMEOUT,
+            use_dns_cache=True,
+            ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_REQUEST_TIMEOUT),
+            trace_configs=[create_backend_trace_config()],
+        )
+
+
+async def close_session() -> None:
+    """Закрывает общую aiohttp сессию."""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+async def get_session() -> aiohttp.ClientSession:
+    """Возвращает общую aiohttp сессию, создавая её при необходимости.
+
+    Returns:
+        aiohttp.ClientSession: Общая сессия для запросов к бекенду.
+    """
+    if _session is None or _session.closed:
+        await start_session()
+    return _session
 
-@asynccontextmanager
-async def get_session():
-    """Контекст менеджер для создания aiohttp сессии."""
-    session = aiohttp.ClientSession()
-    try:
-        yield session
-    finally:
-        await session.close()
+
+def _retry_delay(attempt: int) -> float:
+    """Рассчитывает задержку перед повтором запроса с экспоненциальным ростом и случайным разбросом.
+
+    Args:
+        attempt (int): Номер неудачной попытки, начиная с 0.
+
+    Returns:
+        float: Задержка в секундах.
+    """
+    return random.uniform(0, HTTP_RETRY_BACKOFF * 2 ** attempt)
 
 
 async def send_user_data(user_data: dict) -> Optional[str]:
@@ -31,35 +86,99 @@ async def send_user_data(user_data: dict) -> Optional[str]:
     Returns:
         Optional[str]: Текст ответа сервера в случае успешного выполнения запроса, иначе None
     """
-    async with get_session() as session:
-        try:
-            async with session.post('{0}/api/user/user_data'.format(NGROK_URL), json=user_data) as response:
-                response_text = await response.text()
-                if response.status == HTTP_OK:
-                    return response_text
-                logger.error('Ошибка при отправке данных: {0} {1}'.format(response.status, response_text))
-                return None
-        except aiohttp.ClientError as error:
-            logger.error('Ошибка соединения с сервером: {0}'.format(error))
+    session = await get_session()
+    try:
+        async with session.post('{0}/api/user/user_data'.format(NGROK_URL), json=user_data) as response:
+            response_text = await response.text()
+            if response.status == HTTP_OK:
+                return response_text
+            logger.error('Ошибка при отправке данных: {0} {1}'.format(response.status, response_text))
             return None
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        logger.error('Ошибка соединения с сервером: {0}'.format(error))
+        return None
+
 
+async def _get_json(
+    url: str,
+    params: Optional[Dict[str, Any]] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Выполнение GET-запроса к бекенду с повторами.
 
-async def fetch_user_data(user_id: str) -> Optional[Dict[str, Any]]:
-    """Получение данных пользователя из бекенда по его идентификатору.
+    Запрос повторяется до HTTP_GET_RETRIES раз при ошибках соединения,
+    таймаутах и ответах 5xx.
 
     Args:
-        user_id (str): Идентификатор пользователя
+        url (str): Адрес запроса
+        params (Optional[Dict[str, Any]]): Параметры строки запроса
+        headers (Optional[Dict[str, str]]): Дополнительные заголовки запроса
 
     Returns:
-        Optional[Dict[str, Any]]: Словарь с данными пользователя в случае успешного выполнения запроса, иначе None
+        Optional[Dict[str, Any]]: Тело ответа в случае успешного выполнения запроса, иначе None
     """
-    async with get_session() as session:
+    session = await get_session()
+    for attempt in range(HTTP_GET_RETRIES + 1):
         try:
-            async with session.get('{0}/api/user/user_data/{1}'.format(NGROK_URL, user_id)) as response:
+            async with session.get(url, params=params, headers=headers) as response:
                 if response.status == HTTP_OK:
                     return await response.json()
-                logger.error('Ошибка при получении данных пользователя: {0}'.format(response.status))
-                return None
-        except aiohttp.ClientError as error:
+                logger.error('Ошибка при получении данных: {0} {1}'.format(url, response.status))
+                if response.status < HTTP_SERVER_ERROR:
+                    return None
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
             logger.error('Ошибка соединения с сервером: {0}'.format(error))
+        if attempt < HTTP_GET_RETRIES:
+            await asyncio.sleep(_retry_delay(attempt))
+    return None
+
+
+async def fetch_upcoming_birthdays(
+    within_days: int,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """Получение страницы пользователей, чей день рождения наступает в ближайшие дни.
+
+    Args:
+        within_days (int): Длина окна в днях
+        limit (int): Размер страницы
+        cursor (Optional[str]): Курсор следующей страницы из предыдущего ответа
+
+    Returns:
+        Optional[Dict[str, Any]]: Пользователи и курсор следующей страницы, иначе None
+    """
+    params = {'within_days': within_days, 'limit': limit}
+    if cursor:
+        params['cursor'] = cursor
+    # Маршрут служебный и требует токен администратора бекенда
+    headers = {'X-Admin-Token': ADMIN_TOKEN} if ADMIN_TOKEN else None
+    return await _get_json('{0}/api/profile/upcoming'.format(NGROK_URL), params, headers)
+
+
+async def send_start_data(
+    user_data: dict,
+    target_id: Optional[int] = None,
+    target_username: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """Регистрация пользователя и получение профиля из ссылки одним запросом к бекенду.
+
+    Args:
+        user_data (dict): Словарь с информацией о пользователе
+        target_id (Optional[int]): Идентификатор пользователя из ссылки на профиль
+        target_username (Optional[str]): Юзернейм пользователя из ссылки на профиль
+
+    Returns:
+        Optional[Dict[str, Any]]: Результат регистрации и профиль из ссылки в ключе target, иначе None
+    """
+    session = await get_session()
+    payload = {'user': user_data, 'target_id': target_id, 'target_username': target_username}
+    try:
+        async with session.post('{0}/api/user/start'.format(NGROK_URL), json=payload) as response:
+            if response.status == HTTP_OK:
+                return await response.json()
+            logger.error('Ошибка при отправке данных: {0} {1}'.format(response.status, await response.text()))
             return None
+    except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+        logger.error('Ошибка соединения с сервером: {0}'.format(error))
+        return None
@@ -12,4 +12,48 @@ logger = logging.getLogger(__name__)
 
 TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 NGROK_URL = os.getenv('NGROK_URL')
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
 HTTP_OK = 200
+HTTP_SERVER_ERROR = 500
+
+HTTP_POOL_LIMIT = int(os.getenv('HTTP_POOL_LIMIT', 100))
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv('HTTP_KEEPALIVE_TIMEOUT', 60))
+HTTP_DNS_CACHE_TTL = int(os.getenv('HTTP_DNS_CACHE_TTL', 300))
+HTTP_REQUEST_TIMEOUT = float(os.getenv('HTTP_REQUEST_TIMEOUT', 10))
+HTTP_GET_RETRIES = int(os.getenv('HTTP_GET_RETRIES', 3))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', 0.2))
+
+PHOTO_CACHE_MAX_SIZE = int(os.getenv('PHOTO_CACHE_MAX_SIZE', 100000))
+PHOTO_CACHE_TTL = float(os.getenv('PHOTO_CACHE_TTL', 86400))
+PHOTO_PATH_REFRESH_AFTER = float(os.getenv('PHOTO_PATH_REFRESH_AFTER', 3000))
+PHOTO_PATH_MAX_AGE = float(os.getenv('PHOTO_PATH_MAX_AGE', 3600))
+PHOTO_CACHE_REFRESH_INTERVAL = float(os.getenv('PHOTO_CACHE_REFRESH_INTERVAL', 60))
+
+BOT_MODE_POLLING = 'polling'
+BOT_MODE_WEBHOOK = 'webhook'
+BOT_MODE = os.getenv('BOT_MODE', BOT_MODE_POLLING)
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/bot/webhook')
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '{0}{1}'.format(NGROK_URL, WEBHOOK_PATH))
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8080))
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', 1000))
+WEBHOOK_CONCURRENCY = int(os.getenv('WEBHOOK_CONCURRENCY', 50))
+WEBHOOK_DRAIN_TIMEOUT = float(os.getenv('WEBHOOK_DRAIN_TIMEOUT', 30))
+HTTP_BAD_REQUEST = 400
+HTTP_UNAUTHORIZED = 401
+HTTP_SERVICE_UNAVAILABLE = 503
+
+NOTIFY_DAYS = tuple(int(day) for day in os.getenv('NOTIFY_DAYS', '0,1,7').split(','))
+NOTIFY_HOUR = int(os.getenv('NOTIFY_HOUR', 9))
+NOTIFY_PAGE_SIZE = int(os.getenv('NOTIFY_PAGE_SIZE', 1000))
+NOTIFY_CONCURRENCY = int(os.getenv('NOTIFY_CONCURRENCY', 30))
+NOTIFY_DB_PATH = os.getenv('NOTIFY_DB_PATH', 'notifications.db')
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', 30))
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', 1))
+
+METRICS_PORT = int(os.getenv('METRICS_PORT', 9100))
+
+PROFILE_SECONDS = float(os.getenv('PROFILE_SECONDS', 30))
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', 0.005))
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
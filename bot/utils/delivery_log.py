@@ -0,0 +1,70 @@
+"""Модуль для учёта доставленных уведомлений.
+
+Журнал хранится в SQLite. Перед отправкой уведомление регистрируется в журнале,
+и повторная регистрация того же уведомления невозможна, поэтому после
+перезапуска планировщика сообщения не отправляются повторно. Если процесс
+завершился между регистрацией и отправкой, уведомление остаётся в статусе
+pending и не отправляется (доставка не более одного раза).
+"""
+import sqlite3
+
+STATUS_PENDING = 'pending'
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+
+
+class DeliveryLog:
+    """Журнал уведомлений о днях рождения."""
+
+    def __init__(self, path: str):
+        """Открывает журнал и создаёт таблицу, если её нет.
+
+        Args:
+            path (str): Путь к файлу базы данных SQLite.
+        """
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS deliveries ('
+            'user_id INTEGER NOT NULL, birthday TEXT NOT NULL, days_left INTEGER NOT NULL, '
+            'status TEXT NOT NULL, PRIMARY KEY (user_id, birthday, days_left))',
+        )
+        self._connection.commit()
+
+    def claim(self, user_id: int, birthday: str, days_left: int) -> bool:
+        """Регистрирует уведомление перед отправкой.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            birthday (str): Дата дня рождения, о котором уведомляем, в формате YYYY-MM-DD.
+            days_left (int): Количество дней до дня рождения.
+
+        Returns:
+            bool: True, если уведомление ещё не отправлялось и его можно отправить.
+        """
+        cursor = self._connection.execute(
+            'INSERT OR IGNORE INTO deliveries (user_id, birthday, days_left, status) VALUES (?, ?, ?, ?)',
+            (user_id, birthday, days_left, STATUS_PENDING),
+        )
+        self._connection.commit()
+        return cursor.rowcount == 1
+
+    def mark(self, user_id: int, birthday: str, days_left: int, status: str) -> None:
+        """Сохраняет результат отправки уведомления.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            birthday (str): Дата дня рождения в формате YYYY-MM-DD.
+            days_left (int): Количество дней до дня рождения.
+            status (str): Статус доставки: sent или failed.
+        """
+        self._connection.execute(
+            'UPDATE deliveries SET status = ? WHERE user_id = ? AND birthday = ? AND days_left = ?',
+            (status, user_id, birthday, days_left),
+        )
+        self._connection.commit()
+
+    def close(self) -> None:
+        """Закрывает журнал."""
+        self._connection.close()
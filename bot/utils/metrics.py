@@ -0,0 +1,150 @@
+"""Модуль метрик бота в формате Prometheus.
+
+Измеряется время обработки апдейтов обработчиками aiogram, время запросов
+к бекенду через общую aiohttp-сессию, время вызовов Bot API и работа кэша
+фотографий профилей. Метрики отдаются
+отдельным HTTP-сервером на порту METRICS_PORT.
+"""
+import re
+import time
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict
+
+import aiohttp
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from utils.config import METRICS_PORT, logger
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Числовые сегменты пути заменяются, чтобы количество рядов метрики не росло с числом пользователей
+PATH_ID_PATTERN = re.compile(r'/\d+(?=/|$)')
+
+HANDLER_DURATION = Histogram(
+    'bot_handler_duration_seconds',
+    'Время обработки апдейта обработчиком',
+    ['handler', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+BACKEND_REQUEST_DURATION = Histogram(
+    'bot_backend_request_duration_seconds',
+    'Время запроса к бекенду',
+    ['method', 'endpoint', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+TELEGRAM_REQUEST_DURATION = Histogram(
+    'bot_telegram_request_duration_seconds',
+    'Время вызова метода Bot API',
+    ['method', 'status'],
+    buckets=LATENCY_BUCKETS,
+)
+PHOTO_CACHE_LOOKUPS = Counter(
+    'bot_photo_cache_lookups',
+    'Обращения к кэшу фотографий профилей',
+    ['result'],
+)
+PHOTO_CACHE_REFRESHES = Counter(
+    'bot_photo_cache_refreshes',
+    'Вызовы get_file фоновым обновлением кэша фотографий',
+    ['status'],
+)
+PHOTO_CACHE_ENTRIES = Gauge(
+    'bot_photo_cache_entries',
+    'Количество записей в кэше фотографий',
+)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Middleware aiogram, измеряющее время работы обработчика."""
+
+    async def __call__(
+        self,
+        handler: Callable[[Any, Dict[str, Any]], Awaitable[Any]],
+        event: Any,
+        data: Dict[str, Any],
+    ) -> Any:
+        """Вызывает обработчик и записывает время его работы.
+
+        Args:
+            handler: Следующий обработчик в цепочке.
+            event: Событие Telegram.
+            data (Dict[str, Any]): Данные контекста обработки.
+
+        Returns:
+            Any: Результат обработчика.
+        """
+        handler_object = data.get('handler')
+        name = handler_object.callback.__name__ if handler_object is not None else type(event).__name__
+        status = 'ok'
+        started_at = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            HANDLER_DURATION.labels(name, status).observe(time.perf_counter() - started_at)
+
+
+class TelegramMetricsMiddleware(BaseRequestMiddleware):
+    """Middleware сессии aiogram, измеряющее время вызовов Bot API."""
+
+    async def __call__(self, make_request, bot, method):
+        """Выполняет вызов Bot API и записывает время его выполнения.
+
+        Args:
+            make_request: Следующий обработчик запроса в цепочке.
+            bot (Bot): Экземпляр бота.
+            method (TelegramMethod): Вызываемый метод Bot API.
+
+        Returns:
+            Response: Ответ Bot API.
+        """
+        status = 'ok'
+        started_at = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        except Exception as error:
+            status = type(error).__name__
+            raise
+        finally:
+            TELEGRAM_REQUEST_DURATION.labels(method.__api_method__, status).observe(time.perf_counter() - started_at)
+
+
+async def _on_request_start(session, context: SimpleNamespace, params) -> None:
+    """Запоминает время начала запроса к бекенду."""
+    context.started_at = time.perf_counter()
+
+
+async def _on_request_end(session, context: SimpleNamespace, params) -> None:
+    """Записывает время успешного запроса к бекенду."""
+    BACKEND_REQUEST_DURATION.labels(
+        params.method, PATH_ID_PATTERN.sub('/{id}', params.url.path), params.response.status,
+    ).observe(time.perf_counter() - context.started_at)
+
+
+async def _on_request_exception(session, context: SimpleNamespace, params) -> None:
+    """Записывает время запроса к бекенду, завершившегося ошибкой соединения."""
+    BACKEND_REQUEST_DURATION.labels(
+        params.method, PATH_ID_PATTERN.sub('/{id}', params.url.path), type(params.exception).__name__,
+    ).observe(time.perf_counter() - context.started_at)
+
+
+def create_backend_trace_config() -> aiohttp.TraceConfig:
+    """Создаёт трассировку aiohttp для измерения времени запросов к бекенду.
+
+    Returns:
+        aiohttp.TraceConfig: Конфигурация трассировки для ClientSession.
+    """
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    trace_config.on_request_end.append(_on_request_end)
+    trace_config.on_request_exception.append(_on_request_exception)
+    return trace_config
+
+
+def start_metrics_server() -> None:
+    """Запускает HTTP-сервер метрик на порту METRICS_PORT, если он задан."""
+    if METRICS_PORT:
+        start_http_server(METRICS_PORT)
+        logger.info('Metrics server started on port {0}'.format(METRICS_PORT))
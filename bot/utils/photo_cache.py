@@ -0,0 +1,166 @@
+"""Модуль с кэшем ссылок на фотографии профилей пользователей.
+
+Кэш хранит для каждого пользователя file_unique_id последней фотографии и путь
+к файлу на серверах Telegram. Если фотография не изменилась, повторный вызов
+get_file не выполняется. Фоновая задача обновляет пути к файлам до истечения
+срока действия ссылки Telegram, удаляет неиспользуемые записи и раз в интервал
+пишет в лог количество сэкономленных вызовов Bot API. Попадания и промахи кэша,
+вызовы get_file при обновлении и количество записей отдаются метриками бота.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from bot_instance import bot
+from utils.config import (
+    PHOTO_CACHE_MAX_SIZE,
+    PHOTO_CACHE_REFRESH_INTERVAL,
+    PHOTO_CACHE_TTL,
+    PHOTO_PATH_MAX_AGE,
+    PHOTO_PATH_REFRESH_AFTER,
+    logger,
+)
+from utils.metrics import PHOTO_CACHE_ENTRIES, PHOTO_CACHE_LOOKUPS, PHOTO_CACHE_REFRESHES
+
+
+@dataclass
+class PhotoEntry:
+    """Запись кэша фотографии профиля.
+
+    Attributes:
+        file_unique_id (str): Постоянный идентификатор файла фотографии.
+        file_id (str): Идентификатор файла для запросов к Bot API.
+        file_path (str): Путь к файлу на серверах Telegram.
+        path_updated_at (float): Время получения пути к файлу.
+        last_used_at (float): Время последнего обращения к записи.
+    """
+
+    file_unique_id: str
+    file_id: str
+    file_path: str
+    path_updated_at: float
+    last_used_at: float
+
+
+class PhotoCache:
+    """Кэш user_id -> (file_unique_id, file_path) с ограниченным размером и временем жизни.
+
+    Атрибуты:
+        calls_saved (int): Общее количество сэкономленных вызовов get_file.
+        refresh_calls (int): Общее количество вызовов get_file фоновым обновлением.
+        refresh_errors (int): Количество вызовов get_file фоновым обновлением, завершившихся ошибкой.
+    """
+
+    def __init__(self):
+        """Инициализирует кэш."""
+        self._entries: OrderedDict = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self.calls_saved = 0
+        self.refresh_calls = 0
+        self.refresh_errors = 0
+        PHOTO_CACHE_ENTRIES.set_function(lambda: len(self._entries))
+
+    def get(self, user_id: int, file_unique_id: str) -> Optional[str]:
+        """Возвращает путь к файлу, если фотография пользователя не изменилась.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            file_unique_id (str): Идентификатор текущей фотографии профиля.
+
+        Returns:
+            Optional[str]: Путь к файлу или None, если его нужно запросить через get_file.
+        """
+        entry = self._entries.get(user_id)
+        now = time.monotonic()
+        if (
+            entry is None
+            or entry.file_unique_id != file_unique_id
+            or now - entry.path_updated_at >= PHOTO_PATH_MAX_AGE
+        ):
+            PHOTO_CACHE_LOOKUPS.labels('miss').inc()
+            return None
+        entry.last_used_at = now
+        self._entries.move_to_end(user_id)
+        self.calls_saved += 1
+        PHOTO_CACHE_LOOKUPS.labels('hit').inc()
+        return entry.file_path
+
+    def set(self, user_id: int, file_unique_id: str, file_id: str, file_path: str) -> None:
+        """Сохраняет путь к файлу фотографии профиля.
+
+        Args:
+            user_id (int): Идентификатор пользователя.
+            file_unique_id (str): Идентификатор фотографии профиля.
+            file_id (str): Идентификатор файла для запросов к Bot API.
+            file_path (str): Путь к файлу на серверах Telegram.
+        """
+        now = time.monotonic()
+        self._entries[user_id] = PhotoEntry(file_unique_id, file_id, file_path, now, now)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > PHOTO_CACHE_MAX_SIZE:
+            self._entries.popitem(last=False)
+
+    async def start(self) -> None:
+        """Запускает фоновое обновление кэша."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Останавливает фоновое обновление кэша."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        """Периодически обновляет кэш и пишет в лог сэкономленные вызовы."""
+        calls_saved = 0
+        while True:
+            await asyncio.sleep(PHOTO_CACHE_REFRESH_INTERVAL)
+            try:
+                await self.refresh()
+            except Exception as error:
+                logger.error('Ошибка обновления кэша фотографий: {0}'.format(error))
+            logger.info((
+                'Кэш фотографий: сэкономлено вызовов Bot API за {0:.0f} с: {1}, записей: {2}, '
+                'ошибок обновления: {3}'
+            ).format(
+                PHOTO_CACHE_REFRESH_INTERVAL, self.calls_saved - calls_saved, len(self._entries), self.refresh_errors,
+            ))
+            calls_saved = self.calls_saved
+
+    async def refresh(self) -> None:
+        """Удаляет устаревшие записи и обновляет пути к файлам, срок действия которых подходит к концу.
+
+        Обновляются только записи, которые использовались после последнего получения пути.
+        Если get_file для пользователя завершился ошибкой, его запись удаляется, и путь
+        будет запрошен заново при следующем обращении; обновление остальных записей продолжается.
+        """
+        now = time.monotonic()
+        for user_id, entry in list(self._entries.items()):
+            if now - entry.last_used_at >= PHOTO_CACHE_TTL:
+                self._entries.pop(user_id, None)
+            elif now - entry.path_updated_at >= PHOTO_PATH_REFRESH_AFTER:
+                if entry.last_used_at <= entry.path_updated_at:
+                    self._entries.pop(user_id, None)
+                    continue
+                self.refresh_calls += 1
+                try:
+                    photo_file = await bot.get_file(entry.file_id)
+                except Exception as error:
+                    self.refresh_errors += 1
+                    PHOTO_CACHE_REFRESHES.labels('error').inc()
+                    self._entries.pop(user_id, None)
+                    logger.warning('Ошибка обновления фотографии пользователя {0}: {1}'.format(user_id, error))
+                    continue
+                PHOTO_CACHE_REFRESHES.labels('ok').inc()
+                entry.file_path = photo_file.file_path
+                entry.path_updated_at = time.monotonic()
+
+
+photo_cache = PhotoCache()
@@ -0,0 +1,32 @@
+"""Модуль запуска профилирования бота по сигналу.
+
+Профилирование запускается сигналом SIGUSR1 (kill -USR1 <pid>) на PROFILE_SECONDS секунд.
+"""
+import asyncio
+import signal
+from typing import Set
+
+from utils.config import PROFILE_DIR, PROFILE_INTERVAL, PROFILE_SECONDS, logger
+from utils.profiler import profile
+
+_tasks: Set[asyncio.Task] = set()
+
+
+async def _profile_on_signal() -> None:
+    """Выполняет профилирование, запущенное сигналом, и записывает ошибки в лог."""
+    try:
+        await profile(PROFILE_SECONDS, PROFILE_INTERVAL, PROFILE_DIR, 'bot')
+    except Exception as error:
+        logger.error('Profiling failed: {0}'.format(error))
+
+
+def _on_signal() -> None:
+    """Запускает профилирование в фоновой задаче."""
+    task = asyncio.create_task(_profile_on_signal())
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+def install_signal_handler() -> None:
+    """Устанавливает обработчик SIGUSR1, запускающий профилирование."""
+    asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, _on_signal)
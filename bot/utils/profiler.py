@@ -0,0 +1,126 @@
+# Копия backend/utils/profiler.py: бот собирается в отдельном образе без кода бекенда.
+# Не редактируйте этот файл, переносите изменения из бекенда.
+"""Модуль семплирующего профилировщика, включаемого во время работы.
+
+Фоновый поток с заданным интервалом снимает стек потока цикла событий через
+sys._current_frames() и считает одинаковые стеки. Результат сохраняется в
+формате collapsed stacks (кадры через «;» и количество), который принимают
+flamegraph.pl, speedscope и inferno. Пока профилировщик выключен, поток не
+запущен и никакие хуки не установлены, поэтому код можно оставлять в сборке.
+
+Модуль не импортирует код приложения: bot/utils/profiler.py — его копия для
+образа бота, изменения вносятся здесь и переносятся туда без правок.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler:
+    """Семплер стеков одного потока на отдельном потоке-таймере.
+
+    Атрибуты:
+        interval (float): Интервал между снимками стека в секундах.
+        samples (int): Количество снятых стеков.
+    """
+
+    def __init__(self, interval: float):
+        """Инициализирует семплер.
+
+        Args:
+            interval (float): Интервал между снимками стека в секундах.
+        """
+        self.interval = interval
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, thread_id: int) -> None:
+        """Запускает снятие стеков заданного потока.
+
+        Args:
+            thread_id (int): Идентификатор потока, стеки которого снимаются.
+        """
+        self._thread = threading.Thread(target=self._run, args=(thread_id,), name='stack-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Останавливает снятие стеков и дожидается завершения потока."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self, thread_id: int) -> None:
+        """Снимает стеки потока, пока семплер не остановлен.
+
+        Args:
+            thread_id (int): Идентификатор потока, стеки которого снимаются.
+        """
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                break
+            names = []
+            while frame is not None:
+                names.append('{0}:{1}'.format(frame.f_globals.get('__name__', '?'), frame.f_code.co_name))
+                frame = frame.f_back
+            names.reverse()
+            self._stacks[';'.join(names)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        """Возвращает стеки в формате collapsed stacks.
+
+        Returns:
+            str: Строки вида «кадр;кадр;кадр количество».
+        """
+        return ''.join('{0} {1}\n'.format(stack, count) for stack, count in self._stacks.most_common())
+
+
+_lock = threading.Lock()
+
+
+async def profile(seconds: float, interval: float, directory: str, name: str) -> Tuple[str, str]:
+    """Профилирует поток текущего цикла событий и сохраняет результат в файл.
+
+    Args:
+        seconds (float): Длительность профилирования в секундах.
+        interval (float): Интервал между снимками стека в секундах.
+        directory (str): Каталог для файла с результатом.
+        name (str): Префикс имени файла.
+
+    Returns:
+        Tuple[str, str]: Путь к файлу и стеки в формате collapsed stacks.
+
+    Raises:
+        RuntimeError: Если профилирование уже выполняется.
+    """
+    if not _lock.acquire(blocking=False):
+        raise RuntimeError('Profiling is already running')
+    try:
+        sampler = StackSampler(interval)
+        sampler.start(threading.get_ident())
+        logger.info('Profiling started for {0}s with interval {1}s'.format(seconds, interval))
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+        collapsed = sampler.collapsed()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, '{0}-{1}-{2}.collapsed'.format(
+            name, time.strftime('%Y%m%d-%H%M%S'), os.getpid(),
+        ))
+        with open(path, 'w') as profile_file:
+            profile_file.write(collapsed)
+        logger.info('Profiling finished: {0} samples saved to {1}'.format(sampler.samples, path))
+        return path, collapsed
+    finally:
+        _lock.release()
@@ -0,0 +1,95 @@
+"""Модуль с ограничителями частоты запросов к Telegram Bot API."""
+import asyncio
+import time
+from typing import Dict
+
+
+class TokenBucket:
+    """Ограничитель частоты по алгоритму маркерной корзины.
+
+    Каждый вызов acquire резервирует один маркер. Если маркеров не хватает,
+    вызов ожидает их пополнения. Резервирование выполняется без блокировок,
+    так как все вызовы работают в одном цикле событий.
+
+    Атрибуты:
+        rate (float): Скорость пополнения маркеров в секунду.
+        capacity (float): Максимальное количество маркеров.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1):
+        """Инициализирует корзину.
+
+        Args:
+            rate (float): Скорость пополнения маркеров в секунду.
+            capacity (float): Максимальное количество маркеров.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def reserve(self) -> float:
+        """Резервирует маркер и возвращает время ожидания до его появления.
+
+        Returns:
+            float: Время ожидания в секундах, 0 — если маркер доступен сразу.
+        """
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0
+        return -self._tokens / self.rate
+
+    async def acquire(self) -> None:
+        """Ожидает доступный маркер."""
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def is_idle(self) -> bool:
+        """Проверяет, что корзина полностью пополнилась и её можно удалить.
+
+        Returns:
+            bool: True, если корзина заполнена.
+        """
+        return self._tokens + (time.monotonic() - self._updated_at) * self.rate >= self.capacity
+
+
+class TelegramRateLimiter:
+    """Ограничитель отправки сообщений с общим лимитом и лимитом на каждый чат.
+
+    Атрибуты:
+        global_bucket (TokenBucket): Общая корзина для всех сообщений бота.
+        chat_rate (float): Допустимое количество сообщений в секунду в один чат.
+    """
+
+    def __init__(self, global_rate: float, chat_rate: float):
+        """Инициализирует ограничитель.
+
+        Args:
+            global_rate (float): Допустимое количество сообщений в секунду для всего бота.
+            chat_rate (float): Допустимое количество сообщений в секунду в один чат.
+        """
+        self.global_bucket = TokenBucket(global_rate, capacity=global_rate)
+        self.chat_rate = chat_rate
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+
+    async def acquire(self, chat_id: int) -> None:
+        """Ожидает возможности отправить сообщение в чат.
+
+        Args:
+            chat_id (int): Идентификатор чата.
+        """
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.chat_rate)
+        await bucket.acquire()
+        await self.global_bucket.acquire()
+
+    def cleanup(self) -> None:
+        """Удаляет корзины чатов, которые полностью пополнились."""
+        for chat_id, bucket in list(self._chat_buckets.items()):
+            if bucket.is_idle():
+                del self._chat_buckets[chat_id]
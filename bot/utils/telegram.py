@@ -1,27 +1,32 @@
 """Модуль с функциями для взаимодействия с пользователем."""
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from aiogram.types import Message
 from bot_instance import bot
 from keyboards.inline import create_start_keyboard
-from utils.backend_client import fetch_user_data
+from utils.backend_client import send_start_data, send_user_data
 from utils.config import NGROK_URL, TOKEN, logger
+from utils.photo_cache import photo_cache
 
 
-async def create_response_with_keyboard(message: Message, command_arg: Optional[str] = None) -> None:
+async def create_response_with_keyboard(
+    message: Message,
+    command_arg: Optional[str] = None,
+    user_data: Optional[Dict[str, Any]] = None,
+) -> None:
     """Создает ответ пользователю с клавиатурой.
 
     Args:
         message (Message): Сообщение от пользователя.
         command_arg (str, optional): Аргумент команды.
+        user_data (Dict[str, Any], optional): Данные пользователя из ссылки, полученные от бекенда.
     """
     if command_arg:
         logger.info('command.args: {0}'.format(command_arg))
 
-        user_data = await fetch_user_data(command_arg)
-
         if user_data and 'error' not in user_data:
-            profile_link = '{0}/profile/{1}'.format(NGROK_URL, command_arg)
+            # В ссылке может быть юзернейм, а страница профиля открывается по идентификатору
+            profile_link = '{0}/profile/{1}'.format(NGROK_URL, user_data['user_id'])
             keyboard = create_start_keyboard(profile_link=profile_link)
             await message.answer('Выберите действие для дальнейшего взаимодействия с ботом:', reply_markup=keyboard)
         else:
@@ -31,6 +36,41 @@ async def create_response_with_keyboard(message: Message, command_arg: Optional[
         await message.answer('Привет {0}!'.format(message.from_user.full_name), reply_markup=keyboard)
 
 
+async def register_user(message: Message) -> None:
+    """Регистрирует пользователя на бекенде.
+
+    Args:
+        message (Message): Сообщение от пользователя.
+    """
+    user_data = await get_and_structure_user_data(message)
+    response = await send_user_data(user_data)
+    if response:
+        logger.info('response: {0}'.format(response))
+
+
+async def register_user_and_fetch_target(message: Message, command_arg: str) -> Optional[Dict[str, Any]]:
+    """Регистрирует пользователя и получает профиль из ссылки одним запросом к бекенду.
+
+    Аргумент из цифр считается идентификатором пользователя, иначе — юзернеймом.
+
+    Args:
+        message (Message): Сообщение от пользователя.
+        command_arg (str): Аргумент команды с идентификатором или юзернеймом пользователя.
+
+    Returns:
+        Optional[Dict[str, Any]]: Данные пользователя из ссылки, если он найден, иначе None.
+    """
+    user_data = await get_and_structure_user_data(message)
+    if command_arg.isdigit():
+        response = await send_start_data(user_data, target_id=int(command_arg))
+    else:
+        response = await send_start_data(user_data, target_username=command_arg.lstrip('@'))
+    if not response:
+        return None
+    logger.info('response: {0}'.format(response.get('message')))
+    return response.get('target')
+
+
 async def get_and_structure_user_data(message: Message) -> dict:
     """Получает и структурирует данные пользователя.
 
@@ -59,6 +99,8 @@ async def get_and_structure_user_data(message: Message) -> dict:
 async def get_user_photo_url(user_id: int) -> Optional[str]:
     """Получение URL фотографии профиля пользователя.
 
+    Если фотография профиля не изменилась, путь к файлу берётся из кэша без вызова get_file.
+
     Args:
         user_id (int): Идентификатор пользователя
 
@@ -66,11 +108,15 @@ async def get_user_photo_url(user_id: int) -> Optional[str]:
         Optional[str]: URL фотографии профиля, если она есть, иначе None
     """
     try:
-        photos = await bot.get_user_profile_photos(user_id)
+        photos = await bot.get_user_profile_photos(user_id, limit=1)
         if photos.total_count > 0:
-            photo_id = photos.photos[0][0].file_id
-            photo_file = await bot.get_file(photo_id)
-            return 'https://api.telegram.org/file/bot{0}/{1}'.format(TOKEN, photo_file.file_path)
+            photo = photos.photos[0][0]
+            file_path = photo_cache.get(user_id, photo.file_unique_id)
+            if file_path is None:
+                photo_file = await bot.get_file(photo.file_id)
+                file_path = photo_file.file_path
+                photo_cache.set(user_id, photo.file_unique_id, photo.file_id, file_path)
+            return 'https://api.telegram.org/file/bot{0}/{1}'.format(TOKEN, file_path)
     except Exception as error:
         logger.error('Ошибка получения фотографии пользователя: {0}'.format(error))
 
@@ -0,0 +1,180 @@
+"""Модуль для запуска бота в режиме вебхука.
+
+Обновления от Telegram принимаются aiohttp-приложением и складываются в
+ограниченную очередь, из которой обрабатываются параллельно, но не более
+WEBHOOK_CONCURRENCY одновременно. Если очередь заполнена, вебхук отвечает 503,
+и Telegram повторяет доставку позже. При остановке приём обновлений
+прекращается, а уже принятые обновления дообрабатываются. Запросы без
+секрета WEBHOOK_SECRET отклоняются, поэтому без него вебхук не запускается.
+"""
+import asyncio
+import signal
+from typing import Optional, Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+from utils.config import (
+    HTTP_BAD_REQUEST,
+    HTTP_SERVICE_UNAVAILABLE,
+    HTTP_UNAUTHORIZED,
+    WEBHOOK_CONCURRENCY,
+    WEBHOOK_DRAIN_TIMEOUT,
+    WEBHOOK_HOST,
+    WEBHOOK_PATH,
+    WEBHOOK_PORT,
+    WEBHOOK_QUEUE_SIZE,
+    WEBHOOK_SECRET,
+    WEBHOOK_URL,
+    logger,
+)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class UpdateQueue:
+    """Очередь обновлений Telegram с ограниченной параллельной обработкой.
+
+    Атрибуты:
+        processed (int): Количество обработанных обновлений.
+        rejected (int): Количество обновлений, отклонённых из-за переполнения очереди.
+    """
+
+    def __init__(self, dp: Dispatcher, bot: Bot, maxsize: int, concurrency: int):
+        """Инициализирует очередь.
+
+        Args:
+            dp (Dispatcher): Диспетчер, обрабатывающий обновления.
+            bot (Bot): Экземпляр бота.
+            maxsize (int): Максимальное количество обновлений в очереди.
+            concurrency (int): Максимальное количество одновременно обрабатываемых обновлений.
+        """
+        self._dp = dp
+        self._bot = bot
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: Set[asyncio.Task] = set()
+        self._consumer: Optional[asyncio.Task] = None
+        self._accepting = False
+        self.processed = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        """Запускает обработку очереди."""
+        self._accepting = True
+        self._consumer = asyncio.create_task(self._consume())
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Принимает обновление от Telegram и ставит его в очередь.
+
+        Args:
+            request (web.Request): Запрос от Telegram.
+
+        Returns:
+            web.Response: 200, если обновление принято, 400 при некорректном теле запроса,
+                503 при переполнении очереди или остановке.
+        """
+        if request.headers.get(SECRET_HEADER) != WEBHOOK_SECRET:
+            return web.Response(status=HTTP_UNAUTHORIZED)
+        if not self._accepting:
+            return web.Response(status=HTTP_SERVICE_UNAVAILABLE)
+        try:
+            # Ошибки разбора JSON и проверки pydantic — подклассы ValueError
+            update = Update.model_validate(await request.json(), context={'bot': self._bot})
+        except ValueError as error:
+            logger.warning('Некорректное обновление в вебхуке: {0}'.format(error))
+            return web.Response(status=HTTP_BAD_REQUEST)
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return web.Response(status=HTTP_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
+        return web.Response()
+
+    async def _consume(self) -> None:
+        """Забирает обновления из очереди и запускает их обработку с учётом ограничения параллельности."""
+        while True:
+            update = await self._queue.get()
+            await self._semaphore.acquire()
+            task = asyncio.create_task(self._process(update))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _process(self, update: Update) -> None:
+        """Обрабатывает одно обновление.
+
+        Args:
+            update (Update): Обновление Telegram.
+        """
+        try:
+            await self._dp.feed_update(self._bot, update)
+        except Exception as error:
+            logger.error('Ошибка обработки обновления {0}: {1}'.format(update.update_id, error))
+        finally:
+            self.processed += 1
+            self._semaphore.release()
+            self._queue.task_done()
+
+    async def drain(self, timeout: float) -> None:
+        """Прекращает приём обновлений и дожидается обработки уже принятых.
+
+        Args:
+            timeout (float): Максимальное время ожидания в секундах.
+        """
+        self._accepting = False
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error('Не обработано обновлений при остановке: {0}'.format(self._queue.qsize() + len(self._tasks)))
+        if self._consumer is not None:
+            self._consumer.cancel()
+            try:
+                await self._consumer
+            except asyncio.CancelledError:
+                pass
+        for task in list(self._tasks):
+            task.cancel()
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot) -> None:
+    """Запускает бота в режиме вебхука и останавливает его по SIGINT или SIGTERM.
+
+    Args:
+        dp (Dispatcher): Диспетчер, обрабатывающий обновления.
+        bot (Bot): Экземпляр бота.
+
+    Raises:
+        RuntimeError: Если не задан WEBHOOK_SECRET.
+    """
+    if not WEBHOOK_SECRET:
+        raise RuntimeError('WEBHOOK_SECRET is required in webhook mode')
+    update_queue = UpdateQueue(dp, bot, maxsize=WEBHOOK_QUEUE_SIZE, concurrency=WEBHOOK_CONCURRENCY)
+    app = web.Application()
+    app.router.add_post(WEBHOOK_PATH, update_queue.handle)
+
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    await dp.emit_startup(bot=bot)
+    update_queue.start()
+    await web.TCPSite(runner, WEBHOOK_HOST, WEBHOOK_PORT).start()
+    await bot.set_webhook(
+        WEBHOOK_URL,
+        secret_token=WEBHOOK_SECRET,
+        allowed_updates=dp.resolve_used_update_types(),
+        max_connections=WEBHOOK_CONCURRENCY,
+    )
+    logger.info('Вебхук запущен: {0}'.format(WEBHOOK_URL))
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signal_number in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signal_number, stop_event.set)
+    try:
+        await stop_event.wait()
+    finally:
+        logger.info('Остановка вебхука, обработка оставшихся обновлений')
+        await update_queue.drain(WEBHOOK_DRAIN_TIMEOUT)
+        await runner.cleanup()
+        await dp.emit_shutdown(bot=bot)
+        await bot.session.close()
+        logger.info('Обработано обновлений: {0}, отклонено: {1}'.format(update_queue.processed, update_queue.rejected))